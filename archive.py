@@ -0,0 +1,125 @@
+import os
+import time
+import errno
+import shutil
+import argparse
+import config
+
+
+def archive_folder(input_dir, day=None, backup_dir=None):
+    """
+    پوشه backup یک پوشه ورودی برای یک روز: <MAIN_BACKUP_DIR>/<YYYY-MM-DD>/<پوشه ورودی>
+    """
+    if backup_dir is None:
+        backup_dir = config.MAIN_BACKUP_DIR
+    if day is None:
+        day = time.strftime("%Y-%m-%d")
+    # مسیرهای مطلق (مثلاً batch_extract.py --file) زیر همان ساختار قرار می‌گیرند
+    relative_dir = os.path.splitdrive(os.path.normpath(input_dir))[1].lstrip(os.sep)
+    return os.path.join(backup_dir, day, relative_dir)
+
+
+def unique_path(path):
+    """
+    اگر فایلی با همین نام قبلاً در backup باشد (مثلاً پردازش دوباره در همان روز) شماره به نام اضافه می‌شود
+    """
+    if not os.path.exists(path):
+        return path
+    stem, extension = os.path.splitext(path)
+    number = 1
+    while os.path.exists(f"{stem}_{number}{extension}"):
+        number += 1
+    return f"{stem}_{number}{extension}"
+
+
+def move_file(source, destination):
+    """
+    انتقال فایل بدون بازنویسی محتوا روی همان filesystem:
+    hardlink و سپس حذف مبدأ (فایل موجود در مقصد هرگز بازنویسی نمی‌شود)
+    یا rename اگر filesystem از hardlink پشتیبانی نکند
+    فقط بین دو device مختلف فایل کپی می‌شود (در فایل موقت و سپس rename، تا فایل نیمه‌کاره در backup نماند)
+    خروجی: روش انتقال ("link"، "rename" یا "copy")
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+        os.remove(source)
+        return "link"
+    except FileExistsError:
+        raise
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            if os.path.exists(destination):
+                raise
+            try:
+                os.rename(source, destination)
+                return "rename"
+            except OSError as rename_error:
+                if rename_error.errno != errno.EXDEV:
+                    raise
+
+    temp_path = f"{destination}.part"
+    try:
+        # copyfile روی Linux از sendfile استفاده می‌کند (بدون عبور داده از حافظه پایتون)
+        shutil.copyfile(source, temp_path)
+        shutil.copystat(source, temp_path)
+        with open(temp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(temp_path, destination)
+    except BaseException:
+        # کپی نیمه‌کاره (مثلاً دیسک پر یا قطع اجرا) در backup نمی‌ماند؛ مبدأ دست نخورده است
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    os.remove(source)
+    return "copy"
+
+
+def remove_intermediate(pdf_file, output_folder):
+    """
+    حذف فایل _flatten.pdf میانی یک ورودی (در حالت FLATTEN_IN_MEMORY=False)
+    """
+    pdf_basename = os.path.splitext(os.path.basename(pdf_file))[0]
+    flatten_file = os.path.join(output_folder, f"{pdf_basename}_flatten.pdf")
+    try:
+        os.remove(flatten_file)
+    except FileNotFoundError:
+        pass
+
+
+def archive_input(input_dir, pdf_file, output_folder=None, day=None):
+    """
+    انتقال فایل ورودی پردازش شده به پوشه backup امروز و حذف فایل‌های میانی آن
+    output_folder: پوشه خروجی این ورودی (پیش‌فرض <MAIN_OUTPUT_DIR>/<پوشه ورودی>)
+    خروجی: مسیر فایل در backup یا None در صورت خطا
+    """
+    if output_folder is None:
+        output_folder = os.path.join(config.MAIN_OUTPUT_DIR, input_dir)
+    remove_intermediate(pdf_file, output_folder)
+
+    destination = os.path.join(archive_folder(input_dir, day), os.path.basename(pdf_file))
+    # در صورت ساخته شدن همزمان فایلی با همین نام، نام بعدی امتحان می‌شود
+    for _ in range(10):
+        try:
+            destination = unique_path(destination)
+            move_file(pdf_file, destination)
+            return destination
+        except FileExistsError:
+            continue
+        except Exception:
+            break
+    print(f"Unexpected error while moving {os.path.basename(pdf_file)} to backup")
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move PDF files into the dated backup tree of config.MAIN_BACKUP_DIR")
+    parser.add_argument("pdf_files", nargs="+")
+    args = parser.parse_args()
+
+    for pdf_file in args.pdf_files:
+        backup_path = archive_input(os.path.dirname(pdf_file), pdf_file)
+        if backup_path is not None:
+            print(f"{pdf_file} -> {backup_path}")
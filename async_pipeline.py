@@ -0,0 +1,210 @@
+import os
+import time
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from extract_tables_dcr import load_coordinates_points
+from report_engine import write_report_json
+from batch_extract import collect_pdf_files, get_report_type, get_tables_info, get_output_folder, load_report, create_writer, OutputCommitter
+from manifest import load_manifest, update_manifest, template_hash, check_input
+from metrics import FileMetrics, emit_metrics
+from worker_pool import WorkerPool
+import config
+
+
+def read_pdf(pdf_file):
+    with open(pdf_file, 'rb') as f:
+        return f.read()
+
+
+def extract_pdf_data(pdf_data, pdf_file, report_type, tables_info):
+    """
+    استخراج ساختار گزارش از محتوای PDF (bytes)؛ در process pool اجرا می‌شود
+    worker فایل ورودی را نمی‌خواند و خروجی را نمی‌نویسد (هر دو در پردازش اصلی و به صورت async انجام می‌شوند)
+    """
+    metrics = FileMetrics(pdf_file) if config.METRICS_PATH else None
+    report = None
+    try:
+        report = load_report(pdf_data, report_type, tables_info, metrics)
+    finally:
+        if metrics is not None:
+            emit_metrics(metrics.to_record("ok" if report else "failed"))
+    return report or None
+
+
+def store_output(committer, report, job):
+    """
+    نوشتن یک گزارش: فایل JSON (مثل batch_extract) یا writer حالت‌های jsonl، sqlite و delta (OutputCommitter)
+    در thread نوشتن اجرا می‌شود؛ خروجی: True اگر گزارش نوشته شد
+    """
+    result = report
+    if report is not None and committer.writer is None:
+        pdf_basename = os.path.splitext(os.path.basename(job["pdf_file"]))[0]
+        try:
+            os.makedirs(job["output_folder"], exist_ok=True)
+            result = write_report_json(report, job["output_folder"], f"{pdf_basename}_flatten")
+        except Exception:
+            print(f"Unexpected error while writing output of {os.path.basename(job['pdf_file'])}")
+            result = None
+    return committer.store(result, job["pdf_file"], job["input_dir"], job["report_type"], job["fingerprint"], job["tables_hash"])
+
+
+async def run_pipeline(jobs, manifest, workers, output_mode, force=False, queue_size=None):
+    """
+    سه مرحله همزمان با صف‌های محدود بین آنها:
+    خواندن فایل‌ها (thread) -> استخراج از bytes (process pool) -> نوشتن خروجی (یک thread ثابت)
+    وقتی صفی پر است مرحله قبل منتظر می‌ماند، پس حداکثر حدود 2 * queue_size + workers فایل در حافظه است
+    هر فایل فقط یک بار و در مرحله‌ای که به آن ختم می‌شود شمرده می‌شود: بدون تغییر یا خطای خواندن در مرحله خواندن،
+    موفق یا ناموفق (خطای استخراج یا نوشتن) در OutputCommitter
+    خروجی: (تعداد موفق، تعداد ناموفق، تعداد فایل‌های بدون تغییر)
+    """
+    if queue_size is None:
+        queue_size = config.PIPELINE_QUEUE_SIZE
+    loop = asyncio.get_running_loop()
+    read_queue = asyncio.Queue(maxsize=queue_size)
+    write_queue = asyncio.Queue(maxsize=queue_size)
+    # written: فایل‌هایی که به مرحله نوشتن رسیده‌اند (فقط برای نمایش پیشرفت)
+    counts = {"written": 0, "read_failed": 0, "skipped": 0}
+    start_time = time.perf_counter()
+
+    async def read_files():
+        for job in jobs:
+            pdf_file = job["pdf_file"]
+            try:
+                # فایل فقط وقتی برای hash خوانده می‌شود که اندازه یا زمان تغییرش با manifest فرق کند
+                # و همان محتوا به مرحله استخراج داده می‌شود
+                entry = manifest.get(pdf_file)
+                stat = await asyncio.to_thread(os.stat, pdf_file)
+                data = None
+                if not (entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns):
+                    data = await asyncio.to_thread(read_pdf, pdf_file)
+                up_to_date, job["fingerprint"] = await asyncio.to_thread(check_input, manifest, pdf_file, job["tables_hash"], output_mode, data)
+                if up_to_date and not force:
+                    counts["skipped"] += 1
+                    continue
+                if data is None:
+                    data = await asyncio.to_thread(read_pdf, pdf_file)
+            except Exception:
+                print(f"Unexpected error while reading {os.path.basename(pdf_file)}")
+                counts["read_failed"] += 1
+                continue
+            await read_queue.put((job, data))
+
+    async def extract():
+        while True:
+            item = await read_queue.get()
+            if item is None:
+                return
+            job, data = item
+            try:
+                report = await loop.run_in_executor(
+                    process_pool.executor, extract_pdf_data, data, job["pdf_file"], job["report_type"], job["tables_info"]
+                )
+            except Exception:
+                print(f"Unexpected error while processing {os.path.basename(job['pdf_file'])}")
+                report = None
+            process_pool.recycle_if_needed()
+            # محتوای فایل قبل از انتظار برای صف نوشتن آزاد می‌شود
+            del data, item
+            await write_queue.put((job, report))
+
+    async def write_outputs():
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                return
+            job, report = item
+            await loop.run_in_executor(write_thread, store_output, committer, report, job)
+
+            counts["written"] += 1
+            elapsed = time.perf_counter() - start_time
+            rate = counts["written"] / elapsed if elapsed > 0 else 0.0
+            print(f"[{counts['written']}] {os.path.basename(job['pdf_file'])} - {rate:.2f} files/s")
+
+    # writer های jsonl و sqlite (اتصال SQLite) فقط در همین thread ساخته و استفاده می‌شوند
+    with WorkerPool(workers) as process_pool, ThreadPoolExecutor(max_workers=1) as write_thread:
+        writer = await loop.run_in_executor(write_thread, create_writer, output_mode)
+        committer = OutputCommitter(writer, manifest, output_mode)
+        try:
+            writer_task = asyncio.create_task(write_outputs())
+            extract_tasks = [asyncio.create_task(extract()) for _ in range(workers)]
+            await read_files()
+            for _ in extract_tasks:
+                await read_queue.put(None)
+            await asyncio.gather(*extract_tasks)
+            await write_queue.put(None)
+            await writer_task
+        finally:
+            await loop.run_in_executor(write_thread, committer.close)
+
+    return len(committer.committed), counts["read_failed"] + committer.failed, counts["skipped"]
+
+
+def run_async_batch(input_directories=None, workers=None, force=False, output_mode=None, queue_size=None):
+    """
+    اجرای گروهی مثل batch_extract.run_batch ولی با همپوشانی خواندن فایل‌ها، استخراج و نوشتن خروجی
+    (مناسب برای ورودی یا خروجی روی دیسک شبکه یا دیسک کند)
+    """
+    if input_directories is None:
+        input_directories = config.INPUT_DIRECTORIES
+    if workers is None:
+        workers = config.MAX_WORKERS
+    if output_mode is None:
+        output_mode = config.OUTPUT_MODE
+
+    coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+    if not coordinates_points:
+        print("Coordinates points not found")
+        return
+
+    template_hashes = {}
+    jobs = []
+    for input_dir, pdf_file in collect_pdf_files(input_directories):
+        report_type = get_report_type(input_dir)
+        if report_type is None:
+            continue
+        tables_info = get_tables_info(report_type, coordinates_points)
+        if not tables_info:
+            continue
+        if report_type not in template_hashes:
+            template_hashes[report_type] = template_hash(tables_info)
+        jobs.append({
+            "input_dir": input_dir,
+            "pdf_file": pdf_file,
+            "output_folder": get_output_folder(input_dir),
+            "report_type": report_type,
+            "tables_info": tables_info,
+            "tables_hash": template_hashes[report_type],
+        })
+
+    if not jobs:
+        print("No PDF files to process")
+        return
+
+    print(f"Processing up to {len(jobs)} files with {workers} workers")
+    manifest = load_manifest()
+    start_time = time.perf_counter()
+    try:
+        succeeded, failed, skipped = asyncio.run(run_pipeline(jobs, manifest, workers, output_mode, force, queue_size))
+    finally:
+        update_manifest(manifest)
+
+    if skipped:
+        print(f"Skipped {skipped} unchanged files")
+    elapsed = time.perf_counter() - start_time
+    rate = (succeeded + failed) / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {succeeded} succeeded, {failed} failed in {elapsed:.1f}s ({rate:.2f} files/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract tables from all PDFs in config.INPUT_DIRECTORIES, overlapping file reads, extraction and output writes")
+    parser.add_argument("--workers", type=int, default=config.MAX_WORKERS, help="number of worker processes")
+    parser.add_argument("--force", action="store_true", help="re-extract files even if the manifest says they are unchanged")
+    parser.add_argument("--output-mode", choices=config.OUTPUT_MODES, default=config.OUTPUT_MODE, help="one JSON file per report, consolidated JSONL files per rig and month, SQLite, or day-over-day deltas per rig")
+    parser.add_argument("--gzip", action="store_true", help="gzip the JSONL files")
+    parser.add_argument("--queue-size", type=int, default=config.PIPELINE_QUEUE_SIZE, help="maximum files waiting in each pipeline queue")
+    args = parser.parse_args()
+
+    if args.gzip:
+        config.JSONL_GZIP = True
+    run_async_batch(workers=args.workers, force=args.force, output_mode=args.output_mode, queue_size=args.queue_size)
@@ -0,0 +1,430 @@
+import os
+import time
+import heapq
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from flatten import flatten_with_pikepdf, flatten_in_memory
+from form_fields import read_form_fields, read_form_or_flatten
+# import ماژول DCR handler ها و template گزارش DCR را در report_engine ثبت می‌کند
+from extract_tables_dcr import load_coordinates_points
+from report_engine import REPORT_TEMPLATES, build_report, write_report_json
+from manifest import load_manifest, update_manifest, template_hash, check_input, record_output
+from metrics import FileMetrics, timed, emit_metrics, start_profiler, dump_profile, prune_profiles
+from jsonl_output import JsonlWriter
+from sqlite_sink import SqliteSink
+from delta_store import DeltaStore
+from worker_pool import WorkerPool
+from archive import archive_input
+from lazy_import import preload
+import config
+
+
+def collect_pdf_files(input_directories):
+    """
+    پیدا کردن همه فایل‌های PDF در پوشه‌های ورودی
+    خروجی: لیست (پوشه ورودی، مسیر فایل) به ترتیب نام فایل
+    فایل‌های _flatten.pdf که خروجی میانی هستند نادیده گرفته می‌شوند
+    """
+    pdf_files = []
+    for input_dir in input_directories:
+        if not os.path.isdir(input_dir):
+            continue
+        for file_name in sorted(os.listdir(input_dir)):
+            if not file_name.lower().endswith(".pdf") or file_name.endswith("_flatten.pdf"):
+                continue
+            pdf_files.append((input_dir, os.path.join(input_dir, file_name)))
+    return pdf_files
+
+
+def get_report_type(input_dir):
+    """
+    پیدا کردن نوع گزارش بر اساس پوشه نوع گزارش (مثلاً DCR_TEMP/O3 -> DCR_TEMP -> DCR)
+    اگر برای این پوشه template ای تعریف نشده باشد None برمی‌گرداند
+    """
+    report_folder = os.path.dirname(os.path.normpath(input_dir))
+    report_type = config.REPORT_TYPES.get(report_folder)
+    if report_type not in REPORT_TEMPLATES:
+        return None
+    return report_type
+
+
+def get_rig(input_dir):
+    """
+    نام دستگاه از پوشه ورودی (مثلاً DCR_TEMP/O3 -> O3)
+    """
+    return os.path.basename(os.path.normpath(input_dir))
+
+
+def get_output_folder(input_dir):
+    """
+    پوشه خروجی یک پوشه ورودی (<MAIN_OUTPUT_DIR>/<پوشه ورودی>)؛ خروجی فایل‌های خارج از پوشه‌های پروژه در خود MAIN_OUTPUT_DIR
+    """
+    if os.path.isabs(input_dir):
+        return config.MAIN_OUTPUT_DIR
+    return os.path.join(config.MAIN_OUTPUT_DIR, input_dir)
+
+
+def get_tables_info(report_type, coordinates_points):
+    """
+    متادیتای ناحیه‌های جدول برای یک نوع گزارش از coordinates_points.json
+    """
+    return coordinates_points.get(REPORT_TEMPLATES[report_type]["metadata_key"])
+
+
+def process_pdf(pdf_file, output_folder, report_type, tables_info, profile=False, output_mode=None, page_executor=None):
+    """
+    پردازش یک فایل: flatten و سپس استخراج جداول
+    این تابع در پردازش‌های جداگانه اجرا می‌شود و مسیر JSON خروجی (یا None) را برمی‌گرداند
+    در حالت‌های jsonl، sqlite و delta خود ساختار گزارش برگردانده می‌شود تا پردازش اصلی آن را بنویسد (OutputCommitter)
+    اگر config.METRICS_PATH تنظیم شده باشد زمان مراحل به صورت یک خط JSON ثبت می‌شود
+    profile: ذخیره خروجی cProfile این فایل در config.PROFILE_DIR (اجرای دوباره کندترین فایل‌ها؛ در metrics ثبت نمی‌شود)
+    page_executor: pool اختیاری برای خواندن موازی صفحه‌های همین فایل (run_single)
+    """
+    metrics = FileMetrics(pdf_file) if config.METRICS_PATH and not profile else None
+    profiler = start_profiler() if profile else None
+    start = time.perf_counter()
+    result = None
+    try:
+        result = extract_pdf(pdf_file, output_folder, report_type, tables_info, metrics, output_mode or config.OUTPUT_MODE, page_executor)
+    finally:
+        if profiler is not None:
+            dump_profile(profiler, pdf_file, time.perf_counter() - start)
+        if metrics is not None:
+            emit_metrics(metrics.to_record("ok" if result else "failed"))
+    return result
+
+
+def process_pdf_timed(*args):
+    """
+    process_pdf و مدت اجرای آن در worker (ثانیه)؛ برای پیدا کردن کندترین فایل‌ها بدون profile همه فایل‌ها
+    """
+    start = time.perf_counter()
+    result = process_pdf(*args)
+    return result, time.perf_counter() - start
+
+
+def profile_slowest_files(pool, timed_jobs, keep):
+    """
+    اجرای دوباره keep فایل کندتر با cProfile (timed_jobs: لیست (مدت، آرگومان‌های process_pdf))
+    خروجی این اجرا در پوشه موقت نوشته می‌شود و حذف می‌شود؛ فقط keep پروفایل کندترین‌ها نگه داشته می‌شوند
+    """
+    slowest = heapq.nlargest(keep, timed_jobs, key=lambda item: item[0])
+    if not slowest:
+        return
+    print(f"Profiling the {len(slowest)} slowest files")
+    with tempfile.TemporaryDirectory() as scratch_folder:
+        profile_jobs = ((job[0], (job[0], scratch_folder, job[2], job[3], True, job[5])) for _, job in slowest)
+        for pdf_file, future in pool.run(process_pdf, profile_jobs):
+            try:
+                future.result()
+            except Exception:
+                print(f"Unexpected error while profiling {os.path.basename(pdf_file)}")
+    prune_profiles(keep)
+
+
+def load_report(pdf_source, report_type, tables_info, metrics=None, page_executor=None, flatten_file=None):
+    """
+    ساختار گزارش یک PDF (بدون نوشتن خروجی) یا None
+    pdf_source: مسیر فایل یا محتوای PDF (bytes، مثلاً در async_pipeline)
+    flatten_file: مسیر فایل _flatten.pdf اگر flatten باید روی دیسک انجام شود (FLATTEN_IN_MEMORY=False)
+    """
+    # فرم‌هایی که مستقیماً قابل خواندن هستند flatten نمی‌شوند (مقدار فیلدها از خود فرم خوانده می‌شود)
+    form_fields = None
+    if config.FORM_FAST_PATH and flatten_file is None:
+        form_fields, pdf_source = read_form_or_flatten(pdf_source, metrics)
+    else:
+        if config.FORM_FAST_PATH:
+            with timed(metrics, "form_fields"):
+                form_fields = read_form_fields(pdf_source)
+        if form_fields is None:
+            with timed(metrics, "flatten"):
+                if flatten_file is None:
+                    pdf_source = flatten_in_memory(pdf_source)
+                else:
+                    flatten_with_pikepdf(pdf_source, flatten_file)
+                    pdf_source = flatten_file if os.path.exists(flatten_file) else None
+    if pdf_source is None:
+        return None
+
+    return build_report(pdf_source, report_type, tables_info, metrics, form_fields, page_executor)
+
+
+def extract_pdf(pdf_file, output_folder, report_type, tables_info, metrics=None, output_mode="json", page_executor=None):
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder, exist_ok=True)
+
+    pdf_basename = os.path.splitext(os.path.basename(pdf_file))[0]
+    # نام خروجی در هر دو حالت یکسان است (مثل قبل: <نام>_flatten_tables.json)
+    output_name = f"{pdf_basename}_flatten"
+
+    flatten_file = None if config.FLATTEN_IN_MEMORY else os.path.join(output_folder, f"{output_name}.pdf")
+    report = load_report(pdf_file, report_type, tables_info, metrics, page_executor, flatten_file)
+    if report is None:
+        return None
+    if output_mode != "json":
+        if not report:
+            print("No tables extracted from PDF")
+            return None
+        return report
+    return write_report_json(report, output_folder, output_name, metrics)
+
+
+def create_writer(output_mode):
+    """
+    writer پردازش اصلی برای حالت خروجی (در حالت json هر worker فایل خودش را می‌نویسد)
+    """
+    if output_mode == "jsonl":
+        return JsonlWriter()
+    if output_mode == "sqlite":
+        return SqliteSink()
+    if output_mode == "delta":
+        return DeltaStore()
+    return None
+
+
+class OutputCommitter:
+    """
+    نوشتن نتیجه process_pdf در writer و ثبت آن در manifest در پردازش اصلی
+    در حالت‌های jsonl، sqlite و delta گزارش‌ها ممکن است در writer بافر شوند؛ manifest و لیست فایل‌های قابل انتقال
+    به backup (committed) فقط بعد از flush موفق writer به‌روز می‌شوند، تا اگر نوشتن یک batch شکست بخورد
+    فایل‌های آن در اجرای بعد دوباره پردازش شوند
+    """
+
+    def __init__(self, writer, manifest, output_mode):
+        self.writer = writer
+        self.manifest = manifest
+        self.output_mode = output_mode
+        self.batch_size = getattr(writer, "batch_size", 1)
+        # خروجی‌های نوشته شده که هنوز flush نشده‌اند
+        self.pending = []
+        # (پوشه ورودی، مسیر فایل) های ثبت شده در manifest
+        self.committed = []
+        self.failed = 0
+
+    def store(self, result, pdf_file, input_dir, report_type, fingerprint, tables_hash):
+        """
+        result: مسیر JSON خروجی (حالت json) یا ساختار گزارش (حالت‌های دیگر) یا None
+        خروجی: True اگر نتیجه در writer نوشته شد (ثبت در manifest بعد از flush)
+        """
+        output_path = result
+        if result is not None and self.writer is not None:
+            try:
+                output_path = self.writer.write(result, pdf_file, report_type, get_rig(input_dir))
+            except Exception:
+                # batch بافر شده writer هم از دست رفته است
+                print(f"Unexpected error while writing {os.path.basename(pdf_file)}")
+                self.drop_pending()
+                output_path = None
+        if output_path is None:
+            self.failed += 1
+            return False
+
+        self.pending.append((input_dir, pdf_file, fingerprint, tables_hash, output_path))
+        if len(self.pending) >= self.batch_size:
+            self.commit()
+        return True
+
+    def drop_pending(self):
+        self.failed += len(self.pending)
+        self.pending.clear()
+
+    def commit(self):
+        """
+        flush writer و سپس ثبت خروجی‌های بافر شده در manifest؛ در صورت خطا هیچ‌کدام ثبت نمی‌شوند
+        """
+        if not self.pending:
+            return
+        if self.writer is not None:
+            try:
+                self.writer.flush()
+            except Exception:
+                print(f"Unexpected error while saving {len(self.pending)} outputs, they will be processed again")
+                self.drop_pending()
+                return
+        for input_dir, pdf_file, fingerprint, tables_hash, output_path in self.pending:
+            record_output(self.manifest, pdf_file, fingerprint, tables_hash, output_path, self.output_mode)
+            self.committed.append((input_dir, pdf_file))
+        self.pending.clear()
+
+    def close(self):
+        try:
+            self.commit()
+        finally:
+            if self.writer is not None:
+                self.writer.close()
+
+
+def archive_inputs(archived):
+    moved = sum(archive_input(input_dir, pdf_file, get_output_folder(input_dir)) is not None for input_dir, pdf_file in archived)
+    print(f"Archived {moved} files to {config.MAIN_BACKUP_DIR}")
+
+
+def run_batch(input_directories=None, workers=None, force=False, profile_slowest=None, output_mode=None, archive=False):
+    """
+    اجرای گروهی روی همه پوشه‌های ورودی با استفاده از process pool
+    پیشرفت کار و سرعت (فایل در ثانیه) را چاپ می‌کند
+    فایل‌هایی که طبق manifest خروجی معتبر دارند رد می‌شوند (مگر با force=True)
+    profile_slowest: تعداد کندترین فایل‌هایی که خروجی cProfile آنها نگه داشته می‌شود (0 یعنی بدون profile)
+    فایل‌ها بدون profile پردازش می‌شوند و در پایان فقط کندترین‌ها دوباره با profile اجرا می‌شوند
+    output_mode: "json" (یک فایل برای هر گزارش)، "jsonl" (فایل‌های مشترک برای هر دستگاه و ماه)، "sqlite" یا "delta"
+    workers طبق config.WORKER_MAX_FILES و config.WORKER_MAX_RSS_MB جایگزین می‌شوند (WorkerPool)
+    archive: فایل‌های پردازش شده (و بدون تغییر) در پایان به پوشه backup منتقل می‌شوند
+    """
+    if input_directories is None:
+        input_directories = config.INPUT_DIRECTORIES
+    if workers is None:
+        workers = config.MAX_WORKERS
+    if profile_slowest is None:
+        profile_slowest = config.PROFILE_SLOWEST
+    if output_mode is None:
+        output_mode = config.OUTPUT_MODE
+
+    coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+    if not coordinates_points:
+        print("Coordinates points not found")
+        return
+
+    manifest = load_manifest()
+    template_hashes = {}
+    fingerprints = {}
+    skipped = 0
+    # فایل‌هایی که خروجی معتبر دارند و بعد از ذخیره manifest به backup منتقل می‌شوند
+    archived = []
+
+    jobs = []
+    for input_dir, pdf_file in collect_pdf_files(input_directories):
+        report_type = get_report_type(input_dir)
+        if report_type is None:
+            continue
+        tables_info = get_tables_info(report_type, coordinates_points)
+        if not tables_info:
+            continue
+
+        if report_type not in template_hashes:
+            template_hashes[report_type] = template_hash(tables_info)
+        up_to_date, fingerprint = check_input(manifest, pdf_file, template_hashes[report_type], output_mode)
+        if up_to_date and not force:
+            skipped += 1
+            archived.append((input_dir, pdf_file))
+            continue
+        fingerprints[pdf_file] = (fingerprint, template_hashes[report_type])
+
+        output_folder = get_output_folder(input_dir)
+        jobs.append((input_dir, (pdf_file, output_folder, report_type, tables_info, False, output_mode)))
+
+    if skipped:
+        print(f"Skipped {skipped} unchanged files")
+
+    total = len(jobs)
+    if total == 0:
+        update_manifest(manifest)
+        if archive:
+            archive_inputs(archived)
+        print("No PDF files to process")
+        return
+
+    print(f"Processing {total} files with {workers} workers")
+    start_time = time.perf_counter()
+    done = 0
+    # (مدت پردازش، آرگومان‌های process_pdf) برای profile کندترین فایل‌ها
+    timed_jobs = []
+    committer = OutputCommitter(create_writer(output_mode), manifest, output_mode)
+
+    try:
+        with WorkerPool(workers) as pool:
+            tagged_jobs = (((input_dir, job), job) for input_dir, job in jobs)
+            for (input_dir, job), future in pool.run(process_pdf_timed, tagged_jobs):
+                pdf_file, report_type = job[0], job[2]
+                done += 1
+                try:
+                    result, seconds = future.result()
+                    timed_jobs.append((seconds, job))
+                except Exception:
+                    result = None
+                    print(f"Unexpected error while processing {os.path.basename(pdf_file)}")
+                committer.store(result, pdf_file, input_dir, report_type, *fingerprints[pdf_file])
+
+                elapsed = time.perf_counter() - start_time
+                rate = done / elapsed if elapsed > 0 else 0.0
+                print(f"[{done}/{total}] {os.path.basename(pdf_file)} - {rate:.2f} files/s")
+
+            # زمان اجرای دوباره برای profile در سرعت گزارش شده حساب نمی‌شود
+            finished_time = time.perf_counter()
+            if profile_slowest:
+                committer.commit()
+                profile_slowest_files(pool, timed_jobs, profile_slowest)
+    finally:
+        # نتایج تا این لحظه حتی در صورت قطع شدن اجرا ذخیره می‌شوند
+        committer.close()
+        update_manifest(manifest)
+
+    elapsed = finished_time - start_time
+    rate = total / elapsed if elapsed > 0 else 0.0
+    print(f"Done: {total - committer.failed} succeeded, {committer.failed} failed in {elapsed:.1f}s ({rate:.2f} files/s)")
+    if archive:
+        archive_inputs(archived + committer.committed)
+
+
+def run_single(pdf_file, report_type=None, page_workers=None):
+    """
+    استخراج فوری یک فایل (مثلاً استخراج دوباره به درخواست کاربر) با خواندن موازی صفحه‌ها
+    نوع گزارش اگر داده نشود از پوشه فایل پیدا می‌شود؛ خروجی JSON و manifest مثل اجرای گروهی است
+    """
+    if page_workers is None:
+        page_workers = config.PAGE_WORKERS
+    if not os.path.exists(pdf_file):
+        print("Input file not found.")
+        return None
+
+    input_dir = os.path.dirname(pdf_file)
+    if report_type is None:
+        report_type = get_report_type(input_dir)
+    if report_type not in REPORT_TEMPLATES:
+        print(f"Unknown report type for {os.path.basename(pdf_file)}")
+        return None
+
+    coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+    tables_info = get_tables_info(report_type, coordinates_points) if coordinates_points else None
+    if not tables_info:
+        print("Coordinates points not found")
+        return None
+
+    output_folder = get_output_folder(input_dir)
+    tables_hash = template_hash(tables_info)
+    manifest = load_manifest()
+    _, fingerprint = check_input(manifest, pdf_file, tables_hash, "json")
+
+    preload()
+    with ProcessPoolExecutor(max_workers=page_workers) as page_executor:
+        json_path = process_pdf(pdf_file, output_folder, report_type, tables_info, output_mode="json", page_executor=page_executor)
+
+    if json_path is not None:
+        record_output(manifest, pdf_file, fingerprint, tables_hash, json_path, "json")
+        update_manifest(manifest)
+    return json_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract tables from all PDFs in config.INPUT_DIRECTORIES")
+    parser.add_argument("--workers", type=int, default=config.MAX_WORKERS, help="number of worker processes")
+    parser.add_argument("--force", action="store_true", help="re-extract files even if the manifest says they are unchanged")
+    parser.add_argument("--profile-slowest", type=int, default=config.PROFILE_SLOWEST, help="keep cProfile dumps of the N slowest files in config.PROFILE_DIR")
+    parser.add_argument("--output-mode", choices=config.OUTPUT_MODES, default=config.OUTPUT_MODE, help="one JSON file per report, consolidated JSONL files per rig and month, SQLite, or day-over-day deltas per rig")
+    parser.add_argument("--gzip", action="store_true", help="gzip the JSONL files")
+    parser.add_argument("--max-files-per-worker", type=int, default=config.WORKER_MAX_FILES, help="replace the worker processes after about N files per worker (0: never)")
+    parser.add_argument("--max-worker-rss-mb", type=int, default=config.WORKER_MAX_RSS_MB, help="replace the workers when one grows above this RSS (0: never)")
+    parser.add_argument("--archive", action="store_true", help="move processed files into the dated backup tree of config.MAIN_BACKUP_DIR")
+    parser.add_argument("--file", help="extract only this PDF now, reading its pages in parallel")
+    parser.add_argument("--report-type", choices=sorted(REPORT_TEMPLATES), help="report type for --file (default: from its folder)")
+    parser.add_argument("--page-workers", type=int, default=config.PAGE_WORKERS, help="worker processes for the pages of --file")
+    args = parser.parse_args()
+
+    if args.file:
+        run_single(args.file, args.report_type, args.page_workers)
+    else:
+        if args.gzip:
+            config.JSONL_GZIP = True
+        config.WORKER_MAX_FILES = args.max_files_per_worker
+        config.WORKER_MAX_RSS_MB = args.max_worker_rss_mb
+        run_batch(workers=args.workers, force=args.force, profile_slowest=args.profile_slowest, output_mode=args.output_mode, archive=args.archive)
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from batch_extract import process_pdf, extract_pdf
+from extract_tables_dcr import load_coordinates_points
+from report_engine import REPORT_TEMPLATES
+from metrics import FileMetrics
+import config
+
+# افزایش بیش از این نسبت نسبت به baseline به عنوان پسرفت گزارش می‌شود
+REGRESSION_TOLERANCE = 0.10
+
+
+def use_metrics_path(metrics_path):
+    """
+    initializer پردازش‌های benchmark: metrics در فایل موقت نوشته می‌شوند نه در فایل metrics اصلی
+    """
+    config.METRICS_PATH = metrics_path
+
+
+def time_file(pdf_file, report_type, tables_info, output_folder):
+    """
+    زمان هر مرحله برای یک فایل (ثانیه) از همان مسیر production (extract_pdf با تنظیمات config:
+    مسیر سریع فرم، flatten در حافظه یا روی دیسک)؛ نام مراحل همان نام‌های FileMetrics است
+    """
+    metrics = FileMetrics(pdf_file)
+    json_path = extract_pdf(pdf_file, output_folder, report_type, tables_info, metrics, "json")
+    if json_path is None:
+        return None
+    timings = dict(metrics.stages)
+    timings["total"] = metrics.elapsed()
+    return timings
+
+
+def summarize(values):
+    return {
+        "mean": statistics.mean(values),
+        "median": statistics.median(values),
+        "max": max(values),
+    }
+
+
+def run_per_file(pdf_files, report_type, tables_info, output_folder):
+    """
+    اجرای ترتیبی روی همه فایل‌ها و خلاصه زمان هر مرحله
+    """
+    stage_times = {}
+    for pdf_file in pdf_files:
+        timings = time_file(pdf_file, report_type, tables_info, output_folder)
+        if timings is None:
+            print(f"Failed: {os.path.basename(pdf_file)}")
+            continue
+        for stage, seconds in timings.items():
+            stage_times.setdefault(stage, []).append(seconds)
+    return {stage: summarize(values) for stage, values in stage_times.items()}
+
+
+def run_batch_sizes(pdf_files, report_type, tables_info, output_folder, batch_sizes, workers):
+    """
+    سرعت (فایل در ثانیه) اجرای موازی برای هر اندازه batch
+    """
+    results = {}
+    for batch_size in batch_sizes:
+        batch = (pdf_files * (batch_size // len(pdf_files) + 1))[:batch_size]
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=use_metrics_path, initargs=(config.METRICS_PATH,)) as executor:
+            futures = [executor.submit(process_pdf, pdf_file, output_folder, report_type, tables_info, False, "json")
+                       for pdf_file in batch]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - start
+        results[str(batch_size)] = {"seconds": elapsed, "files_per_second": batch_size / elapsed}
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """
+    مقایسه با baseline ذخیره شده؛ لیست پیام‌های پسرفت را برمی‌گرداند
+    برای زمان مراحل، افزایش median و برای batch ها، کاهش files_per_second پسرفت است
+    """
+    regressions = []
+    for stage, stats in results.get("per_file", {}).items():
+        old = baseline.get("per_file", {}).get(stage)
+        if old and stats["median"] > old["median"] * (1 + tolerance):
+            regressions.append(f"{stage}: median {old['median']:.4f}s -> {stats['median']:.4f}s")
+    for batch_size, stats in results.get("batches", {}).items():
+        old = baseline.get("batches", {}).get(batch_size)
+        if old and stats["files_per_second"] < old["files_per_second"] * (1 - tolerance):
+            regressions.append(f"batch {batch_size}: {old['files_per_second']:.2f} -> {stats['files_per_second']:.2f} files/s")
+    return regressions
+
+
+def print_results(results):
+    for stage, stats in results["per_file"].items():
+        print(f"{stage:>14}: median {stats['median'] * 1000:8.1f} ms  mean {stats['mean'] * 1000:8.1f} ms  max {stats['max'] * 1000:8.1f} ms")
+    for batch_size, stats in results["batches"].items():
+        print(f"batch {batch_size:>5}: {stats['seconds']:.2f}s  {stats['files_per_second']:.2f} files/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark flatten, extraction and serialization")
+    parser.add_argument("--input", help="folder with PDF files (default: generate synthetic files)")
+    parser.add_argument("--report-type", default="DCR", choices=sorted(REPORT_TEMPLATES))
+    parser.add_argument("--generate", type=int, default=10, help="number of synthetic files when --input is not given")
+    parser.add_argument("--batch-sizes", default="1,8,32", help="comma separated batch sizes for the parallel run")
+    parser.add_argument("--workers", type=int, default=config.MAX_WORKERS)
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+    tables_info = coordinates_points.get(REPORT_TEMPLATES[args.report_type]["metadata_key"]) if coordinates_points else None
+    if not tables_info:
+        print("Coordinates points not found")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.input:
+            pdf_files = sorted(glob.glob(os.path.join(args.input, "*.pdf")))
+        else:
+            # ماژول generator فقط در این حالت لازم است (reportlab)
+            from synthetic_reports import generate_reports
+            pdf_files = generate_reports(os.path.join(work_dir, "input"), REPORT_TEMPLATES[args.report_type]["metadata_key"], args.generate)
+        if not pdf_files:
+            print("No PDF files found")
+            sys.exit(1)
+
+        output_folder = os.path.join(work_dir, "output")
+        os.makedirs(output_folder, exist_ok=True)
+        # process_pdf زمان مراحل را در فایل موقت ثبت می‌کند (فایل metrics اصلی تغییر نمی‌کند)
+        config.METRICS_PATH = os.path.join(work_dir, "metrics.jsonl")
+
+        results = {
+            "files": len(pdf_files),
+            "report_type": args.report_type,
+            "settings": {"form_fast_path": config.FORM_FAST_PATH, "flatten_in_memory": config.FLATTEN_IN_MEMORY},
+            "per_file": run_per_file(pdf_files, args.report_type, tables_info, output_folder),
+            "batches": run_batch_sizes(
+                pdf_files, args.report_type, tables_info, output_folder,
+                [int(size) for size in args.batch_sizes.split(",")], args.workers,
+            ),
+        }
+
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against baseline")
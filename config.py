@@ -23,5 +23,81 @@ MAIN_BACKUP_DIR = 'BACKUP'
 # مسیر فایل coordinates_points.json
 COORDINATES_POINTS_PATH="coordinates_points.json"
 
+# نوع گزارش (template در report_engine) برای هر پوشه ورودی
+# فقط پوشه‌هایی که اینجا تعریف شده‌اند در اجرای گروهی پردازش می‌شوند
+REPORT_TYPES = {
+    FOLDER_DDR: "DDR",
+    FOLDER_MOVING: "DMR",
+    FOLDER_POB: "POB",
+    FOLDER_DCR: "DCR",
+}
 
+# تعداد پردازش‌های موازی برای اجرای گروهی
+MAX_WORKERS = os.cpu_count() or 1
+# تعداد پردازش‌ها برای خواندن موازی صفحه‌های یک فایل (batch_extract.py --file)
+PAGE_WORKERS = MAX_WORKERS
 
+# --- حالت حافظه محدود (اجراهای طولانی) ---
+# workers بعد از حدود این تعداد فایل برای هر worker با پردازش‌های جدید جایگزین می‌شوند (0 یعنی بدون محدودیت)
+WORKER_MAX_FILES = 0
+# اگر حافظه (RSS) یکی از workers از این مقدار (مگابایت) بیشتر شود workers جایگزین می‌شوند (0 یعنی بدون محدودیت)
+WORKER_MAX_RSS_MB = 0
+# حداکثر تعداد فایل‌های خوانده شده (یا گزارش‌های آماده نوشتن) در هر صف async_pipeline.py
+# حافظه مصرفی با این مقدار محدود می‌شود نه با تعداد فایل‌ها
+PIPELINE_QUEUE_SIZE = 2 * MAX_WORKERS
+
+# --- سرویس workers گرم (worker_service.py) ---
+# آدرس سرویس: مسیر Unix socket یا (host, port)
+WORKER_SERVICE_ADDRESS = os.path.join(MAIN_OUTPUT_DIR, "worker_service.sock")
+# کلید احراز هویت اتصال‌ها (bytes)؛ برای آدرس (host, port) الزامی است
+# None فقط برای Unix socket مجاز است که دسترسی آن به کاربر اجرا کننده سرویس محدود می‌شود
+WORKER_SERVICE_AUTHKEY = None
+
+# flatten در حافظه به جای نوشتن فایل _flatten.pdf روی دیسک
+FLATTEN_IN_MEMORY = True
+
+# خواندن مستقیم مقدار فیلدهای فرم (AcroForm) به جای flatten؛ ناحیه‌هایی که فرم پوشش نمی‌دهد flatten می‌شوند
+FORM_FAST_PATH = True
+
+# نسخه استخراج‌کننده؛ با تغییر منطق استخراج این مقدار را افزایش دهید
+# تا همه فایل‌ها دوباره پردازش شوند
+EXTRACTOR_VERSION = "1"
+
+# نوع خروجی: "json" یک فایل برای هر گزارش، "jsonl" یک خط برای هر گزارش در فایل‌های هر دستگاه و ماه
+# "sqlite" ثبت در پایگاه داده SQLITE_PATH و "delta" فقط تفاوت با گزارش روز قبل هر دستگاه (delta_store.py)
+OUTPUT_MODE = "json"
+OUTPUT_MODES = ["json", "jsonl", "sqlite", "delta"]
+JSONL_OUTPUT_DIR = os.path.join(MAIN_OUTPUT_DIR, "jsonl")
+# فشرده‌سازی فایل‌های JSONL با gzip
+JSONL_GZIP = False
+SQLITE_PATH = os.path.join(MAIN_OUTPUT_DIR, "reports.sqlite")
+# تعداد گزارش‌هایی که در یک transaction ثبت می‌شوند
+SQLITE_BATCH_SIZE = 100
+# پوشه خروجی ستونی (Parquet/Arrow) ردیف‌های افراد
+EXPORT_DIR = os.path.join(MAIN_OUTPUT_DIR, "person_shifts")
+
+# پوشه خروجی حالت delta و تعداد تفاوت‌های پشت سر هم قبل از یک snapshot کامل (0 یعنی همیشه snapshot)
+DELTA_OUTPUT_DIR = os.path.join(MAIN_OUTPUT_DIR, "delta")
+DELTA_SNAPSHOT_INTERVAL = 30
+
+# شناسه‌های ثابت نام‌ها، سمت‌ها و شرکت‌ها (roster_index.py)
+ROSTER_PATH = os.path.join(MAIN_OUTPUT_DIR, "roster.json")
+
+# manifest فایل‌های پردازش شده (hash ورودی، hash template و نسخه استخراج‌کننده)
+MANIFEST_PATH = os.path.join(MAIN_OUTPUT_DIR, "manifest.json")
+
+# --- metrics و profile ---
+# زمان مراحل هر فایل به صورت یک خط JSON در این فایل ثبت می‌شود (None یعنی غیرفعال)
+# مثلاً os.path.join(MAIN_OUTPUT_DIR, "metrics.jsonl")
+METRICS_PATH = None
+# تعداد کندترین فایل‌هایی که خروجی cProfile آنها نگه داشته می‌شود (0 یعنی غیرفعال)
+PROFILE_SLOWEST = 0
+PROFILE_DIR = os.path.join(MAIN_OUTPUT_DIR, "profiles")
+
+# --- حالت watch ---
+# فایل باید این مدت (ثانیه) بدون تغییر بماند تا پردازش شود (آپلود نیمه‌کاره)
+WATCH_SETTLE_SECONDS = 5
+# فاصله بررسی پوشه‌ها در حالت polling و حداکثر انتظار برای رویدادهای inotify
+WATCH_POLL_INTERVAL = 2
+# بررسی کامل پوشه‌ها حتی با inotify، برای رویدادهای از دست رفته
+WATCH_RESCAN_INTERVAL = 60
@@ -0,0 +1,282 @@
+import os
+import json
+import argparse
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from jsonl_output import dumps_compact
+from report_rows import report_date, iter_output_reports
+import config
+
+# تعداد گزارش‌های بازسازی شده که در حافظه نگه داشته می‌شوند (پایه delta روز بعد)
+CACHE_SIZE = 64
+
+
+def item_key(item):
+    return json.dumps(item, ensure_ascii=False, sort_keys=True)
+
+
+def json_diff(old, new):
+    """
+    تفاوت دو ساختار JSON؛ None اگر یکسان باشند
+    {"value": مقدار جدید}، {"dict": {کلید: تفاوت}، "remove": [...]، "order": [...]}
+    یا {"list": [[i1, i2, ردیف‌های جدید], ...]، "patch": [[i، تفاوت]، ...]}
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = {}
+        for key, value in new.items():
+            if key not in old:
+                changes[key] = {"value": value}
+                continue
+            change = json_diff(old[key], value)
+            if change is not None:
+                changes[key] = change
+        removed = [key for key in old if key not in new]
+        kept_order = [key for key in old if key in new] + [key for key in new if key not in old]
+        if not changes and not removed and kept_order == list(new):
+            return None
+        delta = {"dict": changes}
+        if removed:
+            delta["remove"] = removed
+        if kept_order != list(new):
+            delta["order"] = list(new)
+        return delta
+
+    if isinstance(old, list) and isinstance(new, list):
+        splices = []
+        patches = []
+        matcher = SequenceMatcher(None, [item_key(item) for item in old], [item_key(item) for item in new], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            if tag == "replace" and i2 - i1 == j2 - j1:
+                # همان افراد با تعداد وعده متفاوت: فقط تفاوت هر ردیف ذخیره می‌شود
+                patches.extend([i1 + offset, json_diff(old[i1 + offset], new[j1 + offset])] for offset in range(i2 - i1))
+            else:
+                splices.append([i1, i2, new[j1:j2]])
+        if not splices and not patches:
+            return None
+        delta = {"list": splices}
+        if patches:
+            delta["patch"] = patches
+        return delta
+
+    if type(old) is type(new) and old == new:
+        return None
+    return {"value": new}
+
+
+def apply_diff(old, delta):
+    """
+    ساختن نسخه جدید از old و تفاوت json_diff (old تغییر نمی‌کند؛ بخش‌های بدون تغییر بین دو نسخه مشترک هستند)
+    """
+    if delta is None:
+        return old
+    if "value" in delta:
+        return delta["value"]
+
+    if "dict" in delta:
+        removed = set(delta.get("remove", ()))
+        new = {key: value for key, value in old.items() if key not in removed}
+        for key, change in delta["dict"].items():
+            new[key] = apply_diff(old.get(key), change)
+        if "order" in delta:
+            new = {key: new[key] for key in delta["order"]}
+        return new
+
+    patches = dict(delta.get("patch", ()))
+    new = []
+    position = 0
+    for i1, i2, items in delta["list"] + [[len(old), len(old), []]]:
+        new.extend(apply_diff(old[index], patches.get(index)) for index in range(position, i1))
+        new.extend(items)
+        position = i2
+    return new
+
+
+class DeltaStore:
+    """
+    ذخیره هر گزارش فقط به صورت تفاوت با گزارش روز قبل همان دستگاه:
+    <output_dir>/<report_type>/<rig>/<YYYY-MM-DD>.json
+    هر فایل یا snapshot کامل است ({"report": ...}) یا تفاوت با روز base ({"base": تاریخ، "delta": ...})؛
+    هر فایل base خودش را دارد، پس گزارش‌هایی که به ترتیب تاریخ نمی‌رسند هم درست ذخیره می‌شوند
+    بعد از snapshot_interval تفاوت پشت سر هم یک snapshot کامل نوشته می‌شود تا بازسازی هر روز ارزان بماند
+    گزارش‌های بدون تاریخ به صورت snapshot با نام فایل PDF ذخیره می‌شوند
+    """
+
+    def __init__(self, output_dir=None, snapshot_interval=None):
+        self.output_dir = output_dir or config.DELTA_OUTPUT_DIR
+        self.snapshot_interval = config.DELTA_SNAPSHOT_INTERVAL if snapshot_interval is None else snapshot_interval
+        self._cache = OrderedDict()
+
+    def rig_dir(self, report_type, rig):
+        return os.path.join(self.output_dir, report_type, rig)
+
+    def dates(self, report_type, rig):
+        """
+        تاریخ‌های ذخیره شده یک دستگاه به ترتیب
+        """
+        rig_dir = self.rig_dir(report_type, rig)
+        if not os.path.isdir(rig_dir):
+            return []
+        return sorted(file_name[:-len(".json")] for file_name in os.listdir(rig_dir)
+                      if file_name.endswith(".json") and not file_name.startswith("undated_"))
+
+    def _load_entry(self, report_type, rig, date):
+        with open(os.path.join(self.rig_dir(report_type, rig), f"{date}.json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_entry(self, path, entry):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(dumps_compact(entry))
+        os.replace(temp_path, path)
+
+    def _remember(self, report_type, rig, date, report):
+        self._cache[(report_type, rig, date)] = report
+        self._cache.move_to_end((report_type, rig, date))
+        while len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def read(self, report_type, rig, date):
+        """
+        بازسازی گزارش یک روز: از نزدیک‌ترین snapshot (یا گزارش در حافظه) و اعمال تفاوت‌ها
+        """
+        chain = []
+        key = date
+        report = None
+        while True:
+            report = self._cache.get((report_type, rig, key))
+            if report is not None:
+                break
+            entry = self._load_entry(report_type, rig, key)
+            if entry.get("base") is None:
+                report = entry["report"]
+                break
+            chain.append((key, entry["delta"]))
+            key = entry["base"]
+        for key, delta in reversed(chain):
+            report = apply_diff(report, delta)
+            self._remember(report_type, rig, key, report)
+        self._remember(report_type, rig, date, report)
+        return report
+
+    def _rebase_children(self, report_type, rig, date):
+        """
+        قبل از بازنویسی یک روز، روزهایی که تفاوتشان با این روز ذخیره شده به snapshot تبدیل می‌شوند
+        """
+        for child in self.dates(report_type, rig):
+            if child <= date:
+                continue
+            entry = self._load_entry(report_type, rig, child)
+            if entry.get("base") != date:
+                continue
+            entry["report"] = self.read(report_type, rig, child)
+            entry["base"] = None
+            entry["depth"] = 0
+            del entry["delta"]
+            self._write_entry(os.path.join(self.rig_dir(report_type, rig), f"{child}.json"), entry)
+        for key in [key for key in self._cache if key[:2] == (report_type, rig) and key[2] >= date]:
+            del self._cache[key]
+
+    def write(self, report, pdf_file, report_type, rig):
+        """
+        ذخیره یک گزارش و برگرداندن مسیر فایل آن
+        """
+        source = os.path.basename(pdf_file)
+        date = report_date(report)
+        try:
+            # همان شکلی که از فایل خوانده می‌شود (کلیدهای عددی جداول records به string)، تا تفاوت با روزهای قبل درست باشد
+            report = json.loads(dumps_compact(report))
+            if date is None:
+                path = os.path.join(self.rig_dir(report_type, rig), f"undated_{os.path.splitext(source)[0]}.json")
+                self._write_entry(path, {"date": None, "source": source, "base": None, "depth": 0, "report": report})
+                return path
+
+            path = os.path.join(self.rig_dir(report_type, rig), f"{date}.json")
+            dates = self.dates(report_type, rig)
+            if date in dates:
+                if self.read(report_type, rig, date) == report:
+                    return path
+                self._rebase_children(report_type, rig, date)
+
+            entry = {"date": date, "source": source, "base": None, "depth": 0, "report": report}
+            earlier = [day for day in dates if day < date]
+            if earlier and self.snapshot_interval > 0:
+                base = earlier[-1]
+                depth = self._load_entry(report_type, rig, base).get("depth", 0) + 1
+                if depth < self.snapshot_interval:
+                    delta = json_diff(self.read(report_type, rig, base), report)
+                    delta_entry = {"date": date, "source": source, "base": base, "depth": depth, "delta": delta}
+                    # اگر تفاوت از خود گزارش بزرگ‌تر باشد (مثلاً گزارش کاملاً متفاوت) snapshot نوشته می‌شود
+                    if len(dumps_compact(delta_entry)) < len(dumps_compact(entry)):
+                        entry = delta_entry
+
+            self._write_entry(path, entry)
+            self._remember(report_type, rig, date, report)
+            return path
+        except Exception:
+            print(f"Unexpected error while writing {source} to delta store")
+        return None
+
+    def iter_reports(self):
+        """
+        بازسازی همه گزارش‌ها به ترتیب تاریخ هر دستگاه
+        خروجی مثل iter_output_reports: (گزارش، نام فایل PDF، نوع گزارش، دستگاه)
+        """
+        if not os.path.isdir(self.output_dir):
+            return
+        for report_type in sorted(os.listdir(self.output_dir)):
+            type_dir = os.path.join(self.output_dir, report_type)
+            if not os.path.isdir(type_dir):
+                continue
+            for rig in sorted(os.listdir(type_dir)):
+                rig_dir = os.path.join(type_dir, rig)
+                for file_name in sorted(os.listdir(rig_dir)):
+                    if not file_name.endswith(".json"):
+                        continue
+                    try:
+                        with open(os.path.join(rig_dir, file_name), encoding="utf-8") as f:
+                            entry = json.load(f)
+                        report = self.read(report_type, rig, entry["date"]) if entry.get("date") else entry["report"]
+                    except Exception:
+                        print(f"Unexpected error while loading {file_name}")
+                        continue
+                    yield report, entry.get("source"), report_type, rig
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._cache.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store extracted reports as day-over-day deltas per rig and reconstruct them")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="add existing JSON/JSONL outputs to the delta store")
+    import_parser.add_argument("output_dir", nargs="?", default=config.MAIN_OUTPUT_DIR)
+    show_parser = subparsers.add_parser("show", help="print the reconstructed report of one day")
+    show_parser.add_argument("report_type")
+    show_parser.add_argument("rig")
+    show_parser.add_argument("date", help="YYYY-MM-DD from the report header")
+    parser.add_argument("--store", default=config.DELTA_OUTPUT_DIR, help="delta store folder")
+    args = parser.parse_args()
+
+    with DeltaStore(args.store) as store:
+        if args.command == "import":
+            stored = 0
+            for report, source, report_type, rig in iter_output_reports(args.output_dir):
+                stored += store.write(report, source, report_type, rig) is not None
+            print(f"Stored {stored} reports in {store.output_dir}")
+        else:
+            try:
+                print(json.dumps(store.read(args.report_type, args.rig, args.date), ensure_ascii=False, indent=2))
+            except FileNotFoundError:
+                print(f"No report for {args.rig} on {args.date}")
@@ -1,11 +1,8 @@
-import arabic_reshaper
-from bidi.algorithm import get_display
-import pdfplumber
-import pandas as pd
 import os
 import json
 from flatten import flatten_with_pikepdf
-from persian_text import correct_persian_text
+from report_engine import register_handler, register_template, extract_report
+from numeric_cells import clean_number, parse_int_cells
 #from utils.load_coordinates_points import load_coordinates_points
 import config
 
@@ -22,36 +19,53 @@ def load_coordinates_points(file_path):
         print("Unexpected error while loading coordinates points")  
     return []
 
+# ستون‌های تعداد وعده در جداول شیفت، employer و مجموع (از راست به چپ: ص، ن، ش، پ، خ)
+COUNT_COLUMNS = {"ص": 4, "ن": 3, "ش": 2, "پ": 1, "خ": 0}
+TOTAL_MEALS = ["صبحانه", "ناهار", "شام", "پس شام", "خدمات"]
+
 def convert_to_int(value):
     """
     تبدیل مقدار string به int
     اگر خالی است یا نمی‌تواند تبدیل شود، 0 برمی‌گرداند
-    اعداد منفی را هم درست پردازش می‌کند
+    اعداد منفی، ارقام فارسی/عربی و جداکننده هزارگان را هم درست پردازش می‌کند
     """
-    if not value or value == "":
+    if not value:
         return 0
-    try:
-        # حذف فاصله‌ها و تبدیل به int (اعداد منفی را حفظ می‌کند)
-        clean_val = str(value).strip().replace(" ", "").replace(",", "")
-        if clean_val:
-            return int(clean_val)
+    clean_val = clean_number(value)
+    if not clean_val:
         return 0
-    except:
+    try:
+        return int(clean_val)
+    except ValueError:
         return 0
-    
-def convert_header_to_key_value(df):
-    if df.empty:
+
+def parse_count_rows(rows):
+    """
+    تعداد وعده‌های چند ردیف (records) با یک بار parse ستونی: لیست dict های {ص، ن، ش، پ، خ}
+    سلول‌هایی که عدد نیستند 0 می‌شوند و گزارش می‌شوند
+    """
+    cells = [[row.get(col, "") for col in COUNT_COLUMNS.values()] for row in rows]
+    if not cells:
+        return []
+    counts, failed = parse_int_cells(cells)
+    if failed.any():
+        bad_cells = [cell for row, row_failed in zip(cells, failed.tolist()) for cell, cell_failed in zip(row, row_failed) if cell_failed]
+        print(f"Could not parse count cells: {', '.join(map(repr, bad_cells))}")
+    return [dict(zip(COUNT_COLUMNS, values)) for values in counts.tolist()]
+    
+def convert_header_to_key_value(table):
+    if table.empty:
         return {}
     
     # گرفتن اولین ردیف
-    first_row = df.iloc[0].tolist()
+    first_row = list(table.rows[0])
     
     result = {}
     
     # برای تاریخ: مستقیماً column های 0, 1, 2, 3 را merge کن
     date_parts = []
     for col_idx in [0, 1, 2, 3]:
-        if col_idx < len(first_row) and pd.notna(first_row[col_idx]):
+        if col_idx < len(first_row):
             part = str(first_row[col_idx]).strip()
             if part:
                 # حذف فاصله‌ها و "/" و ":" و ترکیب
@@ -67,8 +81,8 @@ def convert_header_to_key_value(df):
     # حالا پردازش بقیه سلول‌ها
     i = 0
     while i < len(first_row):
-        current = str(first_row[i]).strip() if pd.notna(first_row[i]) else ""
-        next_val = str(first_row[i + 1]).strip() if i + 1 < len(first_row) and pd.notna(first_row[i + 1]) else ""
+        current = str(first_row[i]).strip()
+        next_val = str(first_row[i + 1]).strip() if i + 1 < len(first_row) else ""
         
         # اگر سلول خالی است یا در column های 0-3 است (که برای تاریخ استفاده شده)، رد شو
         # یا اگر "تاریخ:" است (که قبلاً پردازش شده)، رد شو
@@ -108,19 +122,19 @@ def convert_header_to_key_value(df):
     
     return result
 
-def convert_shift_to_structured(df):
+def convert_shift_to_structured(table):
     """
     تبدیل داده‌های یک شیفت به ساختار جدید
-    df: DataFrame مربوط به یک شیفت
+    table: TableRows مربوط به یک شیفت
     """
-    if df.empty or len(df) < 3:
+    if table.empty or len(table) < 3:
         return {"persons": [], "TotalShift": {}}
     
     persons = []
     total_shift = {}
     
     # تبدیل به records برای پردازش راحت‌تر
-    records = df.to_dict('records')
+    records = table.records()
     
     # رد کردن دو ردیف اول (نام شیفت و هدر)
     data_rows = records[2:]
@@ -135,20 +149,14 @@ def convert_shift_to_structured(df):
             total_row_index = i
             break
     
-    # استخراج Total
+    # جدا کردن ردیف Total از لیست داده‌ها
+    total_rows = []
     if total_row_index >= 0:
-        total_row = data_rows[total_row_index]
-        total_shift = {
-            "ص": convert_to_int(total_row.get(4, "") if 4 in total_row else ""),
-            "ن": convert_to_int(total_row.get(3, "") if 3 in total_row else ""),
-            "ش": convert_to_int(total_row.get(2, "") if 2 in total_row else ""),
-            "پ": convert_to_int(total_row.get(1, "") if 1 in total_row else ""),
-            "خ": convert_to_int(total_row.get(0, "") if 0 in total_row else "")
-        }
-        # حذف ردیف Total از لیست داده‌ها
+        total_rows = [data_rows[total_row_index]]
         data_rows = data_rows[:total_row_index]
     
     # استخراج اطلاعات افراد
+    person_rows = []
     for row in data_rows:
         name = str(row.get(6, "")).strip() if 6 in row else ""
         position = str(row.get(5, "")).strip() if 5 in row else ""
@@ -157,32 +165,31 @@ def convert_shift_to_structured(df):
         if not name and not position:
             continue
         
-        person = {
-            "name": name,
-            "position": position,
-            "ص": convert_to_int(row.get(4, "") if 4 in row else ""),
-            "ن": convert_to_int(row.get(3, "") if 3 in row else ""),
-            "ش": convert_to_int(row.get(2, "") if 2 in row else ""),
-            "پ": convert_to_int(row.get(1, "") if 1 in row else ""),
-            "خ": convert_to_int(row.get(0, "") if 0 in row else "")
-        }
-        persons.append(person)
+        persons.append({"name": name, "position": position})
+        person_rows.append(row)
+    
+    # تعداد وعده‌های همه افراد و ردیف Total با یک بار parse
+    counts = parse_count_rows(person_rows + total_rows)
+    if total_rows:
+        total_shift = counts.pop()
+    for person, person_counts in zip(persons, counts):
+        person.update(person_counts)
     
     return {"persons": persons, "TotalShift": total_shift}
 
-def convert_employer_to_structured(df):
+def convert_employer_to_structured(table):
     """
     تبدیل داده‌های employer به ساختار جدید
-    df: DataFrame مربوط به employer
+    table: TableRows مربوط به employer
     ترتیب ستون‌ها: نام، سمت، شرکت، ص، ن، ش، پ، خ
     """
-    if df.empty or len(df) < 2:
+    if table.empty or len(table) < 2:
         return []
     
     persons = []
     
     # تبدیل به records برای پردازش راحت‌تر
-    records = df.to_dict('records')
+    records = table.records()
     
     # رد کردن ردیف اول (هدر)
     data_rows = records[1:]
@@ -190,6 +197,7 @@ def convert_employer_to_structured(df):
     # استخراج اطلاعات افراد
     # ترتیب ستون‌ها در employer (از راست به چپ): خ, پ, ش, ن, ص, company, position, name
     # یعنی: column 0=خ, 1=پ, 2=ش, 3=ن, 4=ص, 5=company, 6=position, 7=name
+    person_rows = []
     for row in data_rows:
         name = str(row.get(7, "")).strip() if 7 in row else ""
         position = str(row.get(6, "")).strip() if 6 in row else ""
@@ -199,27 +207,21 @@ def convert_employer_to_structured(df):
         if not name and not position:
             continue
         
-        person = {
-            "name": name,
-            "position": position,
-            "company": company,
-            "ص": convert_to_int(row.get(4, "") if 4 in row else ""),
-            "ن": convert_to_int(row.get(3, "") if 3 in row else ""),
-            "ش": convert_to_int(row.get(2, "") if 2 in row else ""),
-            "پ": convert_to_int(row.get(1, "") if 1 in row else ""),
-            "خ": convert_to_int(row.get(0, "") if 0 in row else "")
-        }
-        persons.append(person)
+        persons.append({"name": name, "position": position, "company": company})
+        person_rows.append(row)
+    
+    for person, person_counts in zip(persons, parse_count_rows(person_rows)):
+        person.update(person_counts)
     
     return persons
 
-def convert_foods_to_structured(df):
+def convert_foods_to_structured(table):
     """
     تبدیل داده‌های Foods به ساختار جدید
-    df: DataFrame مربوط به Foods
+    table: TableRows مربوط به Foods
     ساختار: صبحانه، ناهار، شام، پس شام (value در ستون کناری) و توضیحات (value در row پایینی)
     """
-    if df.empty:
+    if table.empty:
         return {
             "صبحانه": "",
             "ناهار": "",
@@ -237,7 +239,7 @@ def convert_foods_to_structured(df):
     }
     
     # تبدیل به records
-    records = df.to_dict('records')
+    records = table.records()
     
     # پیدا کردن صبحانه، ناهار، شام، پس شام (value در ستون قبلی)
     for row_idx, row in enumerate(records):
@@ -283,19 +285,19 @@ def convert_foods_to_structured(df):
     
     return foods_data
 
-def convert_total_to_structured(df):
+def convert_total_to_structured(table):
     """
     تبدیل داده‌های Total به ساختار جدید
-    df: DataFrame مربوط به Total
+    table: TableRows مربوط به Total
     ساختار: 7 key اصلی که هر کدام 5 value دارند (صبحانه، ناهار، شام، پس شام، خدمات)
     """
-    if df.empty:
+    if table.empty:
         return {}
     
     total_data = {}
     
     # تبدیل به records
-    records = df.to_dict('records')
+    records = table.records()
     
     if len(records) == 0:
         return {}
@@ -326,6 +328,8 @@ def convert_total_to_structured(df):
     start_idx = 1 if header_cols else 0
     
     # بررسی هر ردیف برای پیدا کردن کلیدهای اصلی (7 ردیف)
+    main_keys = []
+    cells = []
     for row_idx in range(start_idx, min(start_idx + 7, len(records))):
         row = records[row_idx]
         max_col = max(row.keys()) if row else 0
@@ -342,12 +346,12 @@ def convert_total_to_structured(df):
                 # بررسی کن که آیا این یک عدد نیست
                 is_number = False
                 try:
-                    # حذف فاصله و کاما و بررسی عدد
-                    clean_val = val.replace(",", "").replace(" ", "").replace("-", "").replace("+", "")
+                    # حذف فاصله، کاما و علامت و بررسی عدد (ارقام فارسی/عربی هم عدد هستند)
+                    clean_val = clean_number(val).replace("-", "").replace("+", "")
                     if clean_val:
                         float(clean_val)
                         is_number = True
-                except:
+                except ValueError:
                     pass
                 
                 # اگر عدد نیست و طول مناسبی دارد، احتمالاً کلید اصلی است
@@ -357,420 +361,186 @@ def convert_total_to_structured(df):
                     break
         
         if main_key:
-            # استخراج 5 value: صبحانه، ناهار، شام، پس شام، خدمات
-            values = {
-                "صبحانه": 0,
-                "ناهار": 0,
-                "شام": 0,
-                "پس شام": 0,
-                "خدمات": 0
-            }
-            
-            # اگر هدر پیدا کردیم، از mapping استفاده کن
+            # ستون 5 value: صبحانه، ناهار، شام، پس شام، خدمات
+            # اگر هدر پیدا کردیم، از mapping استفاده کن، وگرنه از ستون‌های بعد از key اصلی
             if header_cols:
-                for key_name, col_idx in header_cols.items():
-                    if col_idx in row:
-                        val = str(row.get(col_idx, "")).strip()
-                        values[key_name] = convert_to_int(val)
+                meal_cols = [header_cols.get(key_name) for key_name in TOTAL_MEALS]
             else:
-                # اگر هدر پیدا نکردیم، از ستون‌های بعد از key اصلی استفاده کن
-                for idx, key_name in enumerate(["صبحانه", "ناهار", "شام", "پس شام", "خدمات"]):
-                    col_idx = main_key_col + 1 + idx
-                    if col_idx in row:
-                        val = str(row.get(col_idx, "")).strip()
-                        values[key_name] = convert_to_int(val)
-            
-            total_data[main_key] = values
+                meal_cols = [main_key_col + 1 + idx for idx in range(len(TOTAL_MEALS))]
+            main_keys.append(main_key)
+            cells.append([row.get(col_idx, "") if col_idx is not None else "" for col_idx in meal_cols])
+    
+    # همه مقادیر ماتریس total با یک بار parse
+    if cells:
+        values, failed = parse_int_cells(cells)
+        if failed.any():
+            print(f"Could not parse {int(failed.sum())} total cells")
+        for main_key, row_values in zip(main_keys, values.tolist()):
+            total_data[main_key] = dict(zip(TOTAL_MEALS, row_values))
     
     return total_data
 
-def extract_tables_from_dcr(pdf_file, output_folder, tables_info):
-    if not os.path.exists(pdf_file):
-        return
-
-    if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
-    
-    # دیکشنری برای ذخیره همه جداول
-    all_tables_data = {}
-    # ایجاد ساختار Operation، Herasat، Ordogahi، employer، Drilling و Foods برای ذخیره داده‌ها
-    all_tables_data["Operation"] = {}
-    all_tables_data["Herasat"] = {}
-    all_tables_data["Ordogahi"] = {}
-    all_tables_data["employer"] = {}
-    all_tables_data["Drilling"] = {}
-    all_tables_data["Foods"] = {}
-    all_tables_data["total"] = {}
-        
-    with pdfplumber.open(pdf_file) as pdf:
-        for table_meta in tables_info:
-            page_num = table_meta["page_number"]
-            sheet_name = table_meta["sheet_name"]
-            coords = table_meta["coordinates"]
-            
-            if page_num > len(pdf.pages):
-                print(f"Not found page in PDF: {page_num}")
-                continue
-            
-            bbox = (coords[1], coords[0], coords[3], coords[2])
-            
-            page = pdf.pages[page_num - 1]
-            cropped_page = page.crop(bbox)
-            
-            df = None
-            
-            my_table_settings = {
-                "vertical_strategy": "lines", 
-                "horizontal_strategy": "lines",
-                "snap_tolerance": 4,
-                "join_tolerance": 4,
-                "intersection_tolerance": 5,
-            }
-            
-            table_data = cropped_page.extract_table(table_settings=my_table_settings)
-            
-            if table_data:
-                # 1. ساخت دیتافریم با کل داده‌ها (بدون جدا کردن هدر)
-                df = pd.DataFrame(table_data)
-                
-                # 2. نام‌گذاری ستون‌ها به صورت پیش‌فرض (Column 1, Column 2, ...)
-                # اگر می‌خواهید فارسی باشد، داخل پرانتز f"ستون {i+1}" بنویسید
-                #df.columns = [f"Column {i+1}" for i in range(df.shape[1])]
-
-            if df is not None:
-                df.dropna(axis=0, how='all', inplace=True)
-                df.dropna(axis=1, how='all', inplace=True)
-                df.fillna('', inplace=True)
-
-                try:
-                    df = df.applymap(lambda x: correct_persian_text(x) if isinstance(x, str) else x)
-                except Exception as e:
-                    print("Unexpected error while correcting Persian text")
-                # تبدیل DataFrame به ساختار مناسب
-                try:
-                    # اگر Header است، به key-value تبدیل کن
-                    if sheet_name == "Header":
-                        key_value_dict = convert_header_to_key_value(df)
-                        all_tables_data[sheet_name] = key_value_dict
-                    # اگر مربوط به Operation است (شیفت‌ها)
-                    elif sheet_name in ["ShiftAPage1", "ShiftBPage1", "ShiftCPage1", "ShiftDPage1"]:
-                        shift_data = convert_shift_to_structured(df)
-                        # تبدیل نام sheet به نام شیفت (مثلاً ShiftAPage1 -> ShiftA)
-                        shift_name = sheet_name.replace("Page1", "")
-                        # ایجاد لیست اشخاص
-                        shift_list = shift_data["persons"].copy() if shift_data["persons"] else []
-                        # اضافه کردن TotalShift در انتها
-                        if shift_data["TotalShift"]:
-                            total_key = f"Total{shift_name}"
-                            shift_list.append({total_key: shift_data["TotalShift"]})
-                        all_tables_data["Operation"][shift_name] = shift_list
-                    # اگر ShiftTotalPage1 است
-                    elif sheet_name == "ShiftTotalPage1":
-                        records = df.to_dict('records')
-                        total_row = None
-                        # بررسی ردیف‌ها برای پیدا کردن Total
-                        if len(records) >= 3:
-                            # ردیف سوم شامل Total است
-                            total_row = records[2]
-                        elif len(records) >= 2:
-                            # اگر فقط 2 ردیف داریم، ردیف دوم را بررسی کن
-                            total_row = records[1]
-                        elif len(records) >= 1:
-                            # اگر فقط 1 ردیف داریم، همان را بررسی کن
-                            total_row = records[0]
-                        
-                        if total_row:
-                            all_tables_data["Operation"]["ShiftTotalPage1"] = {
-                                "ص": convert_to_int(total_row.get(4, "") if 4 in total_row else ""),
-                                "ن": convert_to_int(total_row.get(3, "") if 3 in total_row else ""),
-                                "ش": convert_to_int(total_row.get(2, "") if 2 in total_row else ""),
-                                "پ": convert_to_int(total_row.get(1, "") if 1 in total_row else ""),
-                                "خ": convert_to_int(total_row.get(0, "") if 0 in total_row else "")
-                            }
-                        else:
-                            all_tables_data["Operation"]["ShiftTotalPage1"] = {}
-                    # اگر مربوط به Herasat است (شیفت‌ها)
-                    elif sheet_name in ["HerasatShiftA", "HerasatShiftB", "HerasatShiftC", "HerasatShiftD"]:
-                        shift_data = convert_shift_to_structured(df)
-                        # تبدیل نام sheet به نام شیفت (مثلاً HerasatShiftA -> ShiftA)
-                        shift_name = sheet_name.replace("Herasat", "")
-                        # ایجاد لیست اشخاص
-                        shift_list = shift_data["persons"].copy() if shift_data["persons"] else []
-                        # اضافه کردن TotalShift در انتها
-                        if shift_data["TotalShift"]:
-                            total_key = f"Total{shift_name}"
-                            shift_list.append({total_key: shift_data["TotalShift"]})
-                        all_tables_data["Herasat"][shift_name] = shift_list
-                    # اگر ShiftTotalHerasat است
-                    elif sheet_name == "ShiftTotalHerasat":
-                        records = df.to_dict('records')
-                        total_row = None
-                        # بررسی ردیف‌ها برای پیدا کردن Total
-                        if len(records) >= 3:
-                            # ردیف سوم شامل Total است
-                            total_row = records[2]
-                        elif len(records) >= 2:
-                            # اگر فقط 2 ردیف داریم، ردیف دوم را بررسی کن
-                            total_row = records[1]
-                        elif len(records) >= 1:
-                            # اگر فقط 1 ردیف داریم، همان را بررسی کن
-                            total_row = records[0]
-                        
-                        if total_row:
-                            all_tables_data["Herasat"]["ShiftTotalHerasat"] = {
-                                "ص": convert_to_int(total_row.get(4, "") if 4 in total_row else ""),
-                                "ن": convert_to_int(total_row.get(3, "") if 3 in total_row else ""),
-                                "ش": convert_to_int(total_row.get(2, "") if 2 in total_row else ""),
-                                "پ": convert_to_int(total_row.get(1, "") if 1 in total_row else ""),
-                                "خ": convert_to_int(total_row.get(0, "") if 0 in total_row else "")
-                            }
-                        else:
-                            all_tables_data["Herasat"]["ShiftTotalHerasat"] = {}
-                    # اگر مربوط به Ordogahi است (شیفت‌ها)
-                    elif sheet_name in ["OrdogahiShiftA", "OrdogahiShiftB", "OrdogahiShiftC", "OrdogahiShiftD"]:
-                        shift_data = convert_shift_to_structured(df)
-                        # تبدیل نام sheet به نام شیفت (مثلاً OrdogahiShiftA -> ShiftA)
-                        shift_name = sheet_name.replace("Ordogahi", "")
-                        # ایجاد لیست اشخاص
-                        shift_list = shift_data["persons"].copy() if shift_data["persons"] else []
-                        # اضافه کردن TotalShift در انتها
-                        if shift_data["TotalShift"]:
-                            total_key = f"Total{shift_name}"
-                            shift_list.append({total_key: shift_data["TotalShift"]})
-                        all_tables_data["Ordogahi"][shift_name] = shift_list
-                    # اگر ShiftTotalOrdogahi است
-                    elif sheet_name == "ShiftTotalOrdogahi":
-                        records = df.to_dict('records')
-                        total_row = None
-                        # بررسی ردیف‌ها برای پیدا کردن Total
-                        if len(records) >= 3:
-                            # ردیف سوم شامل Total است
-                            total_row = records[2]
-                        elif len(records) >= 2:
-                            # اگر فقط 2 ردیف داریم، ردیف دوم را بررسی کن
-                            total_row = records[1]
-                        elif len(records) >= 1:
-                            # اگر فقط 1 ردیف داریم، همان را بررسی کن
-                            total_row = records[0]
-                        
-                        if total_row:
-                            all_tables_data["Ordogahi"]["ShiftTotalOrdogahi"] = {
-                                "ص": convert_to_int(total_row.get(4, "") if 4 in total_row else ""),
-                                "ن": convert_to_int(total_row.get(3, "") if 3 in total_row else ""),
-                                "ش": convert_to_int(total_row.get(2, "") if 2 in total_row else ""),
-                                "پ": convert_to_int(total_row.get(1, "") if 1 in total_row else ""),
-                                "خ": convert_to_int(total_row.get(0, "") if 0 in total_row else "")
-                            }
-                        else:
-                            all_tables_data["Ordogahi"]["ShiftTotalOrdogahi"] = {}
-                    # اگر مربوط به employer است
-                    elif sheet_name == "EmployerPage3":
-                        persons_list = convert_employer_to_structured(df)
-                        all_tables_data["employer"]["EmployerPage3"] = persons_list
-                    # اگر EmployerTotal است
-                    elif sheet_name == "EmployerTotal":
-                        records = df.to_dict('records')
-                        total_row = None
-                        # بررسی ردیف‌ها برای پیدا کردن Total
-                        if len(records) >= 3:
-                            total_row = records[2]
-                        elif len(records) >= 2:
-                            total_row = records[1]
-                        elif len(records) >= 1:
-                            total_row = records[0]
-                        
-                        if total_row:
-                            all_tables_data["employer"]["EmployerTotal"] = {
-                                "ص": convert_to_int(total_row.get(4, "") if 4 in total_row else ""),
-                                "ن": convert_to_int(total_row.get(3, "") if 3 in total_row else ""),
-                                "ش": convert_to_int(total_row.get(2, "") if 2 in total_row else ""),
-                                "پ": convert_to_int(total_row.get(1, "") if 1 in total_row else ""),
-                                "خ": convert_to_int(total_row.get(0, "") if 0 in total_row else "")
-                            }
-                        else:
-                            all_tables_data["employer"]["EmployerTotal"] = {}
-                    # اگر EmployerSupervisor است
-                    elif sheet_name == "EmployerSupervisor":
-                        # EmployerSupervisor: ردیف دوم را می‌گیریم
-                        records = df.to_dict('records')
-                        supervisor_data = {}
-                        # بررسی وجود ردیف دوم
-                        if len(records) >= 2:
-                            # ردیف دوم را بگیر
-                            second_row = records[1]
-                            # تبدیل به دیکشنری ساده
-                            for key, value in second_row.items():
-                                if value and str(value).strip():
-                                    supervisor_data[str(key)] = str(value).strip()
-                        elif len(records) >= 1:
-                            # اگر فقط یک ردیف داریم، همان را بگیر
-                            first_row = records[0]
-                            for key, value in first_row.items():
-                                if value and str(value).strip():
-                                    supervisor_data[str(key)] = str(value).strip()
-                        all_tables_data["employer"]["EmployerSupervisor"] = supervisor_data
-                    # اگر مربوط به Drilling است
-                    elif sheet_name == "DrillingPage4":
-                        persons_list = convert_employer_to_structured(df)
-                        all_tables_data["Drilling"]["DrillingPage4"] = persons_list
-                    # اگر DrillingTotal است
-                    elif sheet_name == "DrillingTotal":
-                        records = df.to_dict('records')
-                        total_row = None
-                        # بررسی ردیف‌ها برای پیدا کردن Total
-                        if len(records) >= 3:
-                            total_row = records[2]
-                        elif len(records) >= 2:
-                            total_row = records[1]
-                        elif len(records) >= 1:
-                            total_row = records[0]
-                        
-                        if total_row:
-                            all_tables_data["Drilling"]["DrillingTotal"] = {
-                                "ص": convert_to_int(total_row.get(4, "") if 4 in total_row else ""),
-                                "ن": convert_to_int(total_row.get(3, "") if 3 in total_row else ""),
-                                "ش": convert_to_int(total_row.get(2, "") if 2 in total_row else ""),
-                                "پ": convert_to_int(total_row.get(1, "") if 1 in total_row else ""),
-                                "خ": convert_to_int(total_row.get(0, "") if 0 in total_row else "")
-                            }
-                        else:
-                            all_tables_data["Drilling"]["DrillingTotal"] = {}
-                    # اگر مربوط به Foods است
-                    elif sheet_name == "Foods":
-                        foods_data = convert_foods_to_structured(df)
-                        all_tables_data["Foods"] = foods_data
-                    # اگر مربوط به Total است
-                    elif sheet_name == "Total":
-                        total_data = convert_total_to_structured(df)
-                        all_tables_data["total"] = total_data
-                    else:
-                        # برای جداول دیگر، به records تبدیل کن
-                        table_records = df.to_dict('records')
-                        all_tables_data[sheet_name] = table_records
-                except Exception as inner_e:
-                    print("Unexpected error while extracting tables")
-    
-    # اطمینان از وجود بخش‌های خالی برای ساختار نهایی
-    if "Operation" not in all_tables_data:
-        all_tables_data["Operation"] = {}
-    
-    # اطمینان از وجود شیفت‌ها به صورت لیست خالی اگر وجود نداشتند
-    if "ShiftA" not in all_tables_data["Operation"]:
-        all_tables_data["Operation"]["ShiftA"] = []
-    if "ShiftB" not in all_tables_data["Operation"]:
-        all_tables_data["Operation"]["ShiftB"] = []
-    if "ShiftC" not in all_tables_data["Operation"]:
-        all_tables_data["Operation"]["ShiftC"] = []
-    if "ShiftD" not in all_tables_data["Operation"]:
-        all_tables_data["Operation"]["ShiftD"] = []
-    if "ShiftTotalPage1" not in all_tables_data["Operation"]:
-        all_tables_data["Operation"]["ShiftTotalPage1"] = {}
-    
-    # اطمینان از وجود Herasat
-    if "Herasat" not in all_tables_data:
-        all_tables_data["Herasat"] = {}
-    
-    # اطمینان از وجود شیفت‌های Herasat به صورت لیست خالی اگر وجود نداشتند
-    if "ShiftA" not in all_tables_data["Herasat"]:
-        all_tables_data["Herasat"]["ShiftA"] = []
-    if "ShiftB" not in all_tables_data["Herasat"]:
-        all_tables_data["Herasat"]["ShiftB"] = []
-    if "ShiftC" not in all_tables_data["Herasat"]:
-        all_tables_data["Herasat"]["ShiftC"] = []
-    if "ShiftD" not in all_tables_data["Herasat"]:
-        all_tables_data["Herasat"]["ShiftD"] = []
-    if "ShiftTotalHerasat" not in all_tables_data["Herasat"]:
-        all_tables_data["Herasat"]["ShiftTotalHerasat"] = {}
-    
-    # اطمینان از وجود Ordogahi
-    if "Ordogahi" not in all_tables_data:
-        all_tables_data["Ordogahi"] = {}
-    
-    # اطمینان از وجود شیفت‌های Ordogahi به صورت لیست خالی اگر وجود نداشتند
-    if "ShiftA" not in all_tables_data["Ordogahi"]:
-        all_tables_data["Ordogahi"]["ShiftA"] = []
-    if "ShiftB" not in all_tables_data["Ordogahi"]:
-        all_tables_data["Ordogahi"]["ShiftB"] = []
-    if "ShiftC" not in all_tables_data["Ordogahi"]:
-        all_tables_data["Ordogahi"]["ShiftC"] = []
-    if "ShiftD" not in all_tables_data["Ordogahi"]:
-        all_tables_data["Ordogahi"]["ShiftD"] = []
-    if "ShiftTotalOrdogahi" not in all_tables_data["Ordogahi"]:
-        all_tables_data["Ordogahi"]["ShiftTotalOrdogahi"] = {}
-    
-    # اطمینان از وجود employer
-    if "employer" not in all_tables_data:
-        all_tables_data["employer"] = {}
-    
-    # اطمینان از وجود بخش‌های employer به صورت خالی اگر وجود نداشتند
-    if "EmployerPage3" not in all_tables_data["employer"]:
-        all_tables_data["employer"]["EmployerPage3"] = []
-    if "EmployerTotal" not in all_tables_data["employer"]:
-        all_tables_data["employer"]["EmployerTotal"] = {}
-    if "EmployerSupervisor" not in all_tables_data["employer"]:
-        all_tables_data["employer"]["EmployerSupervisor"] = {}
-    
-    # اطمینان از وجود Drilling
-    if "Drilling" not in all_tables_data:
-        all_tables_data["Drilling"] = {}
-    
-    # اطمینان از وجود بخش‌های Drilling به صورت خالی اگر وجود نداشتند
-    if "DrillingPage4" not in all_tables_data["Drilling"]:
-        all_tables_data["Drilling"]["DrillingPage4"] = []
-    if "DrillingTotal" not in all_tables_data["Drilling"]:
-        all_tables_data["Drilling"]["DrillingTotal"] = {}
-    
-    # اطمینان از وجود Foods
-    if "Foods" not in all_tables_data:
-        all_tables_data["Foods"] = {
-            "صبحانه": "",
-            "ناهار": "",
-            "شام": "",
-            "پس شام": "",
-            "توضیحات": ""
-        }
-    
-    # ساخت ساختار نهایی JSON با ترتیب صحیح
-    final_structure = {}
+def convert_totals_row_to_structured(table):
+    """
+    تبدیل جدول مجموع (ShiftTotal*, EmployerTotal, DrillingTotal) به ساختار جدید
+    ردیف سوم شامل Total است؛ اگر ردیف کمتری داریم، آخرین ردیف موجود بررسی می‌شود
+    """
+    records = table.records()
+    total_row = None
+    # بررسی ردیف‌ها برای پیدا کردن Total
+    if len(records) >= 3:
+        # ردیف سوم شامل Total است
+        total_row = records[2]
+    elif len(records) >= 2:
+        # اگر فقط 2 ردیف داریم، ردیف دوم را بررسی کن
+        total_row = records[1]
+    elif len(records) >= 1:
+        # اگر فقط 1 ردیف داریم، همان را بررسی کن
+        total_row = records[0]
+    
+    if not total_row:
+        return {}
     
-    # Header
-    if "Header" in all_tables_data:
-        final_structure["Header"] = all_tables_data["Header"]
+    return parse_count_rows([total_row])[0]
+
+def convert_supervisor_to_structured(table):
+    """
+    تبدیل EmployerSupervisor: ردیف دوم (یا اگر فقط یک ردیف داریم، همان) به دیکشنری ساده
+    """
+    records = table.records()
+    supervisor_data = {}
+    if len(records) >= 2:
+        row = records[1]
+    elif len(records) >= 1:
+        row = records[0]
     else:
-        final_structure["Header"] = {
-            "تاریخ": "",
-            "روز هفته": "",
-            "مسوول اردوگاه": "",
-            "رییس دستگاه": "",
-            "دستگاه حفاری": ""
-        }
+        return supervisor_data
     
-    # Operation
-    final_structure["Operation"] = all_tables_data.get("Operation", {})
-    
-    # بقیه بخش‌ها
-    final_structure["Herasat"] = all_tables_data.get("Herasat", {})
-    final_structure["Ordogahi"] = all_tables_data.get("Ordogahi", {})
-    final_structure["employer"] = all_tables_data.get("employer", {})
-    final_structure["Drilling"] = all_tables_data.get("Drilling", {})
-    final_structure["Foods"] = all_tables_data.get("Foods", {})
-    final_structure["total"] = all_tables_data.get("total", {})
-    
-    # ذخیره همه جداول در یک فایل JSON
-    if final_structure:
-        pdf_basename = os.path.splitext(os.path.basename(pdf_file))[0]
-        json_filename = f"{pdf_basename}_tables.json"
-        json_path = os.path.join(output_folder, json_filename)
-        
-        try:
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(final_structure, f, ensure_ascii=False, indent=2)
-            print(f"Complete Process for {os.path.basename(pdf_file)} - Saved to {json_filename}")
-        except Exception as e:
-            print("Unexpected error while saving JSON file")
+    for key, value in row.items():
+        if value and str(value).strip():
+            supervisor_data[str(key)] = str(value).strip()
+    return supervisor_data
+
+# --- handler های DCR برای report_engine ---
+
+@register_handler("key_value_header")
+def header_handler(table, key):
+    return convert_header_to_key_value(table)
+
+@register_handler("shift_table")
+def shift_table_handler(table, key):
+    """
+    key: نام شیفت (مثلاً ShiftA)؛ TotalShift با کلید Total<نام شیفت> در انتهای لیست اضافه می‌شود
+    """
+    shift_data = convert_shift_to_structured(table)
+    # ایجاد لیست اشخاص
+    shift_list = shift_data["persons"].copy() if shift_data["persons"] else []
+    # اضافه کردن TotalShift در انتها
+    if shift_data["TotalShift"]:
+        shift_list.append({f"Total{key}": shift_data["TotalShift"]})
+    return shift_list
+
+@register_handler("totals_row")
+def totals_row_handler(table, key):
+    return convert_totals_row_to_structured(table)
+
+@register_handler("employer_records")
+def employer_records_handler(table, key):
+    return convert_employer_to_structured(table)
+
+@register_handler("supervisor_row")
+def supervisor_row_handler(table, key):
+    return convert_supervisor_to_structured(table)
+
+@register_handler("foods")
+def foods_handler(table, key):
+    return convert_foods_to_structured(table)
+
+@register_handler("meal_totals")
+def meal_totals_handler(table, key):
+    return convert_total_to_structured(table)
+
+# نگاشت sheet های DCR به handler و محل آنها در خروجی: (handler، بخش، کلید)
+DCR_SHEETS = {
+    "Header": ("key_value_header", None, "Header"),
+    "ShiftAPage1": ("shift_table", "Operation", "ShiftA"),
+    "ShiftBPage1": ("shift_table", "Operation", "ShiftB"),
+    "ShiftCPage1": ("shift_table", "Operation", "ShiftC"),
+    "ShiftDPage1": ("shift_table", "Operation", "ShiftD"),
+    "ShiftTotalPage1": ("totals_row", "Operation", "ShiftTotalPage1"),
+    "HerasatShiftA": ("shift_table", "Herasat", "ShiftA"),
+    "HerasatShiftB": ("shift_table", "Herasat", "ShiftB"),
+    "HerasatShiftC": ("shift_table", "Herasat", "ShiftC"),
+    "HerasatShiftD": ("shift_table", "Herasat", "ShiftD"),
+    "ShiftTotalHerasat": ("totals_row", "Herasat", "ShiftTotalHerasat"),
+    "OrdogahiShiftA": ("shift_table", "Ordogahi", "ShiftA"),
+    "OrdogahiShiftB": ("shift_table", "Ordogahi", "ShiftB"),
+    "OrdogahiShiftC": ("shift_table", "Ordogahi", "ShiftC"),
+    "OrdogahiShiftD": ("shift_table", "Ordogahi", "ShiftD"),
+    "ShiftTotalOrdogahi": ("totals_row", "Ordogahi", "ShiftTotalOrdogahi"),
+    "EmployerPage3": ("employer_records", "employer", "EmployerPage3"),
+    "EmployerTotal": ("totals_row", "employer", "EmployerTotal"),
+    "EmployerSupervisor": ("supervisor_row", "employer", "EmployerSupervisor"),
+    "DrillingPage4": ("employer_records", "Drilling", "DrillingPage4"),
+    "DrillingTotal": ("totals_row", "Drilling", "DrillingTotal"),
+    "Foods": ("foods", None, "Foods"),
+    "Total": ("meal_totals", None, "total"),
+}
+
+# مقادیر پیش‌فرض برای بخش‌هایی که استخراج نشده‌اند (به همین ترتیب اضافه می‌شوند)
+DCR_DEFAULTS = [
+    (None, "Header", {
+        "تاریخ": "",
+        "روز هفته": "",
+        "مسوول اردوگاه": "",
+        "رییس دستگاه": "",
+        "دستگاه حفاری": ""
+    }),
+    ("Operation", "ShiftA", []),
+    ("Operation", "ShiftB", []),
+    ("Operation", "ShiftC", []),
+    ("Operation", "ShiftD", []),
+    ("Operation", "ShiftTotalPage1", {}),
+    ("Herasat", "ShiftA", []),
+    ("Herasat", "ShiftB", []),
+    ("Herasat", "ShiftC", []),
+    ("Herasat", "ShiftD", []),
+    ("Herasat", "ShiftTotalHerasat", {}),
+    ("Ordogahi", "ShiftA", []),
+    ("Ordogahi", "ShiftB", []),
+    ("Ordogahi", "ShiftC", []),
+    ("Ordogahi", "ShiftD", []),
+    ("Ordogahi", "ShiftTotalOrdogahi", {}),
+    ("employer", "EmployerPage3", []),
+    ("employer", "EmployerTotal", {}),
+    ("employer", "EmployerSupervisor", {}),
+    ("Drilling", "DrillingPage4", []),
+    ("Drilling", "DrillingTotal", {}),
+]
+
+# ترتیب بخش‌ها در JSON نهایی
+DCR_LAYOUT = ["Header", "Operation", "Herasat", "Ordogahi", "employer", "Drilling", "Foods", "total"]
+
+register_template(
+    "DCR",
+    "tables_metadataـDCR",
+    sheets=DCR_SHEETS,
+    sections=["Operation", "Herasat", "Ordogahi", "employer", "Drilling", "Foods", "total"],
+    defaults=DCR_DEFAULTS,
+    layout=DCR_LAYOUT,
+    # متن‌های ثابت Header صفحه 1 برای تشخیص layout گزارش DCR
+    anchors=[("Header", ["دستگاه حفاری", "رییس دستگاه"])],
+    version="1",
+)
+
+def extract_tables_from_dcr(pdf_file, output_folder, tables_info, output_name=None, page_executor=None):
+    """
+    pdf_file: مسیر فایل PDF یا یک stream (مثلاً BytesIO خروجی flatten_in_memory)
+    output_name: نام پایه فایل JSON؛ برای stream ها الزامی است
+    page_executor: thread یا process pool اختیاری برای خواندن موازی صفحه‌ها
+    """
+    return extract_report(pdf_file, output_folder, "DCR", tables_info, output_name, page_executor=page_executor)
 
-    else:
-        print("No tables extracted from PDF")
 if __name__ == "__main__":
     output_folder = "./extract_tables_dcr"
     pdf_file = "DCR O3 1404 1007.pdf"
@@ -0,0 +1,39 @@
+import argparse
+# import ماژول DCR template گزارش DCR را در report_engine ثبت می‌کند
+from extract_tables_dcr import load_coordinates_points
+from report_engine import REPORT_TEMPLATES, matching_templates
+from lazy_import import lazy_import
+import config
+
+pdfplumber = lazy_import("pdfplumber")
+
+
+def classify_pdf(pdf_file, coordinates_points):
+    """
+    پیدا کردن template هایی که متن‌های ثابت (anchors) آنها در PDF وجود دارد
+    فقط ناحیه‌های anchor خوانده می‌شوند (بدون استخراج جداول)
+    خروجی: لیست (نوع گزارش، نسخه template، کلید coordinates_points.json)
+    template هایی که anchor ندارند (DDR، DMR، POB) هرگز تشخیص داده نمی‌شوند؛ نوع آنها فقط از پوشه ورودی مشخص می‌شود
+    """
+    with pdfplumber.open(pdf_file) as pdf:
+        report_types = matching_templates(pdf, coordinates_points)
+    return [(report_type, REPORT_TEMPLATES[report_type]["version"], REPORT_TEMPLATES[report_type]["metadata_key"])
+            for report_type in report_types]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect the report type and template version of PDF files from their anchor texts")
+    parser.add_argument("pdf_files", nargs="+")
+    args = parser.parse_args()
+
+    coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+    for pdf_file in args.pdf_files:
+        try:
+            matches = classify_pdf(pdf_file, coordinates_points)
+        except Exception:
+            print(f"{pdf_file}: unreadable PDF")
+            continue
+        if matches:
+            print(f"{pdf_file}: " + ", ".join(f"{report_type} v{version}" for report_type, version, _ in matches))
+        else:
+            print(f"{pdf_file}: unknown layout")
@@ -1,5 +1,32 @@
+import io
 import os
-import pikepdf
+from lazy_import import lazy_import
+
+pikepdf = lazy_import("pikepdf")
+
+
+def needs_flattening(pdf):
+    """
+    بررسی اینکه آیا PDF فرم (AcroForm) یا annotation دارد
+    اگر هیچکدام نباشد، flatten کردن تغییری در محتوا ایجاد نمی‌کند
+    """
+    if '/AcroForm' in pdf.Root:
+        return True
+    for page in pdf.pages:
+        annots = page.obj.get('/Annots')
+        if annots is not None and len(annots) > 0:
+            return True
+    return False
+
+
+def pdf_stream(source):
+    """
+    PDF خوانده شده در حافظه (bytes) برای هر بار باز شدن یک BytesIO جدا می‌گیرد
+    مسیر فایل و stream بدون تغییر برگردانده می‌شوند
+    """
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    return source
 
 
 def flatten_with_pikepdf(input_path, output_path):
@@ -15,5 +42,44 @@ def flatten_with_pikepdf(input_path, output_path):
             pdf.save(output_path)
     except Exception as e:
         print("Unexpected error while flattening PDF")
+
+
+def flatten_document(pdf, input_path):
+    """
+    flatten کردن PDF باز شده با pikepdf (pdf) در حافظه
+    - اگر PDF نیازی به flatten ندارد، همان input_path برگردانده می‌شود
+    - در غیر این صورت یک BytesIO شامل PDF flatten شده
+    """
+    if not needs_flattening(pdf):
+        return input_path
+    pdf.flatten_annotations(mode='all')
+    if '/AcroForm' in pdf.Root:
+        del pdf.Root['/AcroForm']
+    buffer = io.BytesIO()
+    pdf.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def flatten_in_memory(input_path):
+    """
+    flatten کردن PDF در حافظه به جای نوشتن فایل _flatten.pdf روی دیسک
+    خروجی مستقیماً به pdfplumber.open داده می‌شود:
+    input_path: مسیر فایل یا محتوای PDF (bytes)
+    - اگر PDF نیازی به flatten ندارد، همان ورودی برگردانده می‌شود
+    - در غیر این صورت یک BytesIO شامل PDF flatten شده
+    - در صورت خطا None
+    """
+    if isinstance(input_path, str) and not os.path.exists(input_path):
+        return None
+
+    try:
+        with pikepdf.Pdf.open(pdf_stream(input_path)) as pdf:
+            return flatten_document(pdf, input_path)
+    except Exception:
+        print("Unexpected error while flattening PDF")
+        return None
+
+
 if __name__ == "__main__":
-    flatten_with_pikepdf(input_file, output_file)
\ No newline at end of file
+    flatten_with_pikepdf(input_file, output_file)
@@ -0,0 +1,215 @@
+import os
+import time
+import unicodedata
+from lazy_import import lazy_import
+from flatten import flatten_document, flatten_in_memory, pdf_stream
+from page_regions import TABLE_SETTINGS, region_bbox, select_page_regions, analyze_page, map_pages, read_region_tables
+from persian_text import correct_persian_table
+from metrics import timed
+
+pikepdf = lazy_import("pikepdf")
+pdfplumber = lazy_import("pdfplumber")
+
+# پرچم‌های Hidden و NoView؛ این widget ها در flatten رسم نمی‌شوند
+HIDDEN_FLAGS = 2 | 32
+
+
+def inherited(node, key):
+    """
+    مقدار کلید با در نظر گرفتن ارث‌بری از /Parent (برای فیلدهای فرم و صفحات)
+    """
+    while node is not None:
+        if key in node:
+            return node[key]
+        node = node.get('/Parent')
+    return None
+
+
+def document_form_fields(pdf):
+    """
+    خواندن مقدار و مکان فیلدهای متنی فرم از PDF باز شده با pikepdf (بدون flatten)
+    خروجی: dict از شماره صفحه به لیست (x0, top, x1, bottom, مقدار) در مختصات pdfplumber
+    اگر PDF فرم ندارد یا فرم مستقیماً قابل خواندن نیست None برمی‌گرداند:
+    annotation غیر از widget، فیلد غیر متنی (مثل checkbox)، صفحه چرخیده یا mediabox با مبدأ غیر صفر
+    """
+    if '/AcroForm' not in pdf.Root:
+        return None
+
+    try:
+        fields = {}
+        for page_number, page in enumerate(pdf.pages, start=1):
+            annots = page.obj.get('/Annots')
+            if not annots:
+                continue
+            if int(inherited(page.obj, '/Rotate') or 0) % 360 != 0:
+                return None
+            mediabox = [float(value) for value in page.mediabox]
+            if mediabox[0] != 0 or mediabox[1] != 0:
+                return None
+            height = mediabox[3]
+
+            page_fields = []
+            for annot in annots:
+                if annot.get('/Subtype') != pikepdf.Name.Widget:
+                    return None
+                if int(annot.get('/F', 0)) & HIDDEN_FLAGS:
+                    continue
+                if inherited(annot, '/FT') != pikepdf.Name.Tx:
+                    return None
+                value = inherited(annot, '/V')
+                x0, y0, x1, y1 = (float(v) for v in annot.Rect)
+                page_fields.append((
+                    min(x0, x1), height - max(y0, y1), max(x0, x1), height - min(y0, y1),
+                    str(value) if value is not None else "",
+                ))
+            fields[page_number] = page_fields
+        return fields
+    except Exception:
+        print("Unexpected error while reading form fields")
+    return None
+
+
+def read_form_fields(pdf_file):
+    """
+    document_form_fields برای مسیر فایل یا محتوای PDF (bytes)
+    """
+    try:
+        with pikepdf.Pdf.open(pdf_stream(pdf_file)) as pdf:
+            return document_form_fields(pdf)
+    except Exception:
+        print("Unexpected error while reading form fields")
+    return None
+
+
+def read_form_or_flatten(pdf_file, metrics=None):
+    """
+    PDF فقط یک بار با pikepdf باز می‌شود: اول فیلدهای فرم خوانده می‌شوند و اگر فرم مستقیماً قابل خواندن نباشد
+    همان سند باز شده flatten می‌شود (PDF بدون فرم و annotation بدون تغییر برگردانده می‌شود)
+    pdf_file: مسیر فایل یا محتوای PDF (bytes)
+    خروجی: (فیلدهای فرم یا None، ورودی pdfplumber: pdf_file یا BytesIO flatten شده؛ None در صورت خطا)
+    """
+    if isinstance(pdf_file, str) and not os.path.exists(pdf_file):
+        return None, None
+
+    try:
+        with pikepdf.Pdf.open(pdf_stream(pdf_file)) as pdf:
+            with timed(metrics, "form_fields"):
+                form_fields = document_form_fields(pdf)
+            if form_fields is not None:
+                return form_fields, pdf_file
+            with timed(metrics, "flatten"):
+                return None, flatten_document(pdf, pdf_file)
+    except Exception:
+        print("Unexpected error while flattening PDF")
+    return None, None
+
+
+def normalize_field_value(value):
+    """
+    مقدار فیلد به ترتیب منطقی ذخیره شده است، پس فقط NFKC لازم است (مثل خروجی correct_persian_text)
+    """
+    value = value.replace("\r\n", "\n").replace("\r", "\n")
+    return unicodedata.normalize("NFKC", value).strip()
+
+
+def center_in(field, bbox):
+    x = (field[0] + field[2]) / 2
+    y = (field[1] + field[3]) / 2
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+
+def fill_table(table, fields, text_settings):
+    """
+    متن جدول (اصلاح شده) به همراه مقدار فیلدهای داخل هر خانه
+    اگر جایگذاری مطمئن نباشد None برمی‌گرداند تا ناحیه از PDF flatten شده خوانده شود:
+    جدولی پیدا نشود، فیلدی در هیچ خانه‌ای نیفتد، یا خانه‌ای هم متن ثابت و هم فیلد (یا چند فیلد) داشته باشد
+    """
+    if table is None:
+        return None
+
+    table_data = correct_persian_table(table.extract(**text_settings))
+    placed = 0
+    for row_index, row in enumerate(table.rows):
+        for col_index, cell in enumerate(row.cells):
+            if cell is None:
+                continue
+            cell_fields = [field for field in fields if center_in(field, cell)]
+            if not cell_fields:
+                continue
+            if len(cell_fields) > 1 or table_data[row_index][col_index]:
+                return None
+            table_data[row_index][col_index] = normalize_field_value(cell_fields[0][4])
+            placed += 1
+
+    if placed != len(fields):
+        return None
+    return table_data
+
+
+def read_form_page_tables(pdf, page_num, regions, form_fields, table_settings=TABLE_SETTINGS, metrics=None):
+    """
+    ناحیه‌های یک صفحه از PDF فرم (flatten نشده): ساختار جدول از خطوط صفحه و متن خانه‌ها از مقدار فیلدها
+    خروجی: (dict از index ناحیه به جدول اصلاح شده، لیست index ناحیه‌هایی که فرم آنها را پوشش نمی‌دهد)
+    """
+    tset = pdfplumber.table.TableSettings.resolve(table_settings)
+    text_settings = tset.text_settings or {}
+    analysis = analyze_page(pdf, page_num, metrics)
+    page_fields = form_fields.get(page_num, [])
+
+    tables = {}
+    missing = []
+    for index, table_meta in regions:
+        start = time.perf_counter()
+        bbox = region_bbox(table_meta["coordinates"])
+        fields = [field for field in page_fields if center_in(field, bbox)]
+        table_data = fill_table(analysis.crop(bbox).find_table(tset), fields, text_settings)
+        if table_data is None:
+            missing.append(index)
+            if metrics is not None:
+                metrics.fallback_regions.append(table_meta["sheet_name"])
+        else:
+            tables[index] = table_data
+        if metrics is not None:
+            metrics.add_region(table_meta["sheet_name"], time.perf_counter() - start)
+    analysis.close()
+    return tables, missing
+
+
+def read_form_region_tables(pdf, tables_info, form_fields, table_settings=TABLE_SETTINGS, metrics=None, page_executor=None):
+    """
+    read_form_page_tables برای همه صفحه‌ها (به صورت موازی اگر page_executor داده شود)
+    خروجی: (dict از index ناحیه به جدول اصلاح شده، لیست index ناحیه‌هایی که فرم آنها را پوشش نمی‌دهد)
+    """
+    page_jobs = select_page_regions(pdf, tables_info)
+    if page_executor is None:
+        page_results = [
+            read_form_page_tables(pdf, page_num, regions, form_fields, table_settings, metrics=metrics)
+            for page_num, regions in page_jobs
+        ]
+    else:
+        page_results = map_pages(page_executor, pdf, page_jobs, read_form_page_tables, form_fields, table_settings, metrics=metrics)
+
+    region_tables = {}
+    missing = []
+    for tables, page_missing in page_results:
+        region_tables.update(tables)
+        missing.extend(page_missing)
+    return region_tables, missing
+
+
+def read_form_tables(pdf, pdf_file, tables_info, form_fields, metrics=None, page_executor=None):
+    """
+    خواندن همه ناحیه‌های یک PDF فرم؛ فقط ناحیه‌هایی که فرم پوشش نمی‌دهد از PDF flatten شده (در حافظه) خوانده می‌شوند
+    pdf: همان PDF اصلی باز شده با pdfplumber؛ pdf_file: مسیر یا محتوای (bytes) آن برای flatten
+    خروجی: (region_tables، مجموعه index ناحیه‌هایی که متنشان قبلاً اصلاح شده است)
+    """
+    region_tables, missing = read_form_region_tables(pdf, tables_info, form_fields, metrics=metrics, page_executor=page_executor)
+    corrected = set(region_tables)
+
+    if missing:
+        with timed(metrics, "flatten"):
+            flattened = flatten_in_memory(pdf_file)
+        if flattened is not None:
+            with pdfplumber.open(flattened) as flattened_pdf:
+                region_tables.update(read_region_tables(flattened_pdf, tables_info, indexes=missing, metrics=metrics, page_executor=page_executor))
+    return region_tables, corrected
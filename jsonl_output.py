@@ -0,0 +1,131 @@
+import os
+import re
+import gzip
+import json
+from collections import OrderedDict
+import config
+
+# orjson در صورت نصب بودن (سریع‌تر از json)؛ خروجی هر دو UTF-8 و بدون فاصله است
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# تاریخ Header گزارش DCR به صورت 14041002 (سال، ماه، روز)
+REPORT_DATE_PATTERN = re.compile(r"^(\d{4})(\d{2})")
+# تاریخ شمسی در نام فایل (مثلاً DDR_1404-10-02.pdf یا 14041002.pdf) برای گزارش‌های بدون تاریخ Header
+FILE_DATE_PATTERN = re.compile(r"(?<!\d)(1[34]\d{2})([-_.]?)(0[1-9]|1[0-2])(?:\2(?:0[1-9]|[12]\d|3[01]))?(?!\d)")
+# ماه گزارش‌هایی که نه تاریخ Header دارند و نه تاریخ در نام فایل
+UNKNOWN_MONTH = "unknown"
+
+
+def dumps_compact(record):
+    """
+    تبدیل یک رکورد به یک خط JSON فشرده (bytes، بدون newline)
+    کلیدهای غیر string (مثل شماره ستون در جداول records) مثل json به string تبدیل می‌شوند
+    """
+    if orjson is not None:
+        return orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def report_month(report, pdf_file=None):
+    """
+    ماه گزارش به صورت YYYY-MM از تاریخ Header (تقویم گزارش)
+    گزارش‌های بدون تاریخ Header (DDR، DMR، POB) از تاریخ نام فایل و در غیر این صورت UNKNOWN_MONTH
+    (ماه زمان پردازش استفاده نمی‌شود تا پردازش دوباره یک فایل آن را به فایل JSONL دیگری نبرد)
+    """
+    header = report.get("Header") if isinstance(report, dict) else None
+    date = header.get("تاریخ", "") if isinstance(header, dict) else ""
+    match = REPORT_DATE_PATTERN.match(str(date))
+    if match:
+        return f"{int(match.group(1)):04d}-{int(match.group(2)):02d}"
+    match = FILE_DATE_PATTERN.search(os.path.basename(pdf_file or ""))
+    if match:
+        return f"{match.group(1)}-{match.group(3)}"
+    return UNKNOWN_MONTH
+
+
+class JsonlWriter:
+    """
+    نوشتن گزارش‌ها به صورت یک خط JSON برای هر گزارش در فایل‌های جدا برای هر نوع گزارش، دستگاه و ماه:
+    <output_dir>/<report_type>/<rig>/<report_type>_<rig>_<YYYY-MM>.jsonl[.gz]
+    فقط پردازش اصلی در این فایل‌ها می‌نویسد؛ workers فقط ساختار گزارش را برمی‌گردانند
+    اگر یک فایل دوباره پردازش شود رکورد جدید به انتها اضافه می‌شود (آخرین رکورد هر source معتبر است)
+    """
+
+    def __init__(self, output_dir=None, compress=None, max_open_files=16, batch_size=100):
+        self.output_dir = output_dir or config.JSONL_OUTPUT_DIR
+        self.compress = config.JSONL_GZIP if compress is None else compress
+        self.max_open_files = max_open_files
+        # تعداد گزارش‌هایی که بین دو flush در manifest ثبت می‌شوند (OutputCommitter)
+        self.batch_size = batch_size
+        self._files = OrderedDict()
+
+    def path_for(self, report_type, rig, month):
+        extension = ".jsonl.gz" if self.compress else ".jsonl"
+        return os.path.join(self.output_dir, report_type, rig, f"{report_type}_{rig}_{month}{extension}")
+
+    def _open(self, path):
+        f = self._files.get(path)
+        if f is not None:
+            self._files.move_to_end(path)
+            return f
+
+        if len(self._files) >= self.max_open_files:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # gzip در حالت append یک member جدید اضافه می‌کند که gzip.open آن را پشت سر هم می‌خواند
+        f = gzip.open(path, "ab") if self.compress else open(path, "ab")
+        self._files[path] = f
+        return f
+
+    def write(self, report, pdf_file, report_type, rig):
+        """
+        افزودن یک گزارش و برگرداندن مسیر فایل JSONL آن
+        """
+        month = report_month(report, pdf_file)
+        path = self.path_for(report_type, rig, month)
+        record = {
+            "source": os.path.basename(pdf_file),
+            "report_type": report_type,
+            "rig": rig,
+            "month": month,
+            "report": report,
+        }
+
+        try:
+            f = self._open(path)
+            f.write(dumps_compact(record) + b"\n")
+            return path
+        except Exception:
+            print(f"Unexpected error while writing {os.path.basename(pdf_file)} to JSONL")
+        return None
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        while self._files:
+            _, f = self._files.popitem()
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_jsonl(path):
+    """
+    خواندن رکوردهای یک فایل JSONL (با یا بدون gzip)
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -0,0 +1,33 @@
+import sys
+import importlib.util
+
+# کتابخانه‌های سنگین که فقط برای خواندن PDF لازم هستند
+HEAVY_MODULES = ["pdfplumber", "pikepdf", "numpy", "arabic_reshaper", "bidi.algorithm"]
+
+
+def lazy_import(name):
+    """
+    ماژول name فقط در اولین دسترسی به یکی از attribute هایش واقعاً import می‌شود
+    (دستورهایی که PDF نمی‌خوانند، مثل رد کردن فایل‌های بدون تغییر، هزینه import آن را نمی‌دهند)
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def preload(names=None):
+    """
+    import کامل ماژول‌های سنگین، مثلاً قبل از ساختن process pool تا workers آنها را آماده به ارث ببرند
+    """
+    for name in names or HEAVY_MODULES:
+        getattr(lazy_import(name), "__name__")
@@ -0,0 +1,181 @@
+import os
+import json
+import hashlib
+from contextlib import contextmanager
+import config
+
+# قفل فایل فقط روی سیستم‌های POSIX وجود دارد
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# اندازه هر بخش برای خواندن فایل هنگام hash گرفتن
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(file_path):
+    """
+    sha256 محتوای فایل (بدون خواندن کل فایل در حافظه)
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def template_hash(tables_info):
+    """
+    hash ناحیه‌های template؛ با تغییر مختصات یا sheet ها خروجی‌های قبلی نامعتبر می‌شوند
+    """
+    data = json.dumps(tables_info, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def load_manifest(manifest_path=None):
+    """
+    خواندن manifest: dict از مسیر فایل ورودی به اطلاعات آخرین استخراج موفق
+    """
+    if manifest_path is None:
+        manifest_path = config.MANIFEST_PATH
+    if not os.path.exists(manifest_path):
+        return {}
+
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except json.JSONDecodeError:
+        print("Invalid manifest format, starting a new one")
+    except Exception:
+        print("Unexpected error while loading manifest")
+    return {}
+
+
+def save_manifest(manifest, manifest_path=None):
+    """
+    ذخیره manifest به صورت atomic (نوشتن در فایل موقت و سپس rename)
+    """
+    if manifest_path is None:
+        manifest_path = config.MANIFEST_PATH
+    manifest_dir = os.path.dirname(manifest_path)
+    if manifest_dir and not os.path.exists(manifest_dir):
+        os.makedirs(manifest_dir, exist_ok=True)
+
+    temp_path = f"{manifest_path}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, manifest_path)
+    except Exception:
+        print("Unexpected error while saving manifest")
+
+
+@contextmanager
+def manifest_file_lock(manifest_path=None):
+    """
+    قفل انحصاری <manifest>.lock بین پردازش‌هایی که manifest را همزمان به‌روز می‌کنند
+    (مثلاً worker_service.py و اجرای batch_extract.py)؛ بدون fcntl قفلی گرفته نمی‌شود
+    """
+    if manifest_path is None:
+        manifest_path = config.MANIFEST_PATH
+    if fcntl is None:
+        yield
+        return
+    manifest_dir = os.path.dirname(manifest_path)
+    if manifest_dir and not os.path.exists(manifest_dir):
+        os.makedirs(manifest_dir, exist_ok=True)
+    with open(f"{manifest_path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def update_manifest(entries, manifest_path=None):
+    """
+    ادغام ردیف‌های جدید با manifest فعلی روی دیسک و ذخیره آن
+    ردیف‌هایی که پردازش دیگری در این فاصله نوشته است حفظ می‌شوند؛ خروجی: manifest ادغام شده
+    """
+    with manifest_file_lock(manifest_path):
+        manifest = load_manifest(manifest_path)
+        manifest.update(entries)
+        save_manifest(manifest, manifest_path)
+    return manifest
+
+
+def output_sink(output_mode):
+    """
+    محل ذخیره هر حالت خروجی (پوشه JSON، پوشه JSONL، فایل SQLite یا پوشه delta)
+    """
+    return {
+        "json": config.MAIN_OUTPUT_DIR,
+        "jsonl": config.JSONL_OUTPUT_DIR,
+        "sqlite": config.SQLITE_PATH,
+        "delta": config.DELTA_OUTPUT_DIR,
+    }.get(output_mode)
+
+
+def entry_sink(entry):
+    """
+    (حالت خروجی، محل ذخیره) یک ردیف manifest
+    ردیف‌های قدیمی این اطلاعات را ندارند؛ اگر خروجی آنها فایل _tables.json باشد در حالت json نوشته شده‌اند
+    """
+    if "output_mode" in entry:
+        return entry["output_mode"], entry.get("sink")
+    if entry.get("output", "").endswith("_tables.json"):
+        return "json", output_sink("json")
+    return None, None
+
+
+def check_input(manifest, pdf_file, tables_hash, output_mode, data=None):
+    """
+    بررسی اینکه آیا خروجی فایل ورودی هنوز معتبر است
+    خروجی: (معتبر است یا نه، اثر فایل شامل hash، اندازه و زمان تغییر)
+    output_mode: حالت خروجی این اجرا؛ اگر خروجی قبلی در حالت یا محل دیگری نوشته شده باشد (مثلاً بعد از تغییر
+    --output-mode یا SQLITE_PATH) فایل دوباره پردازش می‌شود تا به خروجی جدید هم برسد
+    اگر اندازه و زمان تغییر فایل با manifest یکی باشد، hash ذخیره شده استفاده می‌شود
+    تا فایل‌های بدون تغییر دوباره خوانده نشوند
+    data: محتوای فایل اگر قبلاً در حافظه خوانده شده باشد (hash بدون خواندن دوباره فایل)
+    """
+    entry = manifest.get(pdf_file)
+    stat = os.stat(pdf_file)
+
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+        input_hash = entry.get("input_hash")
+    elif data is not None:
+        input_hash = hashlib.sha256(data).hexdigest()
+    else:
+        input_hash = file_hash(pdf_file)
+    fingerprint = {"input_hash": input_hash, "size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    if not entry:
+        return False, fingerprint
+
+    up_to_date = (
+        entry.get("input_hash") == input_hash
+        and entry.get("template_hash") == tables_hash
+        and entry.get("extractor_version") == config.EXTRACTOR_VERSION
+        and entry_sink(entry) == (output_mode, output_sink(output_mode))
+        and os.path.exists(entry.get("output", ""))
+    )
+    if up_to_date:
+        # فایل ممکن است دوباره sync شده باشد ولی محتوا تغییری نکرده است
+        entry.update(fingerprint)
+    return up_to_date, fingerprint
+
+
+def record_output(manifest, pdf_file, fingerprint, tables_hash, output_path, output_mode):
+    """
+    ثبت استخراج موفق یک فایل در manifest
+    fingerprint: خروجی check_input (قبل از شروع پردازش)
+    """
+    manifest[pdf_file] = {
+        **fingerprint,
+        "template_hash": tables_hash,
+        "extractor_version": config.EXTRACTOR_VERSION,
+        "output_mode": output_mode,
+        "sink": output_sink(output_mode),
+        "output": output_path,
+    }
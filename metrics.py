@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import cProfile
+from contextlib import contextmanager
+import config
+
+# resource فقط روی سیستم‌های Unix وجود دارد
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class FileMetrics:
+    """
+    اندازه‌گیری‌های یک فایل: زمان هر مرحله، زمان extract_table هر ناحیه،
+    تعداد اشیای هر صفحه و خطاها
+    """
+
+    def __init__(self, pdf_file):
+        self.pdf_file = pdf_file
+        # peak_rss_kb در to_record فقط حافظه همین فایل را نشان می‌دهد (نه فایل‌های قبلی همین worker)
+        reset_peak_rss()
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.regions = {}
+        self.objects_per_page = {}
+        # ناحیه‌هایی که فرم پوشش نمی‌داد و از PDF flatten شده خوانده شدند
+        self.fallback_regions = []
+        self.errors = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add_region(self, sheet_name, seconds):
+        self.regions[sheet_name] = self.regions.get(sheet_name, 0.0) + seconds
+
+    def merge(self, other):
+        """
+        افزودن اندازه‌گیری‌های بخشی از همین فایل که در پردازش دیگری انجام شده (مثلاً یک صفحه)
+        """
+        for name, seconds in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, seconds in other.regions.items():
+            self.add_region(name, seconds)
+        self.objects_per_page.update(other.objects_per_page)
+        self.fallback_regions.extend(other.fallback_regions)
+        self.errors.extend(other.errors)
+
+    def add_error(self, where, error):
+        self.errors.append({"where": where, "error": repr(error)})
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def to_record(self, status):
+        return {
+            "file": self.pdf_file,
+            "status": status,
+            "total": round(self.elapsed(), 6),
+            "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            "regions": {name: round(seconds, 6) for name, seconds in self.regions.items()},
+            "objects_per_page": self.objects_per_page,
+            "fallback_regions": self.fallback_regions,
+            "peak_rss_kb": peak_rss_kb(),
+            "errors": self.errors,
+        }
+
+
+@contextmanager
+def timed(metrics, name):
+    """
+    زمان‌گیری یک مرحله؛ اگر metrics برابر None باشد کاری انجام نمی‌دهد
+    """
+    if metrics is None:
+        yield
+        return
+    with metrics.stage(name):
+        yield
+
+
+def proc_status_kb(field, pid="self"):
+    """
+    مقدار یک فیلد حافظه (مثل VmRSS یا VmHWM) از /proc/<pid>/status به کیلوبایت؛ None اگر در دسترس نباشد (غیر Linux)
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """
+    صفر کردن بیشترین حافظه ثبت شده (VmHWM) پردازش فعلی؛ فقط روی Linux
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def current_rss_kb(pid="self"):
+    return proc_status_kb("VmRSS", pid)
+
+
+def peak_rss_kb():
+    """
+    بیشترین حافظه مصرفی پردازش فعلی از آخرین reset_peak_rss (کیلوبایت) یا None اگر قابل اندازه‌گیری نباشد
+    بدون /proc بیشترین حافظه از شروع پردازش (ru_maxrss) برگردانده می‌شود
+    """
+    peak = proc_status_kb("VmHWM")
+    if peak is not None:
+        return peak
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def emit_metrics(record, metrics_path=None):
+    """
+    افزودن یک خط JSON به فایل metrics
+    هر خط با یک write روی فایل O_APPEND نوشته می‌شود تا خروجی پردازش‌های موازی قاطی نشود
+    """
+    if metrics_path is None:
+        metrics_path = config.METRICS_PATH
+    metrics_dir = os.path.dirname(metrics_path)
+    if metrics_dir and not os.path.exists(metrics_dir):
+        os.makedirs(metrics_dir, exist_ok=True)
+
+    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+    try:
+        fd = os.open(metrics_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+    except Exception:
+        print("Unexpected error while writing metrics")
+
+
+def start_profiler():
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def dump_profile(profiler, pdf_file, seconds, profile_dir=None):
+    """
+    ذخیره خروجی cProfile یک فایل؛ مدت زمان در ابتدای نام فایل است تا کندترین‌ها پیدا شوند
+    """
+    profiler.disable()
+    if profile_dir is None:
+        profile_dir = config.PROFILE_DIR
+    os.makedirs(profile_dir, exist_ok=True)
+
+    pdf_basename = os.path.splitext(os.path.basename(pdf_file))[0]
+    profile_path = os.path.join(profile_dir, f"{int(seconds * 1000):09d}ms_{pdf_basename}.prof")
+    profiler.dump_stats(profile_path)
+    return profile_path
+
+
+def prune_profiles(keep, profile_dir=None):
+    """
+    فقط keep پروفایل کندترین فایل‌ها نگه داشته می‌شوند
+    """
+    if profile_dir is None:
+        profile_dir = config.PROFILE_DIR
+    if not os.path.isdir(profile_dir):
+        return
+
+    profiles = sorted(name for name in os.listdir(profile_dir) if name.endswith(".prof"))
+    for name in profiles[:max(0, len(profiles) - keep)]:
+        try:
+            os.remove(os.path.join(profile_dir, name))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,43 @@
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# حداکثر تعداد رقم (بدون صفرهای اول) که بدون سرریز در int64 جا می‌شود
+MAX_INT64_DIGITS = 18
+
+# ارقام فارسی (۰-۹) و عربی (٠-٩) به ارقام لاتین، منفی یونیکد به "-"
+# و حذف فاصله‌ها، جداکننده‌های هزارگان و نویسه‌های نامرئی جهت متن (RLM/LRM/ALM/ZWNJ) که در متن PDF می‌آیند
+NUMBER_TRANSLATION = str.maketrans(
+    "۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩−",
+    "01234567890123456789-",
+    " \t\n\r ,٬‌‎‏؜",
+)
+
+
+def clean_number(value):
+    """
+    متن یک سلول عددی بعد از یکسان‌سازی ارقام و حذف جداکننده‌ها؛ سلول None خالی است (مثل convert_to_int)
+    """
+    if value is None:
+        return ""
+    return str(value).translate(NUMBER_TRANSLATION)
+
+
+def parse_int_cells(cells):
+    """
+    تبدیل یک ستون (یا ماتریس) از سلول‌های متنی به عدد صحیح با یک بار عبور NumPy
+    خروجی: (آرایه int64 با همان شکل، mask سلول‌هایی که عدد نبودند)
+    سلول خالی 0 است و خطا حساب نمی‌شود؛ سلول‌های ناموفق هم 0 می‌شوند (مثل convert_to_int)
+    اعداد بزرگ‌تر از MAX_INT64_DIGITS رقم (مثلاً شماره تلفن یا متن ادغام شده چند سلول) ناموفق حساب می‌شوند
+    """
+    cells = np.asarray(cells, dtype=object)
+    texts = np.array([clean_number(cell) for cell in cells.ravel()], dtype=str).reshape(cells.shape)
+    unsigned = np.char.lstrip(texts, "+-")
+    signs = np.char.str_len(texts) - np.char.str_len(unsigned)
+    # isdecimal برای رشته خالی False است؛ "-" تنها یا "--5" عدد نیستند
+    digits = np.char.str_len(np.char.lstrip(unsigned, "0"))
+    valid = np.char.isdecimal(unsigned) & (signs <= 1) & (digits <= MAX_INT64_DIGITS)
+    failed = ~valid & (texts != "")
+    values = np.zeros(texts.shape, dtype=np.int64)
+    values[valid] = texts[valid].astype(np.int64)
+    return values, failed
@@ -0,0 +1,273 @@
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from flatten import pdf_stream
+from lazy_import import lazy_import
+from metrics import FileMetrics, timed
+
+np = lazy_import("numpy")
+pdfplumber = lazy_import("pdfplumber")
+
+# تنظیمات پیدا کردن جدول برای همه ناحیه‌ها
+TABLE_SETTINGS = {
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "snap_tolerance": 4,
+    "join_tolerance": 4,
+    "intersection_tolerance": 5,
+}
+
+# اندازه هر خانه در ایندکس مکانی صفحه (واحد PDF point)
+GRID_CELL_SIZE = 16
+
+
+def region_bbox(coords):
+    """
+    تبدیل مختصات coordinates_points.json به bbox در pdfplumber
+    coords: [top, x0, bottom, x1] -> (x0, top, x1, bottom)
+    """
+    return (coords[1], coords[0], coords[3], coords[2])
+
+
+def group_regions_by_page(tables_info):
+    """
+    گروه‌بندی ناحیه‌های جدول بر اساس شماره صفحه
+    خروجی: dict از شماره صفحه به لیست (index در tables_info، متادیتا) به ترتیب صفحه
+    index اصلی نگه داشته می‌شود تا نتایج به ترتیب template برگردند
+    """
+    pages = {}
+    for index, table_meta in enumerate(tables_info):
+        pages.setdefault(table_meta["page_number"], []).append((index, table_meta))
+    return dict(sorted(pages.items()))
+
+
+class GridIndex:
+    """
+    ایندکس مکانی (grid یکنواخت) روی مختصات اشیای یک نوع در صفحه
+    هر شیء در همه خانه‌هایی از grid که با آن همپوشانی دارد ثبت می‌شود
+    (به صورت CSR: برای هر خانه، بازه‌ای از ids در آرایه مرتب شده)
+    """
+
+    def __init__(self, objs, page_bbox, cell_size=GRID_CELL_SIZE):
+        count = len(objs)
+        self.x0 = np.fromiter((obj["x0"] for obj in objs), dtype=float, count=count)
+        self.x1 = np.fromiter((obj["x1"] for obj in objs), dtype=float, count=count)
+        self.top = np.fromiter((obj["top"] for obj in objs), dtype=float, count=count)
+        self.bottom = np.fromiter((obj["bottom"] for obj in objs), dtype=float, count=count)
+
+        self.origin_x, self.origin_y = page_bbox[0], page_bbox[1]
+        self.cell_size = cell_size
+        self.cols = max(1, int(np.ceil((page_bbox[2] - page_bbox[0]) / cell_size)))
+        self.rows = max(1, int(np.ceil((page_bbox[3] - page_bbox[1]) / cell_size)))
+
+        # بازه خانه‌های هر شیء؛ اشیای بیرون از صفحه در خانه‌های لبه ثبت می‌شوند
+        col_start = self._cols_of(self.x0)
+        col_end = self._cols_of(self.x1)
+        row_start = self._rows_of(self.top)
+        row_end = self._rows_of(self.bottom)
+
+        span_cols = col_end - col_start + 1
+        spans = span_cols * (row_end - row_start + 1)
+        ids = np.repeat(np.arange(count), spans)
+        offsets = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+        cells = (row_start[ids] + offsets // span_cols[ids]) * self.cols + col_start[ids] + offsets % span_cols[ids]
+
+        order = np.argsort(cells, kind="stable")
+        self.ids = ids[order]
+        self.cell_starts = np.searchsorted(cells[order], np.arange(self.rows * self.cols + 1))
+
+    def _cols_of(self, xs):
+        return np.clip(((xs - self.origin_x) // self.cell_size).astype(int), 0, self.cols - 1)
+
+    def _rows_of(self, ys):
+        return np.clip(((ys - self.origin_y) // self.cell_size).astype(int), 0, self.rows - 1)
+
+    def query(self, bbox):
+        """
+        ids اشیایی که با bbox همپوشانی دارند (به ترتیب اصلی)
+        همان شرط get_bbox_overlap در pdfplumber: همپوشانی با عرض یا ارتفاع صفر هم قبول است
+        """
+        x0, top, x1, bottom = bbox
+        col_start, col_end = self._cols_of(np.array([x0, x1]))
+        row_start, row_end = self._rows_of(np.array([top, bottom]))
+
+        # خانه‌های هر ردیف grid پشت سر هم هستند، پس هر ردیف یک برش از ids است
+        chunks = [
+            self.ids[self.cell_starts[row * self.cols + col_start]:self.cell_starts[row * self.cols + col_end + 1]]
+            for row in range(row_start, row_end + 1)
+        ]
+        candidates = np.unique(np.concatenate(chunks))
+
+        overlap_w = np.minimum(self.x1[candidates], x1) - np.maximum(self.x0[candidates], x0)
+        overlap_h = np.minimum(self.bottom[candidates], bottom) - np.maximum(self.top[candidates], top)
+        mask = (overlap_w >= 0) & (overlap_h >= 0) & (overlap_w + overlap_h > 0)
+        return candidates[mask]
+
+
+class PageAnalysis:
+    """
+    اشیای یک صفحه (chars, lines, rects, ...) فقط یک بار parse می‌شوند
+    و برای هر نوع یک GridIndex ساخته می‌شود؛ crop هر ناحیه و ورودی
+    table finder به جای فیلتر کردن همه اشیای صفحه از این ایندکس خوانده می‌شود
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._indexes = {}
+        for kind, objs in page.objects.items():
+            if objs:
+                self._indexes[kind] = (objs, GridIndex(objs, page.bbox))
+
+    def objects_in(self, objs, bbox):
+        """
+        جایگزین crop_to_bbox برای CroppedPage
+        ترتیب اصلی اشیا حفظ می‌شود تا خروجی دقیقاً مثل page.crop باشد
+        """
+        if not objs:
+            return []
+        entry = self._indexes.get(objs[0]["object_type"])
+        if entry is None or entry[0] is not objs:
+            return pdfplumber.utils.crop_to_bbox(objs, bbox)
+
+        _, index = entry
+        return pdfplumber.utils.crop_to_bbox([objs[i] for i in index.query(bbox)], bbox)
+
+    def crop(self, bbox):
+        return pdfplumber.page.CroppedPage(self.page, bbox, crop_fn=self.objects_in)
+
+    def close(self):
+        """
+        آزاد کردن اشیای parse شده صفحه و ایندکس‌ها بعد از خواندن همه ناحیه‌های آن
+        (pdfplumber آنها را تا بسته شدن کل PDF نگه می‌دارد)
+        """
+        self._indexes.clear()
+        self.page.close()
+
+
+def select_page_regions(pdf, tables_info, indexes=None):
+    """
+    ناحیه‌های هر صفحه برای خواندن: لیست (شماره صفحه، لیست (index، متادیتا)) به ترتیب صفحه
+    indexes: فقط این ناحیه‌ها (None یعنی همه)؛ صفحه‌هایی که در PDF نیستند گزارش و حذف می‌شوند
+    """
+    page_jobs = []
+    for page_num, regions in group_regions_by_page(tables_info).items():
+        if indexes is not None:
+            regions = [region for region in regions if region[0] in indexes]
+            if not regions:
+                continue
+        if page_num > len(pdf.pages):
+            for _ in regions:
+                print(f"Not found page in PDF: {page_num}")
+            continue
+        page_jobs.append((page_num, regions))
+    return page_jobs
+
+
+def analyze_page(pdf, page_num, metrics=None):
+    with timed(metrics, "page_analysis"):
+        analysis = PageAnalysis(pdf.pages[page_num - 1])
+    if metrics is not None:
+        metrics.objects_per_page[page_num] = sum(len(objs) for objs in analysis.page.objects.values())
+    return analysis
+
+
+def read_page_tables(pdf, page_num, regions, table_settings=TABLE_SETTINGS, metrics=None):
+    """
+    جدول خام ناحیه‌های یک صفحه با یک بار تحلیل صفحه
+    خروجی: dict از index ناحیه به خروجی extract_table
+    """
+    analysis = analyze_page(pdf, page_num, metrics)
+    tables = {}
+    for index, table_meta in regions:
+        start = time.perf_counter()
+        cropped_page = analysis.crop(region_bbox(table_meta["coordinates"]))
+        tables[index] = cropped_page.extract_table(table_settings=table_settings)
+        if metrics is not None:
+            metrics.add_region(table_meta["sheet_name"], time.perf_counter() - start)
+    analysis.close()
+    return tables
+
+
+def _run_page_job(pdf_source, page_num, regions, reader, args, collect_metrics):
+    """
+    اجرای reader برای یک صفحه در worker؛ هر worker نمونه pdfplumber خودش را باز می‌کند
+    pdf_source: مسیر فایل PDF (process pool) یا bytes مشترک (thread pool)
+    """
+    metrics = FileMetrics(None) if collect_metrics else None
+    with pdfplumber.open(pdf_stream(pdf_source)) as pdf:
+        result = reader(pdf, page_num, regions, *args, metrics=metrics)
+    return result, metrics
+
+
+def page_parsed(pdf, page_num):
+    """
+    True اگر اشیای صفحه قبلاً در همین پردازش parse شده باشند (مثلاً صفحه 1 در بررسی anchor ها)
+    """
+    return hasattr(pdf.pages[page_num - 1], "_objects")
+
+
+def map_pages(executor, pdf, page_jobs, reader, *args, metrics=None):
+    """
+    اجرای reader(pdf, page_num, regions, *args, metrics=...) برای هر صفحه در executor (thread یا process pool)
+    نتایج به ترتیب page_jobs برگردانده می‌شوند و metrics صفحه‌ها با metrics فایل ادغام می‌شود
+    reader باید تابع سطح ماژول باشد تا در process pool قابل ارسال باشد
+    - صفحه‌هایی که قبلاً parse شده‌اند در همین پردازش با همان تحلیل خوانده می‌شوند
+    - به process pool فقط مسیر فایل فرستاده می‌شود نه محتوای PDF؛ PDF در حافظه (flatten در حافظه)
+      یک بار در فایل موقت نوشته می‌شود
+    """
+    remote_jobs = [(page_num, regions) for page_num, regions in page_jobs if not page_parsed(pdf, page_num)]
+    temp_path = None
+    try:
+        futures = {}
+        if remote_jobs:
+            pdf_source = getattr(pdf.stream, "name", None)
+            if not isinstance(pdf_source, str) or not os.path.isfile(pdf_source):
+                pdf.stream.seek(0)
+                pdf_source = pdf.stream.read()
+                if not isinstance(executor, ThreadPoolExecutor):
+                    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                        f.write(pdf_source)
+                    temp_path = pdf_source = f.name
+            for page_num, regions in remote_jobs:
+                futures[page_num] = executor.submit(_run_page_job, pdf_source, page_num, regions, reader, args, metrics is not None)
+
+        # صفحه‌های parse شده همزمان با workers در همین پردازش خوانده می‌شوند
+        local_results = {
+            page_num: reader(pdf, page_num, regions, *args, metrics=metrics)
+            for page_num, regions in page_jobs if page_num not in futures
+        }
+
+        results = []
+        for page_num, _ in page_jobs:
+            if page_num in local_results:
+                results.append(local_results[page_num])
+                continue
+            result, page_metrics = futures[page_num].result()
+            if metrics is not None:
+                metrics.merge(page_metrics)
+            results.append(result)
+        return results
+    finally:
+        if temp_path is not None:
+            os.remove(temp_path)
+
+
+def read_region_tables(pdf, tables_info, table_settings=TABLE_SETTINGS, metrics=None, indexes=None, page_executor=None):
+    """
+    استخراج جدول خام همه ناحیه‌ها با یک بار تحلیل برای هر صفحه
+    خروجی: dict از index ناحیه در tables_info به خروجی extract_table
+    metrics: در صورت وجود، زمان تحلیل صفحه، زمان هر ناحیه و تعداد اشیای هر صفحه ثبت می‌شود
+    indexes: فقط این ناحیه‌ها خوانده می‌شوند (None یعنی همه)
+    page_executor: در صورت وجود صفحه‌ها به صورت موازی خوانده می‌شوند (خروجی همان خروجی ترتیبی است)
+    """
+    page_jobs = select_page_regions(pdf, tables_info, indexes)
+    if page_executor is None:
+        page_results = [read_page_tables(pdf, page_num, regions, table_settings, metrics=metrics) for page_num, regions in page_jobs]
+    else:
+        page_results = map_pages(page_executor, pdf, page_jobs, read_page_tables, table_settings, metrics=metrics)
+
+    region_tables = {}
+    for tables in page_results:
+        region_tables.update(tables)
+    return region_tables
@@ -0,0 +1,139 @@
+import argparse
+from report_rows import MEAL_COLUMNS, report_date, person_rows, iter_output_reports
+from numeric_cells import parse_int_cells
+import config
+
+# pyarrow فقط برای این خروجی لازم است
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+# ستون‌هایی که خروجی بر اساس آنها پوشه‌بندی می‌شود: <export_dir>/rig=O3/month=1404-10/
+PARTITION_COLUMNS = ["rig", "month"]
+
+FILE_EXTENSIONS = {"parquet": "parquet", "feather": "arrow"}
+
+
+def person_shift_schema():
+    return pa.schema(
+        [
+            ("date", pa.string()),
+            ("month", pa.string()),
+            ("rig", pa.string()),
+            ("source", pa.string()),
+            ("section", pa.string()),
+            ("shift", pa.string()),
+            ("name", pa.string()),
+            ("position", pa.string()),
+            ("company", pa.string()),
+        ]
+        + [(column, pa.int32()) for column in MEAL_COLUMNS.values()]
+    )
+
+
+def collect_person_shifts(reports):
+    """
+    تبدیل ردیف‌های افراد همه گزارش‌ها به ستون‌ها (dict از نام ستون به لیست)
+    اگر یک فایل چند بار آمده باشد (مثلاً هم JSON و هم JSONL) فقط آخرین نسخه نگه داشته می‌شود
+    تعداد وعده‌ها در خروجی‌های قدیمی‌تر string هستند ("1"، ""، ارقام فارسی)؛ همه با parse_int_cells
+    به عدد تبدیل می‌شوند و سلول‌هایی که عدد نیستند 0 ثبت می‌شوند
+    """
+    columns = {field.name: [] for field in person_shift_schema()}
+    meal_names = list(MEAL_COLUMNS.values())
+    # (نوع گزارش، دستگاه، فایل) -> بازه ردیف‌های آن گزارش
+    report_ranges = {}
+    dropped = []
+
+    for report, source, report_type, rig in reports:
+        date = report_date(report)
+        month = date[:7] if date else "unknown"
+        start = len(columns["name"])
+        for section, shift, name, position, company, *meals in person_rows(report):
+            columns["date"].append(date)
+            columns["month"].append(month)
+            columns["rig"].append(rig)
+            columns["source"].append(source)
+            columns["section"].append(section)
+            columns["shift"].append(shift)
+            columns["name"].append(name)
+            columns["position"].append(position)
+            columns["company"].append(company)
+            for meal_name, count in zip(meal_names, meals):
+                columns[meal_name].append(count)
+
+        key = (report_type, rig, source)
+        if key in report_ranges:
+            dropped.append(report_ranges[key])
+        report_ranges[key] = (start, len(columns["name"]))
+
+    if dropped:
+        keep = [True] * len(columns["name"])
+        for start, end in dropped:
+            keep[start:end] = [False] * (end - start)
+        columns = {name: [value for value, kept in zip(values, keep) if kept] for name, values in columns.items()}
+
+    if columns["name"]:
+        values, failed = parse_int_cells([columns[meal_name] for meal_name in meal_names])
+        if failed.any():
+            print(f"Could not parse {int(failed.sum())} meal counts, exported as 0")
+        for meal_name, counts in zip(meal_names, values.tolist()):
+            columns[meal_name] = counts
+    return columns
+
+
+def export_person_shifts(output_dir=None, export_dir=None, file_format="parquet"):
+    """
+    خروجی ستونی (Parquet یا Arrow IPC/Feather) از ردیف‌های افراد همه گزارش‌ها، پوشه‌بندی شده بر اساس دستگاه و ماه
+    پوشه‌هایی که داده جدید دارند بازنویسی می‌شوند؛ تعداد ردیف‌ها را برمی‌گرداند
+    """
+    if pa is None:
+        print("pyarrow not installed, cannot export person shifts")
+        return None
+    if output_dir is None:
+        output_dir = config.MAIN_OUTPUT_DIR
+    if export_dir is None:
+        export_dir = config.EXPORT_DIR
+
+    columns = collect_person_shifts(iter_output_reports(output_dir))
+    table = pa.table(columns, schema=person_shift_schema())
+    if table.num_rows == 0:
+        print("No person rows found")
+        return 0
+
+    partition_schema = pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS])
+    ds.write_dataset(
+        table,
+        export_dir,
+        format=file_format,
+        partitioning=ds.partitioning(partition_schema, flavor="hive"),
+        basename_template=f"part-{{i}}.{FILE_EXTENSIONS[file_format]}",
+        existing_data_behavior="delete_matching",
+    )
+    print(f"Exported {table.num_rows} rows to {export_dir}")
+    return table.num_rows
+
+
+def load_person_shifts(export_dir=None, columns=None, filter=None, file_format="parquet"):
+    """
+    خواندن خروجی با انتخاب ستون‌ها و فیلتر (فقط پوشه‌ها و ستون‌های لازم خوانده می‌شوند)
+    مثال: load_person_shifts(columns=["name", "lunch"], filter=ds.field("rig") == "O3")
+    """
+    if pa is None:
+        print("pyarrow not installed, cannot load person shifts")
+        return None
+    if export_dir is None:
+        export_dir = config.EXPORT_DIR
+    dataset = ds.dataset(export_dir, format=file_format, partitioning="hive")
+    return dataset.to_table(columns=columns, filter=filter)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export person-shift rows of extracted reports to partitioned Parquet/Arrow files")
+    parser.add_argument("output_dir", nargs="?", default=config.MAIN_OUTPUT_DIR)
+    parser.add_argument("--export-dir", default=config.EXPORT_DIR)
+    parser.add_argument("--format", choices=sorted(FILE_EXTENSIONS), default="parquet")
+    args = parser.parse_args()
+
+    export_person_shifts(args.output_dir, args.export_dir, args.format)
@@ -1,11 +1,41 @@
-import arabic_reshaper
-from bidi.algorithm import get_display
 import unicodedata
+import re
+from functools import lru_cache
+from lazy_import import lazy_import
+
+arabic_reshaper = lazy_import("arabic_reshaper")
+bidi_algorithm = lazy_import("bidi.algorithm")
+
+# حداکثر تعداد متن‌های متفاوتی که نتیجه اصلاح آنها در حافظه نگه داشته می‌شود
+# (سمت‌ها، نام‌ها و برچسب شیفت‌ها مدام تکرار می‌شوند)
+CORRECTION_CACHE_SIZE = 8192
+
+# حروف راست به چپ: عبری، عربی/فارسی و فرم‌های نمایشی عربی
+RTL_CHARS_PATTERN = re.compile("[\u0590-\u08FF\uFB1D-\uFDFF\uFE70-\uFEFF]")
+
+
+@lru_cache(maxsize=CORRECTION_CACHE_SIZE)
+def _correct_rtl_text(text):
+    reshaped_text = arabic_reshaper.reshape(text)
+    bidi_text = bidi_algorithm.get_display(reshaped_text)
+    normalized = unicodedata.normalize('NFKC', bidi_text)
+    return normalized
+
 
 def correct_persian_text(text):
     if isinstance(text, str):
-        reshaped_text = arabic_reshaper.reshape(text)
-        bidi_text = get_display(reshaped_text)
-        normalized = unicodedata.normalize('NFKC', bidi_text)
-        return normalized
-    return text
\ No newline at end of file
+        # مسیر سریع: متن بدون حروف راست به چپ (اعداد، لاتین) نیازی به reshape و bidi ندارد
+        if text.isascii():
+            return text
+        if not RTL_CHARS_PATTERN.search(text):
+            return unicodedata.normalize('NFKC', text)
+        return _correct_rtl_text(text)
+    return text
+
+
+def correct_persian_table(rows):
+    """
+    اصلاح متن همه سلول‌های یک جدول در یک فراخوانی
+    rows: لیست ردیف‌ها (خروجی extract_table)؛ سلول‌های غیر متنی (None) دست نمی‌خورند
+    """
+    return [[correct_persian_text(cell) for cell in row] for row in rows]
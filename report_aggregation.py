@@ -0,0 +1,273 @@
+import argparse
+from lazy_import import lazy_import
+from report_rows import MEAL_COLUMNS, TOTAL_MEAL_COLUMNS, PERSON_SECTIONS, report_date, person_rows, iter_output_reports
+import config
+
+np = lazy_import("numpy")
+
+# جدول مجموع هر بخش در گزارش DCR
+SECTION_TOTALS = {
+    "Operation": "ShiftTotalPage1",
+    "Herasat": "ShiftTotalHerasat",
+    "Ordogahi": "ShiftTotalOrdogahi",
+    "employer": "EmployerTotal",
+    "Drilling": "DrillingTotal",
+}
+# بخش‌هایی که افراد به تفکیک شیفت آمده‌اند و مجموع هر شیفت (Total<شیفت>) در انتهای لیست است
+SHIFTS = ["ShiftA", "ShiftB", "ShiftC", "ShiftD"]
+SHIFT_SECTIONS = ["Operation", "Herasat", "Ordogahi"]
+# ردیف‌های جدول total از خود گزارش‌ها خوانده می‌شوند؛ بخش معادل هر ردیف از کلمه‌ای که در برچسب آن آمده
+# (ردیف‌هایی مثل مهمان لیست افراد ندارند و فقط در جمع کل بررسی می‌شوند)
+TOTAL_SECTION_KEYWORDS = {
+    "عملیات": "Operation",
+    "حراست": "Herasat",
+    "اردوگاه": "Ordogahi",
+    "کارفرما": "employer",
+    "حفاری": "Drilling",
+}
+# برچسب ردیف جمع کل (بعد از normalize_label)
+GRAND_TOTAL_LABELS = {"جمعکل", "جمع", "مجموعکل", "مجموع"}
+# یکسان‌سازی ی و ک عربی و حذف فاصله‌ها و نیم‌فاصله برای مقایسه برچسب‌ها
+LABEL_TRANSLATION = str.maketrans({"ي": "ی", "ك": "ک", " ": None, "\u200c": None, "\n": None, "\t": None})
+
+MEAL_NAMES = list(MEAL_COLUMNS.values())
+
+
+def normalize_label(label):
+    return str(label).translate(LABEL_TRANSLATION)
+
+
+def label_section(label):
+    """
+    بخش معادل یک ردیف جدول total (برچسب normalize شده) یا None
+    """
+    for keyword, section in TOTAL_SECTION_KEYWORDS.items():
+        if keyword in label:
+            return section
+    return None
+
+
+def section_tables(report, section):
+    tables = report.get(section)
+    return tables if isinstance(tables, dict) else {}
+
+
+def count_vector(counts, keys):
+    """
+    تعداد وعده‌های یک جدول مجموع به صورت لیست (NaN برای جدول یا وعده استخراج نشده)
+    """
+    if not isinstance(counts, dict) or not counts:
+        return [np.nan] * len(keys)
+    return [counts[key] if isinstance(counts.get(key), int) else np.nan for key in keys]
+
+
+class MealArrays:
+    """
+    تعداد وعده‌های افراد و جداول مجموع همه گزارش‌ها به صورت آرایه‌های NumPy
+    person_counts: (تعداد ردیف افراد، 5) و person_report/person_section/person_shift: گزارش، بخش و شیفت هر ردیف
+    section_totals: (گزارش، بخش، 5)، shift_totals: (گزارش، بخش شیفتی، شیفت، 5) و meal_totals: (گزارش، ردیف جدول total، 5)
+    ردیف‌های meal_totals برچسب‌های جدول total گزارش‌ها هستند (categories، به ترتیب اولین دیدن)
+    مقدار جداول مجموعی که استخراج نشده‌اند NaN است؛ ترتیب وعده‌ها مثل MEAL_COLUMNS است
+    فقط گزارش‌های DCR خوانده می‌شوند (گزارش‌های دیگر جدول افراد و وعده ندارند)
+    """
+
+    def __init__(self, reports):
+        self.sources = []
+        self.report_types = []
+        rigs = []
+        dates = []
+        person_counts = []
+        person_report = []
+        person_section = []
+        person_shift = []
+        section_totals = []
+        shift_totals = []
+        meal_totals = []
+
+        section_index = {section: i for i, section in enumerate(PERSON_SECTIONS)}
+        shift_index = {shift: i for i, shift in enumerate(SHIFTS)}
+        meal_keys = list(MEAL_COLUMNS)
+        total_keys = list(TOTAL_MEAL_COLUMNS)
+        # برچسب normalize شده -> برچسب همان‌طور که در اولین گزارش آمده
+        labels = {}
+
+        for report, source, report_type, rig in reports:
+            if report_type != "DCR":
+                continue
+            report_index = len(self.sources)
+            self.sources.append(source)
+            self.report_types.append(report_type)
+            rigs.append(rig)
+            dates.append(report_date(report) or "")
+
+            rows = list(person_rows(report))
+            person_counts.extend(row[5:] for row in rows)
+            person_report.extend([report_index] * len(rows))
+            person_section.extend(section_index[row[0]] for row in rows)
+            person_shift.extend(shift_index.get(row[1], -1) for row in rows)
+
+            section_totals.append([
+                count_vector(section_tables(report, section).get(total_key), meal_keys)
+                for section, total_key in SECTION_TOTALS.items()
+            ])
+            shift_totals.append([
+                [count_vector(self.shift_total(section_tables(report, section).get(shift), shift), meal_keys) for shift in SHIFTS]
+                for section in SHIFT_SECTIONS
+            ])
+            report_totals = {}
+            for category, counts in section_tables(report, "total").items():
+                label = normalize_label(category)
+                labels.setdefault(label, category)
+                report_totals[label] = count_vector(counts, total_keys)
+            meal_totals.append(report_totals)
+
+        self.rigs = np.array(rigs, dtype=str)
+        self.dates = np.array(dates, dtype=str)
+        self.person_counts = np.array(person_counts, dtype=np.int64).reshape(-1, len(MEAL_NAMES))
+        self.person_report = np.array(person_report, dtype=np.int64)
+        self.person_section = np.array(person_section, dtype=np.int64)
+        self.person_shift = np.array(person_shift, dtype=np.int64)
+        self.section_totals = np.array(section_totals, dtype=np.float64).reshape(-1, len(SECTION_TOTALS), len(MEAL_NAMES))
+        self.shift_totals = np.array(shift_totals, dtype=np.float64).reshape(-1, len(SHIFT_SECTIONS), len(SHIFTS), len(MEAL_NAMES))
+        self.categories = list(labels.values())
+        self.category_sections = [label_section(label) for label in labels]
+        # index ردیف جمع کل در categories یا None
+        self.grand_total = next((i for i, label in enumerate(labels) if label in GRAND_TOTAL_LABELS), None)
+        missing = [np.nan] * len(MEAL_NAMES)
+        self.meal_totals = np.array(
+            [[report_totals.get(label, missing) for label in labels] for report_totals in meal_totals], dtype=np.float64,
+        ).reshape(len(meal_totals), len(labels), len(MEAL_NAMES))
+
+    @staticmethod
+    def shift_total(persons, shift):
+        """
+        ردیف Total<شیفت> که shift_table_handler به انتهای لیست افراد اضافه می‌کند
+        """
+        if isinstance(persons, list) and persons and isinstance(persons[-1], dict):
+            return persons[-1].get(f"Total{shift}")
+        return None
+
+    def __len__(self):
+        return len(self.sources)
+
+    def group_sums(self, keys, size, values):
+        """
+        جمع values (ردیف‌ها در محور اول) بر اساس keys (اعداد 0 تا size-1) با bincount برای هر ستون
+        تعداد ستون‌ها از شکل values گرفته می‌شود تا بدون ردیف (مثلاً گزارش بدون افراد) هم درست باشد
+        """
+        values = values.reshape(len(keys), int(np.prod(values.shape[1:])))
+        sums = np.empty((size, values.shape[1]), dtype=np.int64)
+        for column in range(values.shape[1]):
+            sums[:, column] = np.bincount(keys, weights=values[:, column], minlength=size)
+        return sums
+
+    def person_sums(self):
+        """
+        جمع وعده‌های افراد هر بخش: (گزارش، بخش، 5)
+        """
+        n_sections = len(PERSON_SECTIONS)
+        keys = self.person_report * n_sections + self.person_section
+        sums = self.group_sums(keys, len(self) * n_sections, self.person_counts)
+        return sums.reshape(len(self), n_sections, len(MEAL_NAMES))
+
+    def shift_person_sums(self):
+        """
+        جمع وعده‌های افراد هر شیفت بخش‌های شیفتی: (گزارش، بخش شیفتی، شیفت، 5)
+        """
+        n_shifts = len(SHIFTS)
+        shift_section = np.full(len(PERSON_SECTIONS), -1)
+        shift_section[[PERSON_SECTIONS.index(section) for section in SHIFT_SECTIONS]] = np.arange(len(SHIFT_SECTIONS))
+        sections = shift_section[self.person_section]
+        mask = (sections >= 0) & (self.person_shift >= 0)
+        keys = (self.person_report[mask] * len(SHIFT_SECTIONS) + sections[mask]) * n_shifts + self.person_shift[mask]
+        sums = self.group_sums(keys, len(self) * len(SHIFT_SECTIONS) * n_shifts, self.person_counts[mask])
+        return sums.reshape(len(self), len(SHIFT_SECTIONS), n_shifts, len(MEAL_NAMES))
+
+    def headcounts(self):
+        """
+        تعداد افراد (ردیف‌های دارای نام) هر بخش: (گزارش، بخش)
+        """
+        n_sections = len(PERSON_SECTIONS)
+        keys = self.person_report * n_sections + self.person_section
+        return np.bincount(keys, minlength=len(self) * n_sections).reshape(len(self), n_sections)
+
+    def aggregate(self, by="month"):
+        """
+        جمع وعده‌ها و تعداد افراد به تفکیک دستگاه و روز (by="day") یا ماه (by="month")
+        خروجی: (لیست (دستگاه، روز یا ماه)، جمع وعده‌ها (گروه، بخش، 5)، تعداد افراد (گروه، بخش)، تعداد گزارش‌ها)
+        گزارش‌های بدون تاریخ در گروه "unknown" قرار می‌گیرند
+        """
+        # تاریخ به صورت YYYY-MM-DD است؛ ماه هفت کاراکتر اول آن است
+        periods = self.dates if by == "day" else self.dates.astype("U7")
+        periods = np.where(self.dates == "", "unknown", periods)
+        groups, report_group = np.unique(np.char.add(np.char.add(self.rigs, "\t"), periods), return_inverse=True)
+        report_group = report_group.reshape(-1)
+
+        meals = self.group_sums(report_group, len(groups), self.person_sums())
+        heads = self.group_sums(report_group, len(groups), self.headcounts())
+        report_counts = np.bincount(report_group, minlength=len(groups))
+        keys = [tuple(group.split("\t", 1)) for group in groups.tolist()]
+        return keys, meals.reshape(len(groups), len(PERSON_SECTIONS), len(MEAL_NAMES)), heads, report_counts
+
+    def reconcile(self, tolerance=0):
+        """
+        مقایسه جمع وعده‌های افراد با جداول مجموع گزارش
+        - هر شیفت با Total<شیفت>، هر بخش با جدول مجموع آن (ShiftTotalPage1، EmployerTotal، ...)
+        - ردیف‌های جدول total با جمع افراد بخش معادل و ردیف جمع کل (اگر باشد) با جمع ردیف‌های دیگر
+        جداولی که استخراج نشده‌اند (NaN) بررسی نمی‌شوند
+        خروجی: لیست (فایل، دستگاه، بررسی، وعده، مقدار مورد انتظار، مقدار استخراج شده)
+        """
+        person_sums = self.person_sums()
+        checks = []
+
+        shift_sums = self.shift_person_sums()
+        for i, section in enumerate(SHIFT_SECTIONS):
+            for j, shift in enumerate(SHIFTS):
+                checks.append((f"{section}/Total{shift}", shift_sums[:, i, j], self.shift_totals[:, i, j]))
+
+        for i, (section, total_key) in enumerate(SECTION_TOTALS.items()):
+            checks.append((f"{section}/{total_key}", person_sums[:, PERSON_SECTIONS.index(section)], self.section_totals[:, i]))
+
+        for i, (category, section) in enumerate(zip(self.categories, self.category_sections)):
+            if section is not None and i != self.grand_total:
+                checks.append((f"total/{category}", person_sums[:, PERSON_SECTIONS.index(section)], self.meal_totals[:, i]))
+
+        # جمع کل فقط وقتی بررسی می‌شود که همه ردیف‌های دیگر در آن گزارش استخراج شده باشند
+        if self.grand_total is not None:
+            others = [i for i in range(len(self.categories)) if i != self.grand_total]
+            category_sum = self.meal_totals[:, others].sum(axis=1)
+            checks.append((f"total/{self.categories[self.grand_total]}", category_sum, self.meal_totals[:, self.grand_total]))
+
+        mismatches = []
+        for name, expected, found in checks:
+            mask = ~np.isnan(found) & ~np.isnan(expected) & (np.abs(expected - found) > tolerance)
+            for report_index, meal_index in zip(*np.nonzero(mask)):
+                mismatches.append((
+                    self.sources[report_index], str(self.rigs[report_index]), name, MEAL_NAMES[meal_index],
+                    int(expected[report_index, meal_index]), int(found[report_index, meal_index]),
+                ))
+        return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate meal counts of extracted reports per rig and day/month and check them against the report totals")
+    parser.add_argument("output_dir", nargs="?", default=config.MAIN_OUTPUT_DIR)
+    parser.add_argument("--by", choices=["day", "month"], default="month")
+    parser.add_argument("--reconcile", action="store_true", help="list reports whose person sums disagree with their totals")
+    parser.add_argument("--tolerance", type=int, default=0)
+    args = parser.parse_args()
+
+    arrays = MealArrays(iter_output_reports(args.output_dir))
+    if len(arrays) == 0:
+        print("No reports found")
+    else:
+        keys, meals, heads, report_counts = arrays.aggregate(args.by)
+        print("\t".join(["rig", args.by, "reports", "headcount"] + MEAL_NAMES))
+        for (rig, period), group_meals, group_heads, count in zip(keys, meals.sum(axis=1), heads.sum(axis=1), report_counts):
+            print("\t".join([rig, period, str(count), str(group_heads)] + [str(value) for value in group_meals]))
+
+        if args.reconcile:
+            mismatches = arrays.reconcile(args.tolerance)
+            for source, rig, check, meal, expected, found in mismatches:
+                print(f"{rig}/{source}: {check} {meal} persons={expected} extracted={found}")
+            print(f"{len(mismatches)} mismatches in {len({(m[1], m[0]) for m in mismatches})} reports")
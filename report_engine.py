@@ -0,0 +1,291 @@
+import os
+import copy
+import json
+from flatten import pdf_stream
+from persian_text import correct_persian_text, correct_persian_table
+from page_regions import region_bbox, read_region_tables
+from form_fields import read_form_tables
+from table_rows import build_table_rows
+from metrics import timed
+from lazy_import import lazy_import
+import config
+
+pdfplumber = lazy_import("pdfplumber")
+
+# handler های ثبت شده برای تبدیل جدول هر ناحیه: نام -> تابع(table, key)
+TABLE_HANDLERS = {}
+
+# template هر نوع گزارش: نوع گزارش (DCR, DDR, ...) -> تنظیمات template
+REPORT_TEMPLATES = {}
+
+# یکسان‌سازی ی و ک عربی با فارسی و حذف فاصله‌ها برای مقایسه متن‌های anchor
+ANCHOR_TRANSLATION = str.maketrans({"ي": "ی", "ك": "ک", " ": None, "\n": None, "\t": None})
+
+# coordinates_points.json خوانده شده برای بررسی anchor های template های دیگر: مسیر -> dict
+_COORDINATES_CACHE = {}
+
+
+def register_handler(name):
+    """
+    ثبت یک handler برای استفاده در template ها
+    handler جدول (TableRows) و کلید خروجی را می‌گیرد و مقدار خروجی را برمی‌گرداند
+    """
+    def decorator(func):
+        TABLE_HANDLERS[name] = func
+        return func
+    return decorator
+
+
+def register_template(report_type, metadata_key, sheets=None, sections=None, defaults=None, layout=None, anchors=None, version="1"):
+    """
+    ثبت template یک نوع گزارش
+    metadata_key: کلید ناحیه‌ها در coordinates_points.json
+    sheets: sheet_name -> (نام handler، بخش خروجی یا None، کلید خروجی)
+            sheet هایی که اینجا نیستند با handler "records" و با نام خودشان ذخیره می‌شوند
+    sections: بخش‌هایی که از ابتدا به صورت dict خالی ساخته می‌شوند
+    defaults: لیست (بخش یا None، کلید، مقدار پیش‌فرض) برای کلیدهایی که استخراج نشده‌اند
+    layout: ترتیب کلیدهای سطح اول خروجی نهایی (None یعنی همه کلیدها به ترتیب استخراج)
+    anchors: لیست (sheet_name، لیست متن‌های ثابت) برای تشخیص layout؛ متن ناحیه باید همه متن‌ها را داشته باشد
+             (بهتر است ناحیه‌های صفحه 1 باشند تا تشخیص قبل از خواندن بقیه صفحه‌ها انجام شود)
+    version: نسخه template (برای تشخیص نسخه layout در fingerprint)
+    """
+    REPORT_TEMPLATES[report_type] = {
+        "metadata_key": metadata_key,
+        "sheets": sheets or {},
+        "sections": sections or [],
+        "defaults": defaults or [],
+        "layout": layout,
+        "anchors": anchors or [],
+        "version": version,
+    }
+
+
+@register_handler("records")
+def records_handler(table, key):
+    return table.records()
+
+
+def template_coordinates():
+    """
+    ناحیه‌های همه template ها از config.COORDINATES_POINTS_PATH (یک بار در هر پردازش)
+    """
+    path = config.COORDINATES_POINTS_PATH
+    if path not in _COORDINATES_CACHE:
+        try:
+            with open(path, encoding="utf-8") as f:
+                _COORDINATES_CACHE[path] = json.load(f)
+        except Exception:
+            _COORDINATES_CACHE[path] = {}
+    return _COORDINATES_CACHE[path]
+
+
+def anchors_match(pdf, template, tables_info):
+    """
+    بررسی متن‌های ثابت (anchors) template در ناحیه‌هایشان؛ template بدون anchor هرگز تطبیق داده نمی‌شود
+    فقط همان صفحه‌ها parse می‌شوند و تحلیل آنها برای استخراج جداول دوباره استفاده می‌شود
+    """
+    if not template["anchors"]:
+        return False
+    regions = {table_meta["sheet_name"]: table_meta for table_meta in tables_info}
+    for sheet_name, keywords in template["anchors"]:
+        table_meta = regions.get(sheet_name)
+        if table_meta is None or table_meta["page_number"] > len(pdf.pages):
+            return False
+        page = pdf.pages[table_meta["page_number"] - 1]
+        try:
+            text = page.crop(region_bbox(table_meta["coordinates"])).extract_text() or ""
+        except ValueError:
+            # ناحیه بیرون از صفحه است (اندازه صفحه با template یکی نیست)
+            return False
+        text = correct_persian_text(text).translate(ANCHOR_TRANSLATION)
+        if not all(keyword.translate(ANCHOR_TRANSLATION) in text for keyword in keywords):
+            return False
+    return True
+
+
+def matching_templates(pdf, coordinates_points, exclude=None):
+    """
+    نوع گزارش‌هایی که anchor های آنها در PDF وجود دارد (template های بدون anchor تشخیص داده نمی‌شوند)
+    """
+    matches = []
+    for report_type, template in REPORT_TEMPLATES.items():
+        tables_info = coordinates_points.get(template["metadata_key"])
+        if report_type == exclude or not tables_info:
+            continue
+        if anchors_match(pdf, template, tables_info):
+            matches.append(report_type)
+    return matches
+
+
+def layout_matches(pdf, template, tables_info):
+    """
+    بررسی اینکه PDF با layout template می‌خواند:
+    - PDF باید صفحه‌های همه ناحیه‌ها را داشته باشد
+    - template دارای anchor: همه متن‌های ثابت آن پیدا شوند
+    - template بدون anchor (DDR، DMR، POB): PDF نباید با anchor های template دیگری (مثلاً DCR) بخواند،
+      تا فایلی که در پوشه اشتباه قرار گرفته رد شود
+    """
+    if len(pdf.pages) < max(table_meta["page_number"] for table_meta in tables_info):
+        return False
+    if template["anchors"]:
+        return anchors_match(pdf, template, tables_info)
+    report_type = next(name for name, registered in REPORT_TEMPLATES.items() if registered is template)
+    return not matching_templates(pdf, template_coordinates(), exclude=report_type)
+
+
+def convert_region_table(table_data, metrics=None, correct=True):
+    """
+    آماده‌سازی خروجی خام extract_table: اصلاح متن فارسی و حذف ردیف/ستون‌های خالی
+    correct: False برای جدول‌هایی که متنشان قبلاً اصلاح شده است (مسیر فرم)
+    """
+    if correct:
+        try:
+            with timed(metrics, "text_correction"):
+                table_data = correct_persian_table(table_data)
+        except Exception as e:
+            print("Unexpected error while correcting Persian text")
+            if metrics is not None:
+                metrics.add_error("text_correction", e)
+    return build_table_rows(table_data)
+
+
+def merge_value(target, key, value):
+    """
+    ثبت جدول یک ناحیه در target؛ اگر چند ناحیه یک کلید داشته باشند (مثلاً Summary_part1 در POB)
+    ردیف‌های ناحیه بعدی به همان لیست اضافه می‌شوند (dict ها ادغام می‌شوند) و جدول قبلی از دست نمی‌رود
+    """
+    existing = target.get(key)
+    if isinstance(existing, list) and isinstance(value, list):
+        existing.extend(value)
+    elif isinstance(existing, dict) and isinstance(value, dict):
+        existing.update(value)
+    else:
+        target[key] = value
+
+
+def structure_report(region_tables, template, tables_info, metrics=None, corrected=()):
+    """
+    تبدیل جداول خام ناحیه‌ها به ساختار نهایی بر اساس template
+    ناحیه‌ها به ترتیب template پردازش می‌شوند (نه ترتیب صفحه) تا ساختار خروجی ثابت بماند
+    corrected: index ناحیه‌هایی که متنشان قبلاً اصلاح شده است
+    """
+    report = {section: {} for section in template["sections"]}
+
+    for index, table_meta in enumerate(tables_info):
+        table_data = region_tables.get(index)
+        if not table_data:
+            continue
+
+        sheet_name = table_meta["sheet_name"]
+        table = convert_region_table(table_data, metrics, correct=index not in corrected)
+        handler_name, section, key = template["sheets"].get(sheet_name, ("records", None, sheet_name))
+
+        try:
+            with timed(metrics, "structuring"):
+                value = TABLE_HANDLERS[handler_name](table, key)
+            target = report.setdefault(section, {}) if section else report
+            merge_value(target, key, value)
+        except Exception as inner_e:
+            print("Unexpected error while extracting tables")
+            if metrics is not None:
+                metrics.add_error(sheet_name, inner_e)
+
+    # اطمینان از وجود بخش‌های خالی برای ساختار نهایی
+    for section, key, default in template["defaults"]:
+        target = report.setdefault(section, {}) if section else report
+        if key not in target:
+            target[key] = copy.deepcopy(default)
+
+    if template["layout"] is None:
+        return report
+    return {name: report.get(name, {}) for name in template["layout"]}
+
+
+def build_report(pdf_file, report_type, tables_info, metrics=None, form_fields=None, page_executor=None):
+    """
+    استخراج ساختار یک گزارش بدون نوشتن فایل
+    pdf_file: مسیر فایل PDF، محتوای آن (bytes) یا یک stream (مثلاً BytesIO خروجی flatten_in_memory)
+    metrics: FileMetrics اختیاری برای ثبت زمان مراحل
+    form_fields: خروجی read_form_fields؛ در این صورت pdf_file مسیر PDF اصلی (flatten نشده) است
+    و فقط ناحیه‌هایی که فرم پوشش نمی‌دهد flatten می‌شوند
+    page_executor: thread یا process pool اختیاری برای خواندن موازی صفحه‌ها (خروجی یکسان با اجرای ترتیبی)
+    """
+    template = REPORT_TEMPLATES.get(report_type)
+    if template is None:
+        print(f"Unknown report type: {report_type}")
+        return None
+
+    # هر صفحه یک بار تحلیل می‌شود و همه ناحیه‌های آن صفحه از همان تحلیل برش می‌خورند
+    with timed(metrics, "pdf_open"):
+        pdf = pdfplumber.open(pdf_stream(pdf_file))
+    with pdf:
+        # layout های ناشناخته (مثلاً فایل در پوشه اشتباه) قبل از استخراج جداول رد می‌شوند
+        with timed(metrics, "layout_check"):
+            known_layout = layout_matches(pdf, template, tables_info)
+        if not known_layout:
+            print(f"Unknown layout for {report_type} template")
+            if metrics is not None:
+                metrics.add_error("layout", ValueError(f"not a {report_type} v{template['version']} layout"))
+            return None
+
+        if form_fields is None:
+            region_tables = read_region_tables(pdf, tables_info, metrics=metrics, page_executor=page_executor)
+            corrected = ()
+        else:
+            region_tables, corrected = read_form_tables(pdf, pdf_file, tables_info, form_fields, metrics, page_executor)
+
+    return structure_report(region_tables, template, tables_info, metrics, corrected)
+
+
+def write_report_json(report, output_folder, output_name, metrics=None):
+    """
+    ذخیره ساختار گزارش در <output_name>_tables.json و برگرداندن مسیر آن
+    """
+    if not report:
+        print("No tables extracted from PDF")
+        return None
+
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder, exist_ok=True)
+
+    json_filename = f"{output_name}_tables.json"
+    json_path = os.path.join(output_folder, json_filename)
+
+    try:
+        with timed(metrics, "json_write"):
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Complete Process for {output_name} - Saved to {json_filename}")
+        return json_path
+    except Exception as e:
+        print("Unexpected error while saving JSON file")
+        if metrics is not None:
+            metrics.add_error("json_write", e)
+    return None
+
+
+def extract_report(pdf_file, output_folder, report_type, tables_info, output_name=None, metrics=None, page_executor=None):
+    """
+    استخراج جداول یک گزارش از هر نوع (DCR, DDR, DMR, POB) و ذخیره در JSON
+    output_name: نام پایه فایل JSON؛ برای stream ها الزامی است
+    page_executor: pool اختیاری برای خواندن موازی صفحه‌های همین گزارش
+    """
+    if isinstance(pdf_file, str) and not os.path.exists(pdf_file):
+        return None
+
+    if output_name is None:
+        if not isinstance(pdf_file, str):
+            print("Output name is required for in-memory PDF")
+            return None
+        output_name = os.path.splitext(os.path.basename(pdf_file))[0]
+
+    report = build_report(pdf_file, report_type, tables_info, metrics, page_executor=page_executor)
+    if report is None:
+        return None
+    return write_report_json(report, output_folder, output_name, metrics)
+
+
+# گزارش‌هایی که ساختار خاصی ندارند: هر ناحیه به صورت records با نام sheet ذخیره می‌شود
+register_template("DDR", "tables_metadataـDDR")
+register_template("DMR", "tables_metadataـDMR")
+register_template("POB", "pob_tables_metadata")
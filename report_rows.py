@@ -0,0 +1,111 @@
+import os
+import re
+import json
+from jsonl_output import read_jsonl
+from manifest import load_manifest
+import config
+
+# ستون‌های تعداد وعده در جداول شیفت (ص/ن/ش/پ/خ) و جدول total
+MEAL_COLUMNS = {"ص": "breakfast", "ن": "lunch", "ش": "dinner", "پ": "late_dinner", "خ": "services"}
+TOTAL_MEAL_COLUMNS = {"صبحانه": "breakfast", "ناهار": "lunch", "شام": "dinner", "پس شام": "late_dinner", "خدمات": "services"}
+
+# بخش‌های گزارش DCR که لیست افراد دارند
+PERSON_SECTIONS = ["Operation", "Herasat", "Ordogahi", "employer", "Drilling"]
+
+# تاریخ Header گزارش DCR به صورت 14041002
+REPORT_DATE_PATTERN = re.compile(r"^(\d{4})(\d{2})(\d{2})")
+
+
+def report_date(report):
+    """
+    تاریخ گزارش به صورت YYYY-MM-DD از Header (تقویم گزارش) یا None
+    """
+    header = report.get("Header")
+    date = header.get("تاریخ", "") if isinstance(header, dict) else ""
+    match = REPORT_DATE_PATTERN.match(str(date))
+    if not match:
+        return None
+    year, month, day = (int(part) for part in match.groups())
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def person_rows(report):
+    """
+    ردیف‌های افراد همه بخش‌ها: (section، shift، name، position، company، وعده‌ها...)
+    ردیف‌های بدون نام (مثل ردیف مجموع) ثبت نمی‌شوند
+    """
+    for section in PERSON_SECTIONS:
+        tables = report.get(section)
+        if not isinstance(tables, dict):
+            continue
+        for shift, persons in tables.items():
+            if not isinstance(persons, list):
+                continue
+            for person in persons:
+                name = person.get("name", "")
+                if not name:
+                    continue
+                yield (
+                    section, shift, name, person.get("position", ""), person.get("company"),
+                    *(person.get(key, 0) for key in MEAL_COLUMNS),
+                )
+
+
+def meal_total_rows(report):
+    total = report.get("total")
+    if not isinstance(total, dict):
+        return
+    for category, counts in total.items():
+        if isinstance(counts, dict):
+            yield (category, *(counts.get(key, 0) for key in TOTAL_MEAL_COLUMNS))
+
+
+def json_output_sources(manifest=None):
+    """
+    نام اصلی فایل PDF هر خروجی _tables.json طبق manifest (مسیر مطلق خروجی -> نام فایل)
+    نام خروجی پسوند PDF را نگه نمی‌دارد (X.PDF و X.pdf هر دو X_flatten_tables.json می‌شوند)
+    """
+    if manifest is None:
+        manifest = load_manifest()
+    return {
+        os.path.abspath(entry["output"]): os.path.basename(pdf_file)
+        for pdf_file, entry in manifest.items()
+        if isinstance(entry, dict) and str(entry.get("output", "")).endswith("_tables.json")
+    }
+
+
+def iter_output_reports(output_dir, manifest=None):
+    """
+    خواندن خروجی‌های قبلی (فایل‌های _tables.json و JSONL) برای ثبت در SQLite
+    خروجی: (گزارش، نام فایل PDF، نوع گزارش، دستگاه)
+    نام فایل PDF خروجی‌های JSON مثل حالت JSONL نام اصلی فایل است (از manifest؛ در غیر این صورت <نام>.pdf)
+    """
+    sources = None
+    for root, _, file_names in os.walk(output_dir):
+        for file_name in sorted(file_names):
+            path = os.path.join(root, file_name)
+            if file_name.endswith((".jsonl", ".jsonl.gz")):
+                if config.METRICS_PATH and os.path.abspath(path) == os.path.abspath(config.METRICS_PATH):
+                    continue
+                for record in read_jsonl(path):
+                    if "report" in record:
+                        yield record["report"], record["source"], record["report_type"], record["rig"]
+            elif file_name.endswith("_tables.json"):
+                # OUTPUT/<پوشه نوع گزارش>/<دستگاه>/<نام>_flatten_tables.json
+                input_dir = os.path.relpath(root, output_dir)
+                report_type = config.REPORT_TYPES.get(os.path.dirname(input_dir))
+                if report_type is None:
+                    continue
+                if sources is None:
+                    sources = json_output_sources(manifest)
+                source = file_name[:-len("_tables.json")]
+                if source.endswith("_flatten"):
+                    source = source[:-len("_flatten")]
+                source = sources.get(os.path.abspath(path), f"{source}.pdf")
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        report = json.load(f)
+                except Exception:
+                    print(f"Unexpected error while loading {file_name}")
+                    continue
+                yield report, source, report_type, os.path.basename(input_dir)
@@ -0,0 +1,164 @@
+import os
+import re
+import sys
+import json
+import argparse
+import unicodedata
+from report_rows import MEAL_COLUMNS, PERSON_SECTIONS, report_date, iter_output_reports
+import config
+
+# یکسان‌سازی ی و ک عربی با فارسی
+PERSIAN_TRANSLATION = str.maketrans({"ي": "ی", "ك": "ک"})
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+ROSTER_KINDS = ("name", "position", "company")
+
+# ستون‌های ردیف فشرده افراد: شناسه‌ها و سپس تعداد وعده‌ها (ص/ن/ش/پ/خ)
+SHIFT_ROW_COLUMNS = ("name", "position") + tuple(MEAL_COLUMNS)
+EMPLOYER_ROW_COLUMNS = ("name", "position", "company") + tuple(MEAL_COLUMNS)
+
+
+def normalize_roster_text(text):
+    """
+    NFKC، ی و ک فارسی و یک فاصله بین کلمات (تا "علی  رضایی" و "علي رضايي" یک شناسه بگیرند)
+    """
+    text = unicodedata.normalize("NFKC", str(text or "")).translate(PERSIAN_TRANSLATION)
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+class RosterIndex:
+    """
+    شناسه عددی پایدار برای نام‌ها، سمت‌ها و شرکت‌های همه گزارش‌ها
+    شناسه‌ها به ترتیب اولین دیده شدن داده می‌شوند و هرگز تغییر نمی‌کنند (فایل roster فقط اضافه می‌شود)؛
+    شناسه 0 برای متن خالی است
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.ROSTER_PATH
+        self.values = {kind: [""] for kind in ROSTER_KINDS}
+        self.ids = {kind: {"": 0} for kind in ROSTER_KINDS}
+        self.changed = False
+
+    @classmethod
+    def load(cls, path=None):
+        roster = cls(path)
+        if not os.path.exists(roster.path):
+            return roster
+        try:
+            with open(roster.path, encoding="utf-8") as f:
+                data = json.load(f)
+            for kind in ROSTER_KINDS:
+                values = data.get(kind) or [""]
+                roster.values[kind] = [sys.intern(value) for value in values]
+                roster.ids[kind] = {value: index for index, value in enumerate(roster.values[kind])}
+        except Exception:
+            print("Unexpected error while loading roster, starting a new one")
+            roster = cls(path)
+        return roster
+
+    def save(self):
+        """
+        ذخیره به صورت atomic (مثل manifest)
+        """
+        if not self.changed:
+            return
+        roster_dir = os.path.dirname(self.path)
+        if roster_dir:
+            os.makedirs(roster_dir, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.values, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+            self.changed = False
+        except Exception:
+            print("Unexpected error while saving roster")
+
+    def intern(self, kind, text):
+        value = normalize_roster_text(text)
+        ids = self.ids[kind]
+        roster_id = ids.get(value)
+        if roster_id is None:
+            roster_id = len(self.values[kind])
+            value = sys.intern(value)
+            ids[value] = roster_id
+            self.values[kind].append(value)
+            self.changed = True
+        return roster_id
+
+    def value(self, kind, roster_id):
+        return self.values[kind][roster_id]
+
+    def __len__(self):
+        return sum(len(values) - 1 for values in self.values.values())
+
+    def compact_persons(self, persons):
+        """
+        تبدیل لیست افراد یک جدول گزارش (مثل report["Operation"]["ShiftA"]) به ردیف‌های فشرده:
+        tuple شناسه‌ها و تعداد وعده‌ها به ترتیب SHIFT_ROW_COLUMNS یا (اگر شرکت داشته باشد) EMPLOYER_ROW_COLUMNS
+        ورودی‌هایی که فرد نیستند (مثل {"TotalShiftA": {...}}) بدون تغییر می‌مانند
+        """
+        rows = []
+        for person in persons:
+            if not isinstance(person, dict) or "name" not in person:
+                rows.append(person)
+                continue
+            row = (self.intern("name", person["name"]), self.intern("position", person.get("position", "")))
+            if "company" in person:
+                row += (self.intern("company", person["company"]),)
+            rows.append(row + tuple(person.get(key, 0) for key in MEAL_COLUMNS))
+        return rows
+
+    def expand_row(self, row):
+        """
+        برگرداندن یک ردیف فشرده به dict (مثل خروجی اصلی)
+        """
+        columns = EMPLOYER_ROW_COLUMNS if len(row) == len(EMPLOYER_ROW_COLUMNS) else SHIFT_ROW_COLUMNS
+        person = dict(zip(columns, row))
+        for kind in ROSTER_KINDS:
+            if kind in person:
+                person[kind] = self.value(kind, person[kind])
+        return person
+
+    def compact_report(self, report):
+        """
+        نسخه فشرده یک گزارش: لیست افراد همه بخش‌ها به ردیف‌های شناسه‌دار تبدیل می‌شوند و بقیه گزارش بدون تغییر است
+        """
+        compact = dict(report)
+        for section in PERSON_SECTIONS:
+            tables = report.get(section)
+            if not isinstance(tables, dict):
+                continue
+            compact[section] = {
+                key: self.compact_persons(persons) if isinstance(persons, list) else persons
+                for key, persons in tables.items()
+            }
+        return compact
+
+
+def load_compact_reports(output_dir=None, roster=None):
+    """
+    خواندن همه خروجی‌ها به صورت فشرده (برای نگه داشتن گزارش‌های یک سال در حافظه)
+    خروجی: (roster، لیست (گزارش فشرده، نام فایل PDF، نوع گزارش، دستگاه، تاریخ))؛ roster جدید ذخیره می‌شود
+    """
+    if output_dir is None:
+        output_dir = config.MAIN_OUTPUT_DIR
+    if roster is None:
+        roster = RosterIndex.load()
+    reports = [
+        (roster.compact_report(report), source, report_type, rig, report_date(report))
+        for report, source, report_type, rig in iter_output_reports(output_dir)
+    ]
+    roster.save()
+    return roster, reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign stable IDs to the names, positions and companies of extracted reports")
+    parser.add_argument("output_dir", nargs="?", default=config.MAIN_OUTPUT_DIR)
+    parser.add_argument("--roster", default=config.ROSTER_PATH)
+    args = parser.parse_args()
+
+    roster, reports = load_compact_reports(args.output_dir, RosterIndex.load(args.roster))
+    counts = ", ".join(f"{len(roster.values[kind]) - 1} {kind}s" for kind in ROSTER_KINDS)
+    print(f"Indexed {len(reports)} reports: {counts} in {roster.path}")
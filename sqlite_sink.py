@@ -0,0 +1,167 @@
+import os
+import json
+import sqlite3
+import argparse
+from report_rows import report_date, person_rows, meal_total_rows, iter_output_reports
+import config
+
+# تعداد name ها در هر SELECT ... IN (محدودیت تعداد پارامتر SQLite)
+SELECT_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    report_type TEXT NOT NULL,
+    rig TEXT NOT NULL,
+    report_date TEXT,
+    header TEXT,
+    UNIQUE (report_type, rig, source)
+);
+CREATE TABLE IF NOT EXISTS persons (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS shift_counts (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    person_id INTEGER NOT NULL REFERENCES persons(id),
+    section TEXT NOT NULL,
+    shift TEXT NOT NULL,
+    position TEXT,
+    company TEXT,
+    breakfast INTEGER,
+    lunch INTEGER,
+    dinner INTEGER,
+    late_dinner INTEGER,
+    services INTEGER
+);
+CREATE TABLE IF NOT EXISTS meal_totals (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    breakfast INTEGER,
+    lunch INTEGER,
+    dinner INTEGER,
+    late_dinner INTEGER,
+    services INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_reports_date ON reports (report_date);
+CREATE INDEX IF NOT EXISTS idx_reports_rig_date ON reports (rig, report_date);
+CREATE INDEX IF NOT EXISTS idx_shift_counts_person ON shift_counts (person_id);
+CREATE INDEX IF NOT EXISTS idx_shift_counts_report ON shift_counts (report_id);
+CREATE INDEX IF NOT EXISTS idx_meal_totals_report ON meal_totals (report_id);
+"""
+
+
+class SqliteSink:
+    """
+    ذخیره گزارش‌ها در SQLite به صورت نرمال شده (reports، persons، shift_counts، meal_totals)
+    گزارش‌ها بافر می‌شوند و هر batch_size گزارش در یک transaction با executemany ثبت می‌شوند
+    ثبت دوباره یک فایل (همان نوع، دستگاه و نام) ردیف‌های قبلی آن را جایگزین می‌کند
+    """
+
+    def __init__(self, db_path=None, batch_size=None):
+        self.db_path = db_path or config.SQLITE_PATH
+        self.batch_size = batch_size or config.SQLITE_BATCH_SIZE
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+        self.person_ids = {}
+        # گزارش‌های بافر شده: (report_type, rig, source) -> گزارش (آخرین نسخه هر فایل)
+        self.pending = {}
+
+    def write(self, report, pdf_file, report_type, rig):
+        """
+        افزودن یک گزارش به بافر و برگرداندن مسیر پایگاه داده
+        گزارش فقط بعد از flush موفق ثبت شده است (flush در صورت خطا exception می‌دهد)
+        """
+        self.pending[(report_type, rig, os.path.basename(pdf_file))] = report
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return self.db_path
+
+    def _load_person_ids(self, names):
+        names = [name for name in names if name not in self.person_ids]
+        if not names:
+            return
+        self.connection.executemany("INSERT OR IGNORE INTO persons (name) VALUES (?)", ((name,) for name in names))
+        for start in range(0, len(names), SELECT_CHUNK_SIZE):
+            chunk = names[start:start + SELECT_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            for person_id, name in self.connection.execute(f"SELECT id, name FROM persons WHERE name IN ({placeholders})", chunk):
+                self.person_ids[name] = person_id
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        try:
+            with self.connection:
+                shift_rows = []
+                total_rows = []
+                for (report_type, rig, source), report in self.pending.items():
+                    self.connection.execute(
+                        "DELETE FROM reports WHERE report_type = ? AND rig = ? AND source = ?",
+                        (report_type, rig, source),
+                    )
+                    header = report.get("Header")
+                    cursor = self.connection.execute(
+                        "INSERT INTO reports (source, report_type, rig, report_date, header) VALUES (?, ?, ?, ?, ?)",
+                        (source, report_type, rig, report_date(report),
+                         json.dumps(header, ensure_ascii=False) if header is not None else None),
+                    )
+                    report_id = cursor.lastrowid
+                    shift_rows.extend((report_id, *row) for row in person_rows(report))
+                    total_rows.extend((report_id, *row) for row in meal_total_rows(report))
+
+                self._load_person_ids(list(dict.fromkeys(row[3] for row in shift_rows)))
+                self.connection.executemany(
+                    "INSERT INTO shift_counts (report_id, person_id, section, shift, position, company,"
+                    " breakfast, lunch, dinner, late_dinner, services) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((row[0], self.person_ids[row[3]], row[1], row[2], *row[4:]) for row in shift_rows),
+                )
+                self.connection.executemany(
+                    "INSERT INTO meal_totals (report_id, category, breakfast, lunch, dinner, late_dinner, services)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    total_rows,
+                )
+        except Exception:
+            # transaction کامل rollback شده است؛ person_ids ممکن است شامل شناسه‌های rollback شده باشد
+            # خطا به فراخواننده برگردانده می‌شود تا گزارش‌های این batch در manifest ثبت نشوند
+            self.person_ids.clear()
+            self.pending.clear()
+            print("Unexpected error while writing reports to SQLite")
+            raise
+        self.pending.clear()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load extracted reports (JSON and JSONL outputs) into SQLite")
+    parser.add_argument("output_dir", nargs="?", default=config.MAIN_OUTPUT_DIR)
+    parser.add_argument("--db", default=config.SQLITE_PATH)
+    args = parser.parse_args()
+
+    count = 0
+    with SqliteSink(args.db) as sink:
+        for report, source, report_type, rig in iter_output_reports(args.output_dir):
+            sink.write(report, source, report_type, rig)
+            count += 1
+    print(f"Loaded {count} reports into {args.db}")
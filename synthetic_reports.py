@@ -0,0 +1,288 @@
+import os
+import re
+import random
+import argparse
+import arabic_reshaper
+from bidi.algorithm import get_display
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from extract_tables_dcr import load_coordinates_points
+from lazy_import import lazy_import
+import config
+
+pikepdf = lazy_import("pikepdf")
+
+# اندازه صفحه A4 (مختصات coordinates_points.json برای این اندازه تعریف شده‌اند)
+PAGE_SIZE = (595, 842)
+
+# فونت TTF با حروف فارسی؛ با --font قابل تغییر است
+DEFAULT_FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+FONT_NAME = "SyntheticFont"
+FONT_SIZE = 6
+
+FIRST_NAMES = ["علی", "محمد", "رضا", "حسین", "مهدی", "احمد", "اصلان", "فرشید", "بهروز", "پوریا", "خلیل", "حافظ", "بنیامین", "سعید", "امیر"]
+LAST_NAMES = ["حصاری", "ویسی", "ذبیح", "عطایی", "عدالتی", "فتاحی", "خرمی", "جلیلی", "نیاززاده", "بهادری", "رشیدی", "کریمی", "احمدی", "موسوی"]
+POSITIONS = ["سرحفار", "مسئول اردوگاه", "حفار", "کمک حفار", "گلشناس ارشد", "انباردار", "دکلبان", "کارگر سکو", "کارگر شستشو", "آشپز", "نگهبان", "راننده"]
+COMPANIES = ["شرکت ملی حفاری", "پیمانکار خدمات", "شرکت نفت", "خدمات فنی"]
+WEEK_DAYS = ["شنبه", "یکشنبه", "دوشنبه", "سه شنبه", "چهارشنبه", "پنجشنبه", "جمعه"]
+MEALS = ["صبحانه", "ناهار", "شام", "پس شام", "خدمات"]
+COUNT_HEADERS = ["خ", "پ", "ش", "ن", "ص"]
+
+
+def visual_text(text):
+    """
+    متن فارسی به ترتیب نمایشی (مثل PDF های واقعی که pdfplumber از آنها می‌خواند)
+    """
+    return get_display(arabic_reshaper.reshape(text))
+
+
+def random_person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def random_count(rng):
+    return rng.choice(["1", "1", "1", "1", ""])
+
+
+class Field:
+    """
+    سلولی که مقدار آن به صورت فیلد AcroForm (و نه متن ثابت صفحه) نوشته می‌شود
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class TextField(Field):
+    """
+    سلول متنی فارسی (نام، سمت، شرکت)؛ فقط با fields="text" به صورت فیلد فرم نوشته می‌شود
+    """
+    __slots__ = ()
+
+
+def shift_rows(rng, shift_label, capacity):
+    """
+    جدول شیفت: عنوان، هدر، افراد (تعداد تصادفی) و ردیف مجموع
+    ترتیب ستون‌ها از چپ به راست: خ، پ، ش، ن، ص، سمت، نام
+    """
+    rows = [[shift_label] + [None] * 6, COUNT_HEADERS + ["سمت", "نام"]]
+    persons = rng.randint(0, capacity)
+    totals = [0] * 5
+    for _ in range(persons):
+        counts = [random_count(rng) for _ in range(5)]
+        for i, value in enumerate(counts):
+            totals[i] += 1 if value else 0
+        rows.append([Field(value) for value in counts] + [TextField(rng.choice(POSITIONS)), TextField(random_person(rng))])
+    for _ in range(capacity - persons):
+        rows.append([Field("") for _ in range(5)] + ["", ""])
+    rows.append([Field(str(value)) for value in totals] + ["مجموع آمار شیفت", ""])
+    return rows
+
+
+def employer_rows(rng, capacity):
+    """
+    جدول employer/drilling: هدر و افراد
+    ترتیب ستون‌ها از چپ به راست: خ، پ، ش، ن، ص، شرکت، سمت، نام
+    """
+    rows = [COUNT_HEADERS + ["شرکت", "سمت", "نام"]]
+    persons = rng.randint(0, capacity)
+    for index in range(capacity):
+        if index < persons:
+            counts = [Field(random_count(rng)) for _ in range(5)]
+            rows.append(counts + [TextField(rng.choice(COMPANIES)), TextField(rng.choice(POSITIONS)), TextField(random_person(rng))])
+        else:
+            rows.append([Field("") for _ in range(5)] + ["", "", ""])
+    return rows
+
+
+def totals_rows(rng, label):
+    return [
+        [label] + [None] * 5,
+        COUNT_HEADERS + [""],
+        [Field(str(rng.randint(0, 40))) for _ in range(5)] + ["جمع"],
+    ]
+
+
+def header_rows(rng, rig):
+    return [[
+        "1404/", f"{rng.randint(1, 12):02d}/", f"{rng.randint(1, 30):02d}", "",
+        rng.choice(WEEK_DAYS), "روز هفته:",
+        f"مسوول اردوگاه: {random_person(rng)}",
+        random_person(rng), "رییس دستگاه:",
+        rig, "دستگاه حفاری:",
+    ]]
+
+
+def foods_rows(rng):
+    return [
+        ["خوراک مرغ", "صبحانه"],
+        ["چلو کباب", "ناهار"],
+        ["خورش قیمه", "شام"],
+        ["میوه", "پس شام"],
+        ["توضیحات", "غذا به موقع سرو شد"],
+    ]
+
+
+def total_rows(rng):
+    rows = [[""] + MEALS]
+    for key in ["عملیات", "حراست", "اردوگاه", "کارفرما", "حفاری", "مهمان", "جمع کل"]:
+        rows.append([key] + [Field(str(rng.randint(0, 60))) for _ in MEALS])
+    return rows
+
+
+def generic_rows(rng, columns, capacity):
+    """
+    جدول عمومی برای template های بدون ساختار خاص (مثل POB): هدر و ردیف‌های نام/سمت/عدد
+    """
+    rows = [[f"ستون {i + 1}" for i in range(columns)]]
+    for _ in range(rng.randint(1, capacity)):
+        row = [TextField(random_person(rng)), TextField(rng.choice(POSITIONS))]
+        row += [Field(str(rng.randint(0, 9))) for _ in range(columns - 2)]
+        rows.append(row[:columns])
+    return rows
+
+
+def region_rows(rng, sheet_name, height, rig):
+    """
+    ساخت محتوای ناحیه بر اساس نام sheet در template
+    تعداد ردیف‌ها از ارتفاع ناحیه به دست می‌آید (حدوداً 13 واحد برای هر ردیف)
+    """
+    capacity = max(1, int(height // 13))
+    if sheet_name == "Header":
+        return header_rows(rng, rig)
+    shift = re.search(r"Shift([A-D])", sheet_name)
+    if shift:
+        return shift_rows(rng, f"شیفت {shift.group(1)}", max(1, capacity - 3))
+    if sheet_name.startswith("ShiftTotal") or sheet_name in ("EmployerTotal", "DrillingTotal"):
+        return totals_rows(rng, "مجموع")
+    if sheet_name in ("EmployerPage3", "DrillingPage4"):
+        return employer_rows(rng, max(1, capacity - 1))
+    if sheet_name == "EmployerSupervisor":
+        return [["سمت", "نام"], [TextField(rng.choice(POSITIONS)), TextField(random_person(rng))]]
+    if sheet_name == "Foods":
+        return foods_rows(rng)
+    if sheet_name == "Total":
+        return total_rows(rng)
+    return generic_rows(rng, 5, max(1, capacity - 1))
+
+
+def draw_region(pdf_canvas, bbox, rows, field_prefix, page_height, fields="counts", text_values=None):
+    """
+    رسم جدول داخل bbox (x0, top, x1, bottom): خطوط جدول، متن ثابت و فیلدهای فرم
+    ردیف‌هایی که بعد از سلول اول None دارند به صورت سلول ادغام شده رسم می‌شوند
+    fields: "counts" فقط اعداد به صورت فیلد، "text" نام/سمت/شرکت هم به صورت فیلد،
+    "none" همه سلول‌ها به صورت متن ثابت (مثل یک گزارش flatten شده، بدون فرم)
+    reportlab مقدار فارسی فیلد را نمی‌نویسد: فیلدهای متنی خالی ساخته می‌شوند و مقدارشان در text_values
+    (نام فیلد به مقدار) برای set_field_values جمع می‌شود
+    """
+    inset = 3
+    x0, top, x1, bottom = bbox[0] + inset, bbox[1] + inset, bbox[2] - inset, bbox[3] - inset
+    columns = max(len(row) for row in rows)
+    col_width = (x1 - x0) / columns
+    row_height = (bottom - top) / len(rows)
+
+    for row_index, row in enumerate(rows):
+        row_top = top + row_index * row_height
+        y = page_height - row_top - row_height
+        merged = len(row) > 1 and all(cell is None for cell in row[1:])
+        spans = [(0, columns)] if merged else [(col, 1) for col in range(len(row))]
+
+        for col, span in spans:
+            cell = row[col]
+            cell_x = x0 + col * col_width
+            cell_w = col_width * span
+            pdf_canvas.rect(cell_x, y, cell_w, row_height, stroke=1, fill=0)
+            as_field = isinstance(cell, Field) and (fields == "text" or (fields == "counts" and not isinstance(cell, TextField)))
+            if as_field and isinstance(cell, TextField):
+                text_values[f"{field_prefix}_{row_index}_{col}"] = cell.value
+                cell = Field("")
+            if isinstance(cell, Field):
+                cell = cell.value
+            if as_field:
+                pdf_canvas.acroForm.textfield(
+                    name=f"{field_prefix}_{row_index}_{col}", value=cell,
+                    x=cell_x, y=y, width=cell_w, height=row_height,
+                    borderWidth=0, fontSize=FONT_SIZE, fieldFlags="", forceBorder=False,
+                )
+            elif cell:
+                text = visual_text(cell)
+                # کوچک کردن فونت تا متن از سلول بیرون نزند (در غیر این صورت در سلول کناری خوانده می‌شود)
+                text_width = pdfmetrics.stringWidth(text, FONT_NAME, 1)
+                font_size = min(FONT_SIZE, (cell_w - 3) / text_width) if text_width else FONT_SIZE
+                pdf_canvas.setFont(FONT_NAME, font_size)
+                pdf_canvas.drawRightString(cell_x + cell_w - 1.5, y + row_height * 0.3, text)
+
+
+def generate_report(output_path, tables_info, rig="O3", seed=None, font_path=DEFAULT_FONT_PATH, fields="counts"):
+    """
+    ساخت یک PDF فرم‌دار مصنوعی از روی ناحیه‌های template
+    seed یکسان همیشه همان PDF را می‌سازد (برای هر مقدار fields با همان محتوا؛ draw_region)
+    با fields="text" فیلدهای نام/سمت/شرکت appearance ندارند و فقط برای خواندن مستقیم فرم (form_fields.py) مناسب‌اند
+    """
+    rng = random.Random(seed)
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, font_path))
+
+    text_values = {}
+    pdf_canvas = canvas.Canvas(output_path, pagesize=PAGE_SIZE)
+    page_count = max(table_meta["page_number"] for table_meta in tables_info)
+    for page_num in range(1, page_count + 1):
+        pdf_canvas.setLineWidth(0.5)
+        for index, table_meta in enumerate(tables_info):
+            if table_meta["page_number"] != page_num:
+                continue
+            coords = table_meta["coordinates"]
+            bbox = (coords[1], coords[0], coords[3], coords[2])
+            rows = region_rows(rng, table_meta["sheet_name"], bbox[3] - bbox[1], rig)
+            draw_region(pdf_canvas, bbox, rows, f"r{index}", PAGE_SIZE[1], fields, text_values)
+        pdf_canvas.showPage()
+    pdf_canvas.save()
+    if text_values:
+        set_field_values(output_path, text_values)
+    return output_path
+
+
+def set_field_values(pdf_file, values):
+    """
+    نوشتن مقدار (/V) فیلدهای فرم با pikepdf؛ values: نام فیلد به مقدار
+    """
+    with pikepdf.Pdf.open(pdf_file, allow_overwriting_input=True) as pdf:
+        for field in pdf.Root.AcroForm.Fields:
+            name = str(field.get("/T", ""))
+            if name in values:
+                field.V = pikepdf.String(values[name])
+        pdf.save(pdf_file)
+
+
+def generate_reports(output_dir, metadata_key, count, rig="O3", seed=0, font_path=DEFAULT_FONT_PATH):
+    """
+    ساخت count فایل مصنوعی برای یک template در output_dir
+    """
+    coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+    tables_info = coordinates_points.get(metadata_key) if coordinates_points else None
+    if not tables_info:
+        print(f"Template not found: {metadata_key}")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for index in range(count):
+        output_path = os.path.join(output_dir, f"synthetic_{rig}_{index:04d}.pdf")
+        paths.append(generate_report(output_path, tables_info, rig, seed + index, font_path))
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic fillable report PDFs from coordinates_points.json")
+    parser.add_argument("output_dir")
+    parser.add_argument("--template", default="tables_metadataـDCR", help="metadata key in coordinates_points.json")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--rig", default="O3")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", default=DEFAULT_FONT_PATH, help="TTF font with Persian glyphs")
+    args = parser.parse_args()
+
+    paths = generate_reports(args.output_dir, args.template, args.count, args.rig, args.seed, args.font)
+    print(f"Generated {len(paths)} files in {args.output_dir}")
@@ -0,0 +1,48 @@
+class TableRows:
+    """
+    جدول سبک به جای DataFrame برای خروجی extract_table
+    columns: شماره ستون‌های اصلی که بعد از حذف ستون‌های خالی باقی مانده‌اند
+    rows: لیست ردیف‌ها (tuple) که سلول‌های None آنها با '' جایگزین شده است
+    """
+    __slots__ = ("columns", "rows")
+
+    def __init__(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+
+    @property
+    def empty(self):
+        return not self.rows or not self.columns
+
+    def __len__(self):
+        return len(self.rows)
+
+    def records(self):
+        """
+        معادل df.to_dict('records'): هر ردیف یک dict از شماره ستون اصلی به مقدار
+        """
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+
+def build_table_rows(table_data):
+    """
+    ساخت TableRows از خروجی extract_table با همان قواعد قبلی:
+    1. حذف ردیف‌هایی که همه سلول‌هایشان None است
+    2. حذف ستون‌هایی که در ردیف‌های باقی‌مانده همه None هستند (شماره ستون‌ها حفظ می‌شود)
+    3. جایگزینی None با ''
+    """
+    rows = [row for row in table_data if any(cell is not None for cell in row)]
+    if not rows:
+        return TableRows((), [])
+
+    width = max(len(row) for row in rows)
+    columns = tuple(
+        col for col in range(width)
+        if any(col < len(row) and row[col] is not None for row in rows)
+    )
+    cleaned_rows = [
+        tuple('' if col >= len(row) or row[col] is None else row[col] for col in columns)
+        for row in rows
+    ]
+    return TableRows(columns, cleaned_rows)
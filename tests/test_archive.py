@@ -0,0 +1,74 @@
+import os
+import errno
+import shutil
+import pytest
+import archive
+from archive import archive_input, move_file
+
+
+def failing(error_number):
+    def fail(*args, **kwargs):
+        raise OSError(error_number, os.strerror(error_number))
+    return fail
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "DCR_TEMP" / "O3" / "report.pdf"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"%PDF-1.4 report")
+    os.utime(path, (1000000000, 1000000000))
+    return str(path)
+
+
+def moved(source, destination):
+    assert not os.path.exists(source)
+    with open(destination, "rb") as f:
+        assert f.read() == b"%PDF-1.4 report"
+    assert not os.path.exists(f"{destination}.part")
+
+
+def test_same_device_uses_hardlink(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "rename", failing(errno.EXDEV))
+    destination = str(tmp_path / "backup" / "report.pdf")
+    assert move_file(source, destination) == "link"
+    moved(source, destination)
+
+
+def test_rename_without_hardlink_support(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "link", failing(errno.EPERM))
+    destination = str(tmp_path / "backup" / "report.pdf")
+    assert move_file(source, destination) == "rename"
+    moved(source, destination)
+
+
+@pytest.mark.parametrize("link_error", [errno.EXDEV, errno.EPERM])
+def test_cross_device_copy(source, tmp_path, monkeypatch, link_error):
+    monkeypatch.setattr(os, "link", failing(link_error))
+    monkeypatch.setattr(os, "rename", failing(errno.EXDEV))
+    destination = str(tmp_path / "backup" / "report.pdf")
+    assert move_file(source, destination) == "copy"
+    moved(source, destination)
+    assert os.path.getmtime(destination) == 1000000000
+
+
+def test_failed_copy_leaves_no_partial_file(source, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "link", failing(errno.EXDEV))
+
+    def copy_until_disk_full(src, dst):
+        with open(dst, "wb") as f:
+            f.write(b"%PDF")
+        raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+
+    monkeypatch.setattr(shutil, "copyfile", copy_until_disk_full)
+    destination = str(tmp_path / "backup" / "report.pdf")
+    with pytest.raises(OSError):
+        move_file(source, destination)
+    assert os.listdir(os.path.dirname(destination)) == []
+    assert os.path.exists(source)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(archive.config, "MAIN_BACKUP_DIR", str(tmp_path / "backup"))
+    assert archive_input(os.path.join("DCR_TEMP", "O3"), source, str(tmp_path / "OUTPUT"), day="1404-10-02") is None
+    assert os.path.exists(source)
+    assert os.listdir(tmp_path / "backup" / "1404-10-02" / "DCR_TEMP" / "O3") == []
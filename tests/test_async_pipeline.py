@@ -0,0 +1,32 @@
+import os
+import asyncio
+import pytest
+import config
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("reportlab")
+from async_pipeline import run_pipeline
+from extract_tables_dcr import load_coordinates_points
+from manifest import template_hash
+from synthetic_reports import generate_report
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+
+
+def test_read_failure_is_counted_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_PATH", None)
+    tables_info = load_coordinates_points(COORDINATES_POINTS_PATH)["tables_metadataـDCR"]
+    pdf_file = str(tmp_path / "DCR_TEMP" / "O3" / "good.pdf")
+    os.makedirs(os.path.dirname(pdf_file))
+    generate_report(pdf_file, tables_info, seed=4)
+    jobs = [
+        {"input_dir": "DCR_TEMP/O3", "pdf_file": path, "output_folder": str(tmp_path / "OUTPUT"),
+         "report_type": "DCR", "tables_info": tables_info, "tables_hash": template_hash(tables_info)}
+        for path in (str(tmp_path / "DCR_TEMP" / "O3" / "missing.pdf"), pdf_file)
+    ]
+
+    manifest = {}
+    assert asyncio.run(run_pipeline(jobs, manifest, 1, "json")) == (1, 1, 0)
+    assert list(manifest) == [pdf_file]
+    # اجرای دوباره: فایل سالم بدون تغییر است و فایل ناموجود دوباره ناموفق
+    assert asyncio.run(run_pipeline(jobs, manifest, 1, "json")) == (0, 1, 1)
@@ -0,0 +1,84 @@
+import os
+import time
+from concurrent.futures import Future
+import pytest
+import config
+import batch_extract
+from batch_extract import run_batch
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+# مدت پردازش ساختگی هر فایل (ثانیه)
+DURATIONS = {"a.pdf": 0.0, "b.pdf": 0.05, "c.pdf": 0.0, "d.pdf": 0.03}
+
+
+class InlinePool:
+    """
+    WorkerPool ترتیبی در همین پردازش
+    """
+
+    def __init__(self, workers):
+        pass
+
+    def run(self, fn, jobs):
+        for tag, args in jobs:
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as error:
+                future.set_exception(error)
+            yield tag, future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "COORDINATES_POINTS_PATH", COORDINATES_POINTS_PATH)
+    monkeypatch.setattr(config, "MAIN_OUTPUT_DIR", str(tmp_path / "OUTPUT"))
+    monkeypatch.setattr(config, "MANIFEST_PATH", str(tmp_path / "OUTPUT" / "manifest.json"))
+    monkeypatch.setattr(config, "METRICS_PATH", None)
+    monkeypatch.setattr(batch_extract, "WorkerPool", InlinePool)
+    input_dir = os.path.join(config.FOLDER_DCR, "O3")
+    os.makedirs(input_dir)
+    for name in DURATIONS:
+        with open(os.path.join(input_dir, name), "wb") as f:
+            f.write(name.encode())
+    return input_dir
+
+
+def test_only_slowest_files_are_profiled(workspace, monkeypatch):
+    calls = []
+
+    def fake_process_pdf(pdf_file, output_folder, report_type, tables_info, profile=False, output_mode=None):
+        calls.append((os.path.basename(pdf_file), output_folder, profile))
+        if not profile:
+            time.sleep(DURATIONS[os.path.basename(pdf_file)])
+        os.makedirs(output_folder, exist_ok=True)
+        json_path = os.path.join(output_folder, f"{os.path.basename(pdf_file)}_tables.json")
+        with open(json_path, "w") as f:
+            f.write("{}")
+        return json_path
+
+    monkeypatch.setattr(batch_extract, "process_pdf", fake_process_pdf)
+    monkeypatch.setattr(batch_extract, "prune_profiles", lambda keep: None)
+    run_batch([workspace], workers=1, profile_slowest=2, output_mode="json")
+
+    first_pass = [call for call in calls if not call[2]]
+    profiled = [call for call in calls if call[2]]
+    assert sorted(call[0] for call in first_pass) == sorted(DURATIONS)
+    assert [call[0] for call in profiled] == ["b.pdf", "d.pdf"]
+    # اجرای profile خروجی‌های اصلی را تغییر نمی‌دهد
+    assert all(call[1] != batch_extract.get_output_folder(workspace) for call in profiled)
+    assert not any(os.path.exists(call[1]) for call in profiled)
+
+
+def test_profile_disabled_runs_each_file_once(workspace, monkeypatch):
+    calls = []
+    monkeypatch.setattr(batch_extract, "process_pdf", lambda *args: calls.append(args[4]) or None)
+    run_batch([workspace], workers=1, profile_slowest=0, output_mode="json")
+    assert calls == [False] * len(DURATIONS)
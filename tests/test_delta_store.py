@@ -0,0 +1,64 @@
+import copy
+import json
+import random
+from delta_store import DeltaStore, json_diff, apply_diff
+
+
+def dcr_report(day, persons):
+    return {
+        "Header": {"تاریخ": f"140410{day:02d}"},
+        "Operation": {"ShiftA": [dict(person) for person in persons]},
+        "Notes": [{0: "records", 1: str(day)}],
+    }
+
+
+def as_json(report):
+    return json.loads(json.dumps(report, ensure_ascii=False))
+
+
+def test_json_diff_round_trip():
+    old = {"a": [1, 2, {"x": 1}], "b": {"c": 1, "d": 2}, "e": "s"}
+    new = {"b": {"d": 3, "c": 1}, "a": [0, 1, {"x": 2}, 5], "f": None}
+    assert apply_diff(old, json_diff(old, new)) == new
+    assert list(apply_diff(old, json_diff(old, new))) == list(new)
+    assert json_diff(new, copy.deepcopy(new)) is None
+    # bool و int یکسان نیستند
+    assert json_diff({"a": 1}, {"a": True}) == {"dict": {"a": {"value": True}}}
+
+
+def test_non_dcr_report_is_stored(tmp_path):
+    report = {"Operations": [{0: "حفاری", 1: "12"}], "Header": [{0: "14041002"}]}
+    store = DeltaStore(str(tmp_path))
+    assert store.write(report, "DDR_TEMP/R1/a.pdf", "DDR", "R1") is not None
+    assert list(DeltaStore(str(tmp_path)).iter_reports()) == [(as_json(report), "a.pdf", "DDR", "R1")]
+
+
+def test_out_of_order_writes_and_rewrites_reconstruct(tmp_path):
+    rng = random.Random(1)
+    persons = [{"name": f"p{index}", "position": "x", "ص": 1, "ن": 1} for index in range(10)]
+    reports = []
+    for day in range(1, 21):
+        persons = copy.deepcopy(persons)
+        rng.choice(persons)["ن"] = rng.randint(0, 3)
+        if day % 4 == 0:
+            persons.insert(2, {"name": f"new{day}", "position": "y", "ص": 0, "ن": 1})
+        reports.append(dcr_report(day, persons))
+
+    store = DeltaStore(str(tmp_path), snapshot_interval=5)
+    order = list(range(len(reports)))
+    rng.shuffle(order)
+    for index in order:
+        assert store.write(reports[index], f"r{index}.pdf", "DCR", "O3") is not None
+    # بازنویسی یک روز که پایه روزهای بعد است
+    reports[3]["Operation"]["ShiftA"].pop()
+    store.write(reports[3], "r3.pdf", "DCR", "O3")
+    store.close()
+
+    entries = [json.loads(path.read_text(encoding="utf-8")) for path in (tmp_path / "DCR" / "O3").iterdir()]
+    assert any(entry["base"] is not None for entry in entries)
+    assert max(entry["depth"] for entry in entries) < 5
+
+    fresh = DeltaStore(str(tmp_path))
+    stored = {report["Header"]["تاریخ"]: report for report, _, _, _ in fresh.iter_reports()}
+    assert stored == {report["Header"]["تاریخ"]: as_json(report) for report in reports}
+    assert fresh.read("DCR", "O3", "1404-10-04") == as_json(reports[3])
@@ -0,0 +1,59 @@
+import os
+import pytest
+import config
+
+pdfplumber = pytest.importorskip("pdfplumber")
+pytest.importorskip("reportlab")
+from extract_tables_dcr import load_coordinates_points
+from fingerprint import classify_pdf
+from report_engine import REPORT_TEMPLATES, layout_matches
+from synthetic_reports import generate_report
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+
+
+@pytest.fixture(scope="module")
+def coordinates_points():
+    return load_coordinates_points(COORDINATES_POINTS_PATH)
+
+
+@pytest.fixture(autouse=True)
+def coordinates_path(monkeypatch):
+    monkeypatch.setattr(config, "COORDINATES_POINTS_PATH", COORDINATES_POINTS_PATH)
+
+
+@pytest.fixture(scope="module")
+def reports(tmp_path_factory, coordinates_points):
+    output_dir = tmp_path_factory.mktemp("reports")
+    paths = {}
+    for report_type in ("DCR", "DDR"):
+        paths[report_type] = str(output_dir / f"{report_type}.pdf")
+        generate_report(paths[report_type], coordinates_points[REPORT_TEMPLATES[report_type]["metadata_key"]], seed=1)
+    return paths
+
+
+def matches(pdf_file, report_type, coordinates_points):
+    template = REPORT_TEMPLATES[report_type]
+    with pdfplumber.open(pdf_file) as pdf:
+        return layout_matches(pdf, template, coordinates_points[template["metadata_key"]])
+
+
+def test_dcr_layout_is_classified(reports, coordinates_points):
+    assert matches(reports["DCR"], "DCR", coordinates_points)
+    assert [match[0] for match in classify_pdf(reports["DCR"], coordinates_points)] == ["DCR"]
+
+
+@pytest.mark.parametrize("report_type", ["DDR", "DMR", "POB"])
+def test_dcr_in_template_without_anchors_is_rejected(reports, coordinates_points, report_type):
+    assert not matches(reports["DCR"], report_type, coordinates_points)
+
+
+def test_template_without_anchors_accepts_own_layout(reports, coordinates_points):
+    assert matches(reports["DDR"], "DDR", coordinates_points)
+    # DDR دو صفحه دارد و POB پنج صفحه
+    assert not matches(reports["DDR"], "POB", coordinates_points)
+    assert not matches(reports["DDR"], "DCR", coordinates_points)
+
+
+def test_template_without_anchors_is_never_classified(reports, coordinates_points):
+    assert classify_pdf(reports["DDR"], coordinates_points) == []
@@ -0,0 +1,44 @@
+import pytest
+
+pikepdf = pytest.importorskip("pikepdf")
+pytest.importorskip("reportlab")
+from reportlab.pdfgen import canvas
+from flatten import flatten_in_memory
+
+
+def write_pdf(pdf_file, form):
+    pdf_canvas = canvas.Canvas(pdf_file)
+    pdf_canvas.drawString(100, 700, "report")
+    if form:
+        pdf_canvas.acroForm.textfield(name="count", value="12", x=100, y=600, width=60, height=20)
+    pdf_canvas.save()
+    return pdf_file
+
+
+@pytest.fixture(scope="module")
+def reports(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("reports")
+    return write_pdf(str(folder / "form.pdf"), True), write_pdf(str(folder / "plain.pdf"), False)
+
+
+def test_pdf_without_form_is_returned_unchanged(reports):
+    _, plain_file = reports
+    assert flatten_in_memory(plain_file) is plain_file
+    with open(plain_file, "rb") as f:
+        content = f.read()
+    assert flatten_in_memory(content) is content
+
+
+def test_form_is_flattened_in_memory(reports):
+    form_file, _ = reports
+    with open(form_file, "rb") as f:
+        content = f.read()
+    for source in (form_file, content):
+        with pikepdf.Pdf.open(flatten_in_memory(source)) as pdf:
+            assert "/AcroForm" not in pdf.Root
+            assert not any(page.obj.get("/Annots") for page in pdf.pages)
+
+
+def test_missing_or_broken_pdf(tmp_path):
+    assert flatten_in_memory(str(tmp_path / "missing.pdf")) is None
+    assert flatten_in_memory(b"not a pdf") is None
@@ -0,0 +1,62 @@
+import os
+import pytest
+import config
+
+pytest.importorskip("pdfplumber")
+pytest.importorskip("pikepdf")
+pytest.importorskip("reportlab")
+from batch_extract import load_report
+from extract_tables_dcr import load_coordinates_points
+from form_fields import read_form_fields
+from metrics import FileMetrics
+from report_engine import REPORT_TEMPLATES
+from synthetic_reports import generate_report, FIRST_NAMES
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+
+
+@pytest.mark.parametrize("report_type", ["DCR", "DDR"])
+def test_form_fast_path_matches_flatten_path(tmp_path, monkeypatch, report_type):
+    monkeypatch.setattr(config, "COORDINATES_POINTS_PATH", COORDINATES_POINTS_PATH)
+    monkeypatch.setattr(config, "FLATTEN_IN_MEMORY", True)
+    tables_info = load_coordinates_points(COORDINATES_POINTS_PATH)[REPORT_TEMPLATES[report_type]["metadata_key"]]
+    pdf_file = str(tmp_path / f"{report_type}.pdf")
+    generate_report(pdf_file, tables_info, seed=5)
+    assert read_form_fields(pdf_file) is not None
+
+    monkeypatch.setattr(config, "FORM_FAST_PATH", False)
+    flatten_metrics = FileMetrics(pdf_file)
+    expected = load_report(pdf_file, report_type, tables_info, flatten_metrics)
+
+    monkeypatch.setattr(config, "FORM_FAST_PATH", True)
+    form_metrics = FileMetrics(pdf_file)
+    report = load_report(pdf_file, report_type, tables_info, form_metrics)
+
+    assert expected
+    assert report == expected
+    assert "flatten" in flatten_metrics.stages
+    assert "form_fields" in form_metrics.stages
+
+
+@pytest.mark.parametrize("report_type", ["DCR", "DDR", "DMR", "POB"])
+def test_persian_field_values_match_flattened_text(tmp_path, monkeypatch, report_type):
+    # نام، سمت و شرکت: مقدار فیلد (فقط NFKC) در برابر متن نمایشی صفحه بعد از correct_persian_text
+    monkeypatch.setattr(config, "COORDINATES_POINTS_PATH", COORDINATES_POINTS_PATH)
+    monkeypatch.setattr(config, "FLATTEN_IN_MEMORY", True)
+    tables_info = load_coordinates_points(COORDINATES_POINTS_PATH)[REPORT_TEMPLATES[report_type]["metadata_key"]]
+    form_file = generate_report(str(tmp_path / "form.pdf"), tables_info, seed=7, fields="text")
+    flat_file = generate_report(str(tmp_path / "flat.pdf"), tables_info, seed=7, fields="none")
+    assert read_form_fields(flat_file) is None
+
+    monkeypatch.setattr(config, "FORM_FAST_PATH", False)
+    expected = load_report(flat_file, report_type, tables_info)
+
+    monkeypatch.setattr(config, "FORM_FAST_PATH", True)
+    form_metrics = FileMetrics(form_file)
+    report = load_report(form_file, report_type, tables_info, form_metrics)
+
+    # ناحیه‌هایی که فرم پوشش نمی‌دهد از فرم flatten شده خوانده می‌شوند و فیلدهای متنی آن appearance ندارند
+    compared = [sheet for sheet in expected if sheet not in form_metrics.fallback_regions]
+    assert set(report) == set(expected)
+    assert {sheet: report[sheet] for sheet in compared} == {sheet: expected[sheet] for sheet in compared}
+    assert any(name in str([report[sheet] for sheet in compared]) for name in FIRST_NAMES)
@@ -0,0 +1,58 @@
+import json
+import pytest
+import jsonl_output
+from jsonl_output import JsonlWriter, dumps_compact, read_jsonl
+
+# گزارش DDR با جداول records (کلید هر ردیف شماره ستون است)
+DDR_REPORT = {
+    "Operations": [{0: "حفاری", 1: "12"}, {0: "", 2: "3"}],
+    "Header": [{0: "14041002"}],
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def serializer(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(jsonl_output, "orjson", None)
+    elif jsonl_output.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+def test_dumps_compact_int_keys_like_json(serializer):
+    assert json.loads(dumps_compact(DDR_REPORT)) == json.loads(json.dumps(DDR_REPORT))
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_writer_round_trip_non_dcr_report(tmp_path, serializer, compress):
+    with JsonlWriter(str(tmp_path), compress=compress) as writer:
+        path = writer.write(DDR_REPORT, "DDR_TEMP/R1/report.pdf", "DDR", "R1")
+    assert path is not None
+
+    records = list(read_jsonl(path))
+    assert len(records) == 1
+    assert records[0]["source"] == "report.pdf"
+    assert records[0]["rig"] == "R1"
+    assert records[0]["report"] == json.loads(json.dumps(DDR_REPORT))
+
+
+def test_writer_appends_reprocessed_files(tmp_path, serializer):
+    report = {"Header": {"تاریخ": "14041002"}, "total": {}}
+    with JsonlWriter(str(tmp_path)) as writer:
+        first = writer.write(report, "a.pdf", "DCR", "O3")
+        second = writer.write(dict(report, total={"جمع کل": {"صبحانه": 1}}), "a.pdf", "DCR", "O3")
+    assert first == second
+    assert first.endswith("DCR_O3_1404-10.jsonl")
+    assert [record["report"]["total"] for record in read_jsonl(first)] == [{}, {"جمع کل": {"صبحانه": 1}}]
+
+
+@pytest.mark.parametrize("pdf_file, month", [
+    ("DDR_TEMP/R1/DDR_1404-10-02.pdf", "1404-10"),
+    ("DDR_TEMP/R1/14040315.pdf", "1404-03"),
+    ("DDR_TEMP/R1/report 1403_12.pdf", "1403-12"),
+    ("DDR_TEMP/R1/report.pdf", "unknown"),
+    ("DDR_TEMP/R1/report_140413.pdf", "unknown"),
+])
+def test_month_of_reports_without_header_date(pdf_file, month):
+    assert jsonl_output.report_month(DDR_REPORT, pdf_file) == month
+    assert jsonl_output.report_month({"Header": {"تاریخ": "14040702"}}, pdf_file) == "1404-07"
@@ -0,0 +1,102 @@
+import os
+import pytest
+import config
+import manifest as manifest_module
+from manifest import load_manifest, save_manifest, update_manifest, check_input, record_output
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "MAIN_OUTPUT_DIR", str(tmp_path / "OUTPUT"))
+    monkeypatch.setattr(config, "SQLITE_PATH", str(tmp_path / "OUTPUT" / "reports.sqlite"))
+    pdf_file = tmp_path / "report.pdf"
+    pdf_file.write_bytes(b"%PDF-1.4 report")
+    output = tmp_path / "OUTPUT" / "report_flatten_tables.json"
+    output.parent.mkdir()
+    output.write_text("{}")
+    return str(pdf_file), str(output)
+
+
+def recorded(pdf_file, output, output_mode="json"):
+    manifest = {}
+    _, fingerprint = check_input(manifest, pdf_file, "t1", output_mode)
+    record_output(manifest, pdf_file, fingerprint, "t1", output, output_mode)
+    return manifest
+
+
+def test_new_file_is_processed(workspace):
+    pdf_file, _ = workspace
+    up_to_date, fingerprint = check_input({}, pdf_file, "t1", "json")
+    assert not up_to_date
+    assert fingerprint["size"] == os.path.getsize(pdf_file)
+
+
+def test_unchanged_file_is_skipped_without_hashing(workspace, monkeypatch):
+    pdf_file, output = workspace
+    manifest = recorded(pdf_file, output)
+    monkeypatch.setattr(manifest_module, "file_hash", lambda path: pytest.fail("file was hashed again"))
+    assert check_input(manifest, pdf_file, "t1", "json")[0]
+
+
+def test_touched_file_with_same_content_is_skipped(workspace):
+    pdf_file, output = workspace
+    manifest = recorded(pdf_file, output)
+    os.utime(pdf_file, ns=(1, 1))
+    assert check_input(manifest, pdf_file, "t1", "json")[0]
+    assert manifest[pdf_file]["mtime"] == 1
+
+
+@pytest.mark.parametrize("change", ["content", "template", "version", "output", "mode", "sink"])
+def test_stale_entries(workspace, monkeypatch, change):
+    pdf_file, output = workspace
+    manifest = recorded(pdf_file, output)
+    tables_hash, output_mode = "t1", "json"
+    if change == "content":
+        with open(pdf_file, "ab") as f:
+            f.write(b" changed")
+    elif change == "template":
+        tables_hash = "t2"
+    elif change == "version":
+        monkeypatch.setattr(config, "EXTRACTOR_VERSION", config.EXTRACTOR_VERSION + ".1")
+    elif change == "output":
+        os.remove(output)
+    elif change == "mode":
+        output_mode = "sqlite"
+    else:
+        monkeypatch.setattr(config, "MAIN_OUTPUT_DIR", config.MAIN_OUTPUT_DIR + "_other")
+    assert not check_input(manifest, pdf_file, tables_hash, output_mode)[0]
+
+
+def test_sqlite_entry_is_stale_after_switching_database(workspace, monkeypatch):
+    pdf_file, _ = workspace
+    manifest = recorded(pdf_file, config.SQLITE_PATH, "sqlite")
+    open(config.SQLITE_PATH, "w").close()
+    assert check_input(manifest, pdf_file, "t1", "sqlite")[0]
+    monkeypatch.setattr(config, "SQLITE_PATH", config.SQLITE_PATH + ".new")
+    assert not check_input(manifest, pdf_file, "t1", "sqlite")[0]
+
+
+def test_legacy_json_entry_without_output_mode(workspace):
+    pdf_file, output = workspace
+    manifest = recorded(pdf_file, output)
+    del manifest[pdf_file]["output_mode"], manifest[pdf_file]["sink"]
+    assert check_input(manifest, pdf_file, "t1", "json")[0]
+    assert not check_input(manifest, pdf_file, "t1", "jsonl")[0]
+
+
+def test_save_and_load_round_trip(workspace, tmp_path):
+    pdf_file, output = workspace
+    manifest = recorded(pdf_file, output)
+    manifest_path = str(tmp_path / "state" / "manifest.json")
+    save_manifest(manifest, manifest_path)
+    assert load_manifest(manifest_path) == manifest
+    assert not os.path.exists(f"{manifest_path}.tmp")
+
+
+def test_update_keeps_entries_written_by_another_process(workspace, tmp_path):
+    pdf_file, output = workspace
+    manifest_path = str(tmp_path / "manifest.json")
+    save_manifest({"other.pdf": {"output": "other.json"}}, manifest_path)
+    merged = update_manifest(recorded(pdf_file, output), manifest_path)
+    assert set(merged) == {"other.pdf", pdf_file}
+    assert load_manifest(manifest_path) == merged
@@ -0,0 +1,36 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+from numeric_cells import clean_number, parse_int_cells
+
+
+def test_clean_number_digits_and_separators():
+    assert clean_number("۱۲٬۳۴۵") == "12345"
+    assert clean_number("‏٣ ٤‎") == "34"
+    assert clean_number("−۷") == "-7"
+    assert clean_number(5) == "5"
+
+
+def test_persian_arabic_and_signed_cells():
+    values, failed = parse_int_cells(["۱۲", "٣٤", "+5", "-۶", "۱,۰۰۰"])
+    assert values.tolist() == [12, 34, 5, -6, 1000]
+    assert not failed.any()
+
+
+def test_empty_cells_are_zero_without_failure():
+    values, failed = parse_int_cells(["", None, " ", "‌"])
+    assert values.tolist() == [0, 0, 0, 0]
+    assert not failed.any()
+
+
+def test_invalid_cells_are_marked_failed():
+    values, failed = parse_int_cells(["-", "--5", "4\nت", "1.5", "x"])
+    assert values.tolist() == [0, 0, 0, 0, 0]
+    assert failed.all()
+
+
+def test_overflowing_cells_are_marked_failed():
+    cells = [["9" * 30, "۹" * 19, "0" * 25 + "42"], [str(10 ** 18 - 1), "-" + "9" * 18, "3"]]
+    values, failed = parse_int_cells(cells)
+    assert values.tolist() == [[0, 0, 42], [10 ** 18 - 1, -(10 ** 18 - 1), 3]]
+    assert failed.tolist() == [[True, True, False], [False, False, False]]
@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+
+pdfplumber = pytest.importorskip("pdfplumber")
+pytest.importorskip("reportlab")
+from reportlab.lib.pagesizes import A4 as PAGE_SIZE
+from reportlab.pdfgen import canvas
+from extract_tables_dcr import load_coordinates_points
+from flatten import flatten_in_memory
+from page_regions import GRID_CELL_SIZE, TABLE_SETTINGS, PageAnalysis, region_bbox, read_region_tables
+from synthetic_reports import generate_report
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+
+
+@pytest.fixture(scope="module")
+def edge_cases(tmp_path_factory):
+    """
+    جدول 4x5 با خانه‌های 48 واحدی (مرز خانه‌ها روی مرز خانه‌های GridIndex)، خط با عرض صفر،
+    متن و خطی که از صفحه بیرون می‌زنند
+    """
+    pdf_file = str(tmp_path_factory.mktemp("reports") / "edges.pdf")
+    height = PAGE_SIZE[1]
+    pdf_canvas = canvas.Canvas(pdf_file, pagesize=PAGE_SIZE)
+    for row in range(4):
+        for col in range(5):
+            x, top = 96 + col * 48, 96 + row * 48
+            pdf_canvas.rect(x, height - top - 48, 48, 48, stroke=1, fill=0)
+            pdf_canvas.drawString(x + 4, height - top - 20, f"{row}{col}")
+    pdf_canvas.line(240, height - 400, 240, height - 500)
+    pdf_canvas.line(96, height - 450, 336, height - 450)
+    pdf_canvas.line(-30, height - 600, PAGE_SIZE[0] + 30, height - 600)
+    pdf_canvas.drawString(-12, height - 620, "outside")
+    pdf_canvas.drawString(PAGE_SIZE[0] - 10, height - 640, "outside")
+    pdf_canvas.save()
+    return pdf_file
+
+
+def test_page_analysis_crop_matches_page_crop(edge_cases):
+    bboxes = [
+        (96, 96, 336, 288),
+        (96, 96, 144, 144),
+        (144, 144, 192, 192),
+        (GRID_CELL_SIZE * 9, GRID_CELL_SIZE * 9, GRID_CELL_SIZE * 12, GRID_CELL_SIZE * 12),
+        (240, 400, 300, 500),
+        (200, 400, 240, 500),
+        (240, 450, 240.5, 451),
+        (0, 590, 40, 650),
+        (PAGE_SIZE[0] - 40, 590, PAGE_SIZE[0], 650),
+        (0, 0) + PAGE_SIZE,
+    ]
+    with pdfplumber.open(edge_cases) as pdf:
+        page = pdf.pages[0]
+        analysis = PageAnalysis(page)
+        for bbox in bboxes:
+            expected, cropped = page.crop(bbox), analysis.crop(bbox)
+            assert cropped.chars == expected.chars
+            assert cropped.rects == expected.rects
+            assert cropped.lines == expected.lines
+            assert cropped.extract_table(TABLE_SETTINGS) == expected.extract_table(TABLE_SETTINGS)
+
+
+class RecordingExecutor:
+    """
+    executor ترتیبی که ورودی هر job را نگه می‌دارد (مثل process pool: نه ThreadPoolExecutor)
+    """
+
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, fn, pdf_source, page_num, *args):
+        self.jobs.append((pdf_source, page_num))
+        future = Future()
+        future.set_result(fn(pdf_source, page_num, *args))
+        return future
+
+
+@pytest.fixture(scope="module")
+def dcr(tmp_path_factory):
+    tables_info = load_coordinates_points(COORDINATES_POINTS_PATH)["tables_metadataـDCR"]
+    pdf_file = str(tmp_path_factory.mktemp("reports") / "DCR.pdf")
+    generate_report(pdf_file, tables_info, seed=2)
+    return pdf_file, tables_info
+
+
+def sequential_tables(pdf_source, tables_info):
+    with pdfplumber.open(pdf_source) as pdf:
+        return read_region_tables(pdf, tables_info)
+
+
+@pytest.mark.parametrize("in_memory", [False, True])
+def test_process_pool_matches_sequential(dcr, in_memory):
+    pdf_file, tables_info = dcr
+    source = (lambda: flatten_in_memory(pdf_file)) if in_memory else (lambda: pdf_file)
+    expected = sequential_tables(source(), tables_info)
+    with ProcessPoolExecutor(max_workers=2) as executor, pdfplumber.open(source()) as pdf:
+        assert read_region_tables(pdf, tables_info, page_executor=executor) == expected
+    with ThreadPoolExecutor(max_workers=2) as executor, pdfplumber.open(source()) as pdf:
+        assert read_region_tables(pdf, tables_info, page_executor=executor) == expected
+
+
+def test_workers_get_a_path_and_parsed_pages_stay_local(dcr):
+    pdf_file, tables_info = dcr
+    expected = sequential_tables(flatten_in_memory(pdf_file), tables_info)
+    executor = RecordingExecutor()
+    with pdfplumber.open(flatten_in_memory(pdf_file)) as pdf:
+        # مثل بررسی anchor ها قبل از استخراج
+        pdf.pages[0].extract_text()
+        assert read_region_tables(pdf, tables_info, page_executor=executor) == expected
+
+    assert [page_num for _, page_num in executor.jobs] == [2, 3, 4]
+    temp_paths = {pdf_source for pdf_source, _ in executor.jobs}
+    assert len(temp_paths) == 1 and all(isinstance(path, str) for path in temp_paths)
+    assert not os.path.exists(temp_paths.pop())
+
+def test_page_analysis_crop_matches_page_crop_on_report_regions(dcr):
+    pdf_file, tables_info = dcr
+    with pdfplumber.open(flatten_in_memory(pdf_file)) as pdf:
+        analyses = {}
+        for table_meta in tables_info:
+            page = pdf.pages[table_meta["page_number"] - 1]
+            analysis = analyses.setdefault(table_meta["page_number"], PageAnalysis(page))
+            bbox = region_bbox(table_meta["coordinates"])
+            expected, cropped = page.crop(bbox), analysis.crop(bbox)
+            assert cropped.chars == expected.chars
+            assert cropped.extract_table(TABLE_SETTINGS) == expected.extract_table(TABLE_SETTINGS)
@@ -0,0 +1,62 @@
+import os
+import json
+import pytest
+import config
+from jsonl_output import JsonlWriter
+from manifest import save_manifest
+from report_rows import iter_output_reports
+
+pa = pytest.importorskip("pyarrow")
+pytest.importorskip("numpy")
+from parquet_export import collect_person_shifts, export_person_shifts, load_person_shifts
+
+
+def person(name, breakfast, lunch):
+    return {"name": name, "position": "x", "ص": breakfast, "ن": lunch, "ش": "", "پ": "۲", "خ": 0}
+
+
+REPORT = {
+    "Header": {"تاریخ": "14041002"},
+    # خروجی JSON قدیمی: تعداد وعده‌ها string هستند
+    "Operation": {"ShiftA": [person("a", "1", ""), person("b", 1, "x")]},
+}
+
+
+def test_string_counts_are_parsed():
+    columns = collect_person_shifts([(REPORT, "a.pdf", "DCR", "O3")])
+    assert columns["breakfast"] == [1, 1]
+    assert columns["lunch"] == [0, 0]
+    assert columns["dinner"] == [0, 0]
+    assert columns["late_dinner"] == [2, 2]
+
+
+def test_export_json_outputs_with_string_counts(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "METRICS_PATH", str(tmp_path / "metrics.jsonl"))
+    output = tmp_path / "OUTPUT" / "DCR_TEMP" / "O3" / "a_flatten_tables.json"
+    output.parent.mkdir(parents=True)
+    output.write_text(json.dumps(REPORT, ensure_ascii=False), encoding="utf-8")
+
+    export_dir = str(tmp_path / "export")
+    assert export_person_shifts(str(tmp_path / "OUTPUT"), export_dir) == 2
+    table = load_person_shifts(export_dir, columns=["name", "breakfast", "late_dinner", "rig"])
+    assert table.schema.field("breakfast").type == pa.int32()
+    assert sorted(zip(*table.to_pydict().values())) == [("a", 1, 2, "O3"), ("b", 1, 2, "O3")]
+
+
+def test_json_and_jsonl_outputs_of_one_file_are_exported_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "METRICS_PATH", None)
+    monkeypatch.setattr(config, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    output = os.path.join("OUTPUT", "DCR_TEMP", "O3", "a_flatten_tables.json")
+    os.makedirs(os.path.dirname(output))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(REPORT, f, ensure_ascii=False)
+    save_manifest({os.path.join("DCR_TEMP", "O3", "a.PDF"): {"output": output}})
+    # همان فایل بعداً در حالت jsonl دوباره پردازش شده است
+    with JsonlWriter(os.path.join("OUTPUT", "jsonl")) as writer:
+        writer.write(REPORT, os.path.join("DCR_TEMP", "O3", "a.PDF"), "DCR", "O3")
+
+    sources = [source for _, source, _, _ in iter_output_reports("OUTPUT")]
+    assert sources == ["a.PDF", "a.PDF"]
+    export_dir = str(tmp_path / "export")
+    assert export_person_shifts("OUTPUT", export_dir) == 2
@@ -0,0 +1,38 @@
+import unicodedata
+import pytest
+
+arabic_reshaper = pytest.importorskip("arabic_reshaper")
+bidi_algorithm = pytest.importorskip("bidi.algorithm")
+from persian_text import correct_persian_text, correct_persian_table, _correct_rtl_text
+
+TEXTS = [
+    "", "12", "Total", "ShiftA 12/3", "café", "ﬁ", "١٢٣", "۱۴۰۴/۱۰/۰۲",
+    "ﺭﻳﻴﺲ ﺩﺳﺘﮕﺎﻩ", "مسوول اردوگاه: علی", "שלום", "سرحفار 3", "جمع\nکل", "خدما ت",
+]
+
+
+def uncached(text):
+    """
+    اصلاح متن بدون مسیر سریع و cache (پیاده‌سازی اولیه)
+    """
+    return unicodedata.normalize("NFKC", bidi_algorithm.get_display(arabic_reshaper.reshape(text)))
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_uncached_correction(text):
+    assert correct_persian_text(text) == uncached(text)
+    # بار دوم از cache خوانده می‌شود
+    assert correct_persian_text(text) == uncached(text)
+
+
+def test_repeated_text_is_cached():
+    _correct_rtl_text.cache_clear()
+    for _ in range(3):
+        correct_persian_text("آشپز")
+    info = _correct_rtl_text.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+def test_table_keeps_non_text_cells():
+    rows = [[None, "آشپز", "1"], ["", None, "café"]]
+    assert correct_persian_table(rows) == [[None, uncached("آشپز"), "1"], ["", None, uncached("café")]]
@@ -0,0 +1,74 @@
+import pytest
+
+pytest.importorskip("numpy")
+from report_aggregation import MealArrays
+
+
+def person(name, breakfast, lunch):
+    return {"name": name, "position": "x", "ص": breakfast, "ن": lunch, "ش": 0, "پ": 0, "خ": 0}
+
+
+def meals(breakfast, lunch):
+    return {"صبحانه": breakfast, "ناهار": lunch, "شام": 0, "پس شام": 0, "خدمات": 0}
+
+
+def dcr_report(day, total):
+    return {
+        "Header": {"تاریخ": f"140410{day:02d}"},
+        "Operation": {"ShiftA": [person("a", 1, 1), person("b", 1, 0)]},
+        "employer": {"EmployerPage3": [person("c", 0, 1)]},
+        "total": total,
+    }
+
+
+REPORTS = [
+    # برچسب‌ها همان‌طور که از PDF خوانده شده‌اند (ی/ک عربی، فاصله اضافه)
+    (dcr_report(1, {"عمليات": meals(2, 1), "كارفرما": meals(0, 1), "مهمان": meals(1, 1), "جمع كل": meals(3, 3)}), "a.pdf", "DCR", "O3"),
+    (dcr_report(2, {"عملیات ": meals(2, 5), "کارفرما": meals(0, 1), "مهمان": meals(1, 1), "جمع کل": meals(3, 3)}), "b.pdf", "DCR", "O3"),
+    # گزارش‌های دیگر جدول وعده ندارند و نادیده گرفته می‌شوند
+    ({"Header": [{0: "14041003"}], "total": [{0: "x"}]}, "c.pdf", "DDR", "O3"),
+]
+
+
+def test_total_labels_are_derived_from_reports():
+    arrays = MealArrays(REPORTS)
+    assert len(arrays) == 2
+    assert arrays.categories == ["عمليات", "كارفرما", "مهمان", "جمع كل"]
+    assert arrays.meal_totals.shape == (2, 4, 5)
+
+
+def test_reconcile_uses_derived_labels():
+    mismatches = MealArrays(REPORTS).reconcile()
+    assert mismatches == [
+        ("b.pdf", "O3", "total/عمليات", "lunch", 1, 5),
+        ("b.pdf", "O3", "total/جمع كل", "lunch", 7, 3),
+    ]
+
+
+def test_reports_without_total_table():
+    arrays = MealArrays([(dcr_report(1, {}), "a.pdf", "DCR", "O3")])
+    assert arrays.categories == [] and arrays.meal_totals.shape == (1, 0, 5)
+    assert arrays.reconcile() == []
+    keys, meals_sum, heads, counts = arrays.aggregate("day")
+    assert keys == [("O3", "1404-10-01")] and counts.tolist() == [1]
+
+
+def test_report_without_persons():
+    report = {"Header": {"تاریخ": "14041001"}, "Operation": {}, "total": {"عملیات": meals(0, 0)}}
+    arrays = MealArrays([(report, "a.pdf", "DCR", "O3")])
+    keys, meals_sum, heads, counts = arrays.aggregate("month")
+    assert keys == [("O3", "1404-10")]
+    assert meals_sum.sum() == 0 and heads.sum() == 0 and counts.tolist() == [1]
+    assert arrays.reconcile() == []
+
+
+def test_employer_rows_without_shift_sections():
+    report = {
+        "Header": {"تاریخ": "14041001"},
+        "employer": {"EmployerPage3": [person("c", 1, 1)]},
+        "total": {"کارفرما": meals(1, 2)},
+    }
+    arrays = MealArrays([(report, "a.pdf", "DCR", "O3")])
+    assert arrays.reconcile() == [("a.pdf", "O3", "total/کارفرما", "lunch", 1, 2)]
+    keys, meals_sum, heads, counts = arrays.aggregate("day")
+    assert heads.sum() == 1 and meals_sum.sum() == 2
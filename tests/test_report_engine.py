@@ -0,0 +1,37 @@
+import os
+import pytest
+from extract_tables_dcr import load_coordinates_points
+from report_engine import REPORT_TEMPLATES, structure_report, build_report
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+
+
+@pytest.fixture(scope="module")
+def pob_tables_info():
+    return load_coordinates_points(COORDINATES_POINTS_PATH)["pob_tables_metadata"]
+
+
+def test_duplicate_sheet_regions_are_appended(pob_tables_info):
+    summary = [index for index, table_meta in enumerate(pob_tables_info) if table_meta["sheet_name"] == "Summary_part1"]
+    assert len(summary) == 2
+    region_tables = {summary[0]: [["a", "1"]], summary[1]: [["b", "2"], ["c", "3"]]}
+    report = structure_report(region_tables, REPORT_TEMPLATES["POB"], pob_tables_info)
+    assert report == {"Summary_part1": [{0: "a", 1: "1"}, {0: "b", 1: "2"}, {0: "c", 1: "3"}]}
+
+
+def test_pob_report_keeps_both_summary_regions(tmp_path, pob_tables_info):
+    pytest.importorskip("pdfplumber")
+    pytest.importorskip("reportlab")
+    from synthetic_reports import generate_report
+
+    pdf_file = str(tmp_path / "POB.pdf")
+    generate_report(pdf_file, pob_tables_info, seed=3)
+    report = build_report(pdf_file, "POB", pob_tables_info)
+    # همان گزارش بدون ناحیه تکراری
+    first = next(index for index, table_meta in enumerate(pob_tables_info) if table_meta["sheet_name"] == "Summary_part1")
+    single = build_report(pdf_file, "POB", pob_tables_info[:first] + pob_tables_info[first + 1:])
+
+    assert single["Summary_part1"]
+    assert report["Summary_part1"] == single["Summary_part1"] * 2
+    assert {key: value for key, value in report.items() if key != "Summary_part1"} == \
+        {key: value for key, value in single.items() if key != "Summary_part1"}
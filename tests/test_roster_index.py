@@ -0,0 +1,26 @@
+from roster_index import RosterIndex
+
+
+def test_compact_report_round_trip(tmp_path):
+    report = {
+        "Operation": {"ShiftA": [
+            {"name": "علي  رضايي", "position": "آشپز", "ص": 1, "ن": 0, "ش": 1, "پ": 0, "خ": 0},
+            {"TotalShiftA": {"ص": 1}},
+        ]},
+        "employer": {"EmployerPage3": [
+            {"name": "علی رضایی", "position": "ناظر", "company": "شرکت نفت", "ص": 0, "ن": 1, "ش": 0, "پ": 0, "خ": 1},
+        ]},
+    }
+    roster = RosterIndex(str(tmp_path / "roster.json"))
+    compact = roster.compact_report(report)
+    shift_row, total = compact["Operation"]["ShiftA"]
+    employer_row = compact["employer"]["EmployerPage3"][0]
+    # نام با ی/ک عربی و فاصله اضافه همان شناسه را می‌گیرد
+    assert shift_row[0] == employer_row[0]
+    assert total == {"TotalShiftA": {"ص": 1}}
+    assert roster.expand_row(employer_row) == report["employer"]["EmployerPage3"][0] | {"name": "علی رضایی"}
+
+    roster.save()
+    loaded = RosterIndex.load(str(tmp_path / "roster.json"))
+    assert loaded.expand_row(shift_row)["name"] == "علی رضایی"
+    assert len(loaded) == len(roster)
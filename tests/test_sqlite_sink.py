@@ -0,0 +1,75 @@
+import sqlite3
+import pytest
+from sqlite_sink import SqliteSink
+from batch_extract import OutputCommitter
+
+DCR_REPORT = {
+    "Header": {"تاریخ": "14041002"},
+    "Operation": {"ShiftA": [
+        {"name": "علی", "position": "آشپز", "ص": 1, "ن": 1, "ش": 0, "پ": 0, "خ": 1},
+        {"name": "", "position": "مجموع آمار شیف", "ص": 1, "ن": 1, "ش": 0, "پ": 0, "خ": 1},
+    ]},
+    "employer": {"EmployerPage3": [
+        {"name": "رضا", "position": "ناظر", "company": "شرکت نفت", "ص": 1, "ن": 0, "ش": 1, "پ": 0, "خ": 0},
+    ]},
+    "total": {"جمع کل": {"صبحانه": 2, "ناهار": 1, "شام": 1, "پس شام": 0, "خدمات": 1}},
+}
+DDR_REPORT = {"Header": [{0: "14041002"}], "Operations": [{0: "حفاری", 1: "12"}]}
+# header غیر قابل تبدیل به JSON: transaction شکست می‌خورد
+BROKEN_REPORT = {"Header": {"تاریخ": {1, 2}}}
+
+FINGERPRINT = {"input_hash": "h", "size": 1, "mtime": 1}
+
+
+def rows(db_path, query):
+    with sqlite3.connect(db_path) as connection:
+        return connection.execute(query).fetchall()
+
+
+def test_round_trip_dcr_and_non_dcr(tmp_path):
+    db_path = str(tmp_path / "reports.sqlite")
+    with SqliteSink(db_path, batch_size=10) as sink:
+        assert sink.write(DCR_REPORT, "DCR_TEMP/O3/a.pdf", "DCR", "O3") == db_path
+        sink.write(DDR_REPORT, "DDR_TEMP/R1/b.pdf", "DDR", "R1")
+        # ثبت دوباره همان فایل ردیف‌های قبلی را جایگزین می‌کند
+        sink.write(DCR_REPORT, "DCR_TEMP/O3/a.pdf", "DCR", "O3")
+
+    assert rows(db_path, "SELECT source, report_type, rig, report_date FROM reports ORDER BY source") == [
+        ("a.pdf", "DCR", "O3", "1404-10-02"), ("b.pdf", "DDR", "R1", None),
+    ]
+    assert rows(db_path, "SELECT header FROM reports WHERE report_type = 'DDR'") == [('[{"0": "14041002"}]',)]
+    assert rows(db_path, "SELECT p.name, s.section, s.company, s.breakfast, s.services FROM shift_counts s "
+                         "JOIN persons p ON p.id = s.person_id ORDER BY p.name") == [
+        ("رضا", "employer", "شرکت نفت", 1, 0), ("علی", "Operation", None, 1, 1),
+    ]
+    assert rows(db_path, "SELECT category, breakfast FROM meal_totals") == [("جمع کل", 2)]
+
+
+def test_failed_flush_rolls_back_and_raises(tmp_path):
+    db_path = str(tmp_path / "reports.sqlite")
+    sink = SqliteSink(db_path, batch_size=10)
+    sink.write(DCR_REPORT, "a.pdf", "DCR", "O3")
+    sink.write(BROKEN_REPORT, "b.pdf", "DCR", "O3")
+    with pytest.raises(TypeError):
+        sink.flush()
+    assert sink.pending == {}
+    sink.close()
+    assert rows(db_path, "SELECT COUNT(*) FROM reports") == [(0,)]
+
+
+def test_committer_records_manifest_only_after_commit(tmp_path):
+    manifest = {}
+    committer = OutputCommitter(SqliteSink(str(tmp_path / "reports.sqlite"), batch_size=2), manifest, "sqlite")
+
+    assert committer.store(DCR_REPORT, "DCR_TEMP/O3/a.pdf", "DCR_TEMP/O3", "DCR", FINGERPRINT, "t")
+    assert manifest == {} and committer.committed == []
+    # batch دوم (با خطا) کامل rollback می‌شود و هیچ‌کدام از دو فایل ثبت نمی‌شوند
+    committer.store(BROKEN_REPORT, "DCR_TEMP/O3/b.pdf", "DCR_TEMP/O3", "DCR", FINGERPRINT, "t")
+    assert manifest == {} and committer.committed == [] and committer.failed == 2
+
+    committer.store(DCR_REPORT, "DCR_TEMP/O3/c.pdf", "DCR_TEMP/O3", "DCR", FINGERPRINT, "t")
+    committer.store(None, "DCR_TEMP/O3/d.pdf", "DCR_TEMP/O3", "DCR", FINGERPRINT, "t")
+    committer.close()
+    assert list(manifest) == ["DCR_TEMP/O3/c.pdf"]
+    assert committer.committed == [("DCR_TEMP/O3", "DCR_TEMP/O3/c.pdf")]
+    assert committer.failed == 3
@@ -0,0 +1,39 @@
+import pytest
+from table_rows import build_table_rows
+
+pd = pytest.importorskip("pandas")
+
+TABLES = {
+    "empty rows": [[None, None, None], ["a", "b", "c"], [None, None, None], ["d", None, "f"]],
+    "empty columns": [["a", None, "c", None], ["d", None, None, None], [None, None, "f", None]],
+    "none and blank": [["", None, "x"], [None, None, ""], ["", None, None]],
+    "only blank cells": [["", ""], ["", ""]],
+    "ragged rows": [["a"], ["b", "c", None], [None, None], ["d", None, None, "e"]],
+    "all none": [[None, None], [None, None]],
+    "no rows": [],
+    "persian cells": [["علی حصاری", None, "1"], [None, None, None], ["", "سرحفار", None]],
+}
+
+
+def dataframe_table(table_data):
+    """
+    رفتار قبلی extract_tables_dcr: DataFrame، dropna ردیف‌ها و ستون‌ها و fillna('')
+    """
+    df = pd.DataFrame(table_data)
+    df.dropna(axis=0, how='all', inplace=True)
+    df.dropna(axis=1, how='all', inplace=True)
+    df.fillna('', inplace=True)
+    return df
+
+
+@pytest.mark.parametrize("name", sorted(TABLES))
+def test_table_rows_match_dataframe(name):
+    table_data = TABLES[name]
+    df = dataframe_table(table_data)
+    table = build_table_rows(table_data)
+
+    assert table.empty == df.empty
+    assert len(table) == len(df)
+    assert table.records() == df.to_dict('records')
+    if not df.empty:
+        assert list(table.columns) == list(df.columns)
@@ -0,0 +1,138 @@
+import os
+from concurrent.futures import Future
+import pytest
+import config
+import watch_reports
+from batch_extract import OutputCommitter, create_writer
+from watch_reports import ReportWatcher
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+
+
+class FakeClock:
+    """
+    جایگزین ماژول time در watch_reports: زمان فقط با advance جلو می‌رود
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class InlineExecutor:
+    """
+    WorkerPool ترتیبی در همین پردازش
+    """
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def recycle_if_needed(self):
+        return False
+
+
+@pytest.fixture
+def watcher(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "COORDINATES_POINTS_PATH", COORDINATES_POINTS_PATH)
+    monkeypatch.setattr(config, "MAIN_OUTPUT_DIR", str(tmp_path / "OUTPUT"))
+    monkeypatch.setattr(config, "MAIN_BACKUP_DIR", str(tmp_path / "BACKUP"))
+    monkeypatch.setattr(config, "MANIFEST_PATH", str(tmp_path / "OUTPUT" / "manifest.json"))
+    monkeypatch.setattr(config, "METRICS_PATH", None)
+    monkeypatch.setattr(watch_reports, "INotify", None)
+    clock = FakeClock()
+    monkeypatch.setattr(watch_reports, "time", clock)
+
+    input_dir = os.path.join(config.FOLDER_DCR, "O3")
+    os.makedirs(input_dir)
+    report_watcher = ReportWatcher([input_dir], workers=1, settle_seconds=2, output_mode="json")
+    report_watcher.committer = OutputCommitter(create_writer("json"), report_watcher.manifest, "json")
+    report_watcher.executor = InlineExecutor()
+    report_watcher.clock = clock
+    report_watcher.calls = []
+    report_watcher.results = []
+
+    def fake_process_pdf(pdf_file, output_folder, report_type, tables_info, profile=False, output_mode=None):
+        report_watcher.calls.append(pdf_file)
+        if report_watcher.results and not report_watcher.results.pop(0):
+            return None
+        os.makedirs(output_folder, exist_ok=True)
+        output = os.path.join(output_folder, os.path.basename(pdf_file) + ".json")
+        with open(output, "w") as f:
+            f.write("{}")
+        return output
+
+    monkeypatch.setattr(watch_reports, "process_pdf", fake_process_pdf)
+    return report_watcher
+
+
+def poll(watcher):
+    """
+    یک دور حلقه run در حالت polling
+    """
+    watcher.scan_directories()
+    for input_dir, pdf_file in watcher.settled_files():
+        watcher.submit(watcher.executor, input_dir, pdf_file)
+    watcher.collect_finished()
+
+
+def write_pdf(pdf_file, content, mtime):
+    with open(pdf_file, "ab") as f:
+        f.write(content)
+    os.utime(pdf_file, (mtime, mtime))
+
+
+def test_growing_file_waits_until_settled(watcher):
+    pdf_file = os.path.join(watcher.input_directories[0], "report.pdf")
+    write_pdf(pdf_file, b"%PDF-1.4 ", 1000)
+    poll(watcher)
+
+    # آپلود هنوز ادامه دارد: هر تغییر زمان انتظار را از نو شروع می‌کند
+    for mtime in (1001, 1002, 1003):
+        watcher.clock.advance(1.5)
+        write_pdf(pdf_file, b"more ", mtime)
+        poll(watcher)
+        assert watcher.calls == []
+
+    watcher.clock.advance(1.5)
+    poll(watcher)
+    assert watcher.calls == []
+    watcher.clock.advance(0.5)
+    poll(watcher)
+    assert watcher.calls == [pdf_file]
+    assert not os.path.exists(pdf_file)
+    assert len(watcher.manifest) == 1
+
+
+def test_failed_file_is_retried_only_after_it_changes(watcher):
+    watcher.results = [False, True]
+    pdf_file = os.path.join(watcher.input_directories[0], "report.pdf")
+    write_pdf(pdf_file, b"%PDF-1.4 ", 1000)
+    poll(watcher)
+    watcher.clock.advance(2)
+    poll(watcher)
+    assert watcher.calls == [pdf_file]
+    assert os.path.exists(pdf_file)
+    assert watcher.manifest == {}
+
+    for _ in range(3):
+        watcher.clock.advance(10)
+        poll(watcher)
+    assert watcher.calls == [pdf_file]
+
+    # فایل دوباره آپلود شد
+    write_pdf(pdf_file, b"fixed", 2000)
+    poll(watcher)
+    assert watcher.calls == [pdf_file]
+    watcher.clock.advance(2)
+    poll(watcher)
+    assert watcher.calls == [pdf_file, pdf_file]
+    assert not os.path.exists(pdf_file)
+    assert list(watcher.manifest) == [pdf_file]
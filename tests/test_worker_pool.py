@@ -0,0 +1,42 @@
+import os
+import pytest
+from metrics import current_rss_kb
+from worker_pool import WorkerPool
+
+
+def square_with_pid(value):
+    return value * value, os.getpid()
+
+
+def test_workers_are_replaced_after_max_files():
+    with WorkerPool(2, max_files=2, max_rss_mb=0) as pool:
+        futures = [pool.submit(square_with_pid, value) for value in range(10)]
+        results = [future.result() for future in futures]
+
+    assert [square for square, _ in results] == [value * value for value in range(10)]
+    # هر 4 فایل (2 worker × 2 فایل) به workers جدید می‌رود
+    assert pool.recycled == 2
+    pids = [{pid for _, pid in results[start:start + 4]} for start in (0, 4, 8)]
+    assert not pids[0] & pids[1] and not pids[1] & pids[2] and not pids[0] & pids[2]
+
+
+def test_run_returns_every_job_across_recycling():
+    with WorkerPool(2, max_files=1, max_rss_mb=0) as pool:
+        results = {tag: future.result() for tag, future in pool.run(square_with_pid, ((value, (value,)) for value in range(7)))}
+    assert {tag: square for tag, (square, _) in results.items()} == {value: value * value for value in range(7)}
+    assert len({pid for _, pid in results.values()}) > 2
+
+
+@pytest.mark.skipif(current_rss_kb() is None, reason="RSS not measurable without /proc")
+def test_workers_are_replaced_above_rss_limit():
+    with WorkerPool(1, max_files=0, max_rss_mb=10 ** 6) as pool:
+        _, first_pid = pool.submit(square_with_pid, 1).result()
+        assert not pool.recycle_if_needed()
+        assert pool.submit(square_with_pid, 2).result()[1] == first_pid
+
+    # حافظه هر پردازش پایتون بیشتر از 1 مگابایت است
+    with WorkerPool(1, max_files=0, max_rss_mb=1) as pool:
+        _, first_pid = pool.submit(square_with_pid, 1).result()
+        assert pool.recycle_if_needed()
+        assert pool.recycled == 1
+        assert pool.submit(square_with_pid, 2).result()[1] != first_pid
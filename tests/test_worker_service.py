@@ -0,0 +1,102 @@
+import os
+import threading
+from concurrent.futures import Future, wait
+from multiprocessing.connection import Listener
+import pytest
+import config
+import worker_service
+from worker_pool import WorkerPool
+from manifest import load_manifest, save_manifest
+from worker_service import WorkerService, send_request
+
+COORDINATES_POINTS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "coordinates_points.json")
+
+
+def test_send_request_falls_back_when_connection_drops(tmp_path):
+    address = str(tmp_path / "service.sock")
+    listener = Listener(address)
+
+    def drop_connection():
+        listener.accept().close()
+
+    thread = threading.Thread(target=drop_connection)
+    thread.start()
+    try:
+        assert send_request({"command": "ping"}, address) is False
+    finally:
+        thread.join()
+        listener.close()
+    assert send_request({"command": "ping"}, str(tmp_path / "missing.sock")) is False
+
+
+def test_tcp_service_requires_authkey(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "COORDINATES_POINTS_PATH", COORDINATES_POINTS_PATH)
+    monkeypatch.setattr(config, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(config, "WORKER_SERVICE_AUTHKEY", None)
+    monkeypatch.setattr(worker_service, "WorkerPool", lambda workers: pytest.fail("service started without authkey"))
+    service = WorkerService(workers=1, address=("127.0.0.1", 0))
+    service.serve()
+    assert service.pool is None
+
+
+def test_concurrent_submit_and_recycle():
+    with WorkerPool(2, max_files=0, max_rss_mb=1) as pool:
+        # حافظه workers همیشه بیشتر از حد: هر فراخوانی recycle_if_needed pool را جایگزین می‌کند
+        pool.worker_rss_kb = lambda: [1024 * 1024]
+        futures = []
+
+        def submit_and_recycle():
+            for value in range(5):
+                futures.append(pool.submit(abs, -value))
+                pool.recycle_if_needed()
+
+        threads = [threading.Thread(target=submit_and_recycle) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wait(futures)
+        assert sorted(future.result() for future in futures) == sorted(list(range(5)) * 4)
+        assert pool.recycled == 20
+
+
+class InlinePool:
+    """
+    WorkerPool ترتیبی در همین پردازش
+    """
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def recycle_if_needed(self):
+        pass
+
+
+def test_extract_keeps_manifest_entries_of_other_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "COORDINATES_POINTS_PATH", COORDINATES_POINTS_PATH)
+    monkeypatch.setattr(config, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(config, "MAIN_OUTPUT_DIR", str(tmp_path / "OUTPUT"))
+
+    def fake_process_pdf(pdf_file, output_folder, report_type, tables_info, profile=False, output_mode=None):
+        os.makedirs(output_folder, exist_ok=True)
+        output = os.path.join(output_folder, os.path.basename(pdf_file) + ".json")
+        with open(output, "w") as f:
+            f.write("{}")
+        return output
+
+    monkeypatch.setattr(worker_service, "process_pdf", fake_process_pdf)
+    input_dir = os.path.join(config.FOLDER_DCR, "O3")
+    os.makedirs(input_dir)
+    service = WorkerService(workers=1)
+    service.pool = InlinePool()
+    # batch_extract.py بعد از شروع سرویس manifest را به‌روز می‌کند
+    save_manifest({"batch.pdf": {"output": "batch.json"}})
+    for name in ("a.pdf", "b.pdf"):
+        pdf_file = os.path.join(input_dir, name)
+        with open(pdf_file, "wb") as f:
+            f.write(name.encode())
+        assert service.extract([pdf_file])[0][1] is not None
+    assert set(load_manifest()) == {"batch.pdf", os.path.join(input_dir, "a.pdf"), os.path.join(input_dir, "b.pdf")}
@@ -0,0 +1,200 @@
+import os
+import time
+import argparse
+from batch_extract import process_pdf, get_report_type, get_tables_info, get_output_folder, create_writer, OutputCommitter
+from extract_tables_dcr import load_coordinates_points
+from worker_pool import WorkerPool
+from archive import archive_input
+from manifest import load_manifest, update_manifest, template_hash, check_input
+import config
+
+# inotify در صورت نصب بودن inotify_simple؛ در غیر این صورت پوشه‌ها به صورت دوره‌ای بررسی می‌شوند
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+
+class ReportWatcher:
+    """
+    پایش پوشه‌های ورودی و پردازش PDF های جدید با یک process pool گرم
+    فایل فقط وقتی پردازش می‌شود که اندازه و زمان تغییرش به مدت settle_seconds ثابت مانده باشد
+    (تا فایل‌هایی که هنوز در حال آپلود هستند نیمه‌کاره خوانده نشوند)
+    """
+
+    def __init__(self, input_directories=None, workers=None, settle_seconds=None, poll_interval=None, output_mode=None):
+        self.input_directories = input_directories or config.INPUT_DIRECTORIES
+        self.workers = workers or config.MAX_WORKERS
+        self.settle_seconds = config.WATCH_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        self.poll_interval = config.WATCH_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.output_mode = output_mode or config.OUTPUT_MODE
+        # writer حالت‌های jsonl، sqlite و delta (در OutputCommitter) و pool پردازش‌ها در run ساخته می‌شوند
+        self.committer = None
+        self.executor = None
+
+        self.coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+        self.manifest = load_manifest()
+        self.template_hashes = {}
+
+        # فایل‌های در انتظار ثابت شدن: مسیر -> (پوشه ورودی، اندازه، زمان تغییر، زمان آخرین تغییر دیده شده)
+        self.pending = {}
+        # فایل‌های در حال پردازش: future -> (پوشه ورودی، مسیر، اثر فایل، hash template)
+        self.running = {}
+        # فایل‌هایی که پردازششان ناموفق بوده: مسیر -> زمان تغییر (تا فایل تغییر نکند دوباره پردازش نمی‌شود)
+        self.failed = {}
+
+        self.inotify = None
+        self.watch_dirs = {}
+
+    def start_inotify(self):
+        if INotify is None:
+            print("inotify_simple not installed, falling back to polling")
+            return
+        self.inotify = INotify()
+        watch_flags = flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.MODIFY
+        for input_dir in self.input_directories:
+            wd = self.inotify.add_watch(input_dir, watch_flags)
+            self.watch_dirs[wd] = input_dir
+
+    def scan_directories(self):
+        """
+        پیدا کردن همه PDF های موجود در پوشه‌ها (برای شروع کار و حالت polling)
+        """
+        for input_dir in self.input_directories:
+            for file_name in os.listdir(input_dir):
+                self.add_candidate(input_dir, os.path.join(input_dir, file_name))
+
+    def read_inotify_events(self, timeout):
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            input_dir = self.watch_dirs.get(event.wd)
+            if input_dir and event.name:
+                self.add_candidate(input_dir, os.path.join(input_dir, event.name))
+
+    def add_candidate(self, input_dir, pdf_file):
+        file_name = os.path.basename(pdf_file)
+        if not file_name.lower().endswith(".pdf") or file_name.endswith("_flatten.pdf"):
+            return
+        if pdf_file in self.pending or any(job[1] == pdf_file for job in self.running.values()):
+            return
+        try:
+            stat = os.stat(pdf_file)
+        except FileNotFoundError:
+            return
+        if self.failed.get(pdf_file) == stat.st_mtime_ns:
+            return
+        self.pending[pdf_file] = (input_dir, stat.st_size, stat.st_mtime_ns, time.monotonic())
+
+    def settled_files(self):
+        """
+        فایل‌هایی که اندازه و زمان تغییرشان به مدت settle_seconds ثابت مانده است
+        """
+        now = time.monotonic()
+        ready = []
+        for pdf_file, (input_dir, size, mtime, changed_at) in list(self.pending.items()):
+            try:
+                stat = os.stat(pdf_file)
+            except FileNotFoundError:
+                del self.pending[pdf_file]
+                continue
+            if stat.st_size != size or stat.st_mtime_ns != mtime:
+                self.pending[pdf_file] = (input_dir, stat.st_size, stat.st_mtime_ns, now)
+            elif now - changed_at >= self.settle_seconds:
+                del self.pending[pdf_file]
+                ready.append((input_dir, pdf_file))
+        return ready
+
+    def submit(self, executor, input_dir, pdf_file):
+        report_type = get_report_type(input_dir)
+        if report_type is None:
+            return
+        tables_info = get_tables_info(report_type, self.coordinates_points)
+        if not tables_info:
+            return
+
+        if report_type not in self.template_hashes:
+            self.template_hashes[report_type] = template_hash(tables_info)
+        tables_hash = self.template_hashes[report_type]
+        up_to_date, fingerprint = check_input(self.manifest, pdf_file, tables_hash, self.output_mode)
+        if up_to_date:
+            print(f"Unchanged: {os.path.basename(pdf_file)}")
+            archive_input(input_dir, pdf_file, get_output_folder(input_dir))
+            return
+
+        output_folder = get_output_folder(input_dir)
+        future = executor.submit(process_pdf, pdf_file, output_folder, report_type, tables_info, False, self.output_mode)
+        self.running[future] = (input_dir, pdf_file, report_type, fingerprint, tables_hash)
+
+    def collect_finished(self):
+        finished = [future for future in self.running if future.done()]
+        for future in finished:
+            input_dir, pdf_file, report_type, fingerprint, tables_hash = self.running.pop(future)
+            try:
+                result = future.result()
+            except Exception:
+                result = None
+                print(f"Unexpected error while processing {os.path.basename(pdf_file)}")
+            if result is None:
+                self.failed[pdf_file] = fingerprint["mtime"]
+                continue
+            # اگر نوشتن خروجی شکست بخورد فایل در manifest ثبت نمی‌شود و در بررسی بعدی پوشه دوباره پردازش می‌شود
+            self.committer.store(result, pdf_file, input_dir, report_type, fingerprint, tables_hash)
+
+        if finished and self.executor is not None:
+            self.executor.recycle_if_needed()
+
+        # خروجی‌ها قبل از manifest و انتقال فایل‌ها به backup روی دیسک نوشته می‌شوند
+        self.committer.commit()
+        recorded, self.committer.committed = self.committer.committed, []
+        if not recorded:
+            return
+        self.manifest = update_manifest(self.manifest)
+        for input_dir, pdf_file in recorded:
+            archive_input(input_dir, pdf_file, get_output_folder(input_dir))
+
+    def run(self):
+        if not self.coordinates_points:
+            print("Coordinates points not found")
+            return
+
+        for input_dir in self.input_directories:
+            os.makedirs(input_dir, exist_ok=True)
+        self.start_inotify()
+        self.scan_directories()
+        print(f"Watching {len(self.input_directories)} folders with {self.workers} workers")
+
+        self.committer = OutputCommitter(create_writer(self.output_mode), self.manifest, self.output_mode)
+        last_scan = time.monotonic()
+        with WorkerPool(self.workers) as executor:
+            self.executor = executor
+            try:
+                while True:
+                    if self.inotify is not None:
+                        self.read_inotify_events(self.poll_interval)
+                    else:
+                        time.sleep(self.poll_interval)
+                        self.scan_directories()
+
+                    # بررسی دوره‌ای پوشه‌ها حتی با inotify (برای رویدادهای از دست رفته)
+                    if time.monotonic() - last_scan >= config.WATCH_RESCAN_INTERVAL:
+                        self.scan_directories()
+                        last_scan = time.monotonic()
+
+                    for input_dir, pdf_file in self.settled_files():
+                        self.submit(executor, input_dir, pdf_file)
+                    self.collect_finished()
+            except KeyboardInterrupt:
+                print("Stopping watcher, waiting for running files")
+                executor.shutdown(wait=True)
+                self.collect_finished()
+            finally:
+                self.committer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watch config.INPUT_DIRECTORIES and extract new reports as they arrive")
+    parser.add_argument("--workers", type=int, default=config.MAX_WORKERS, help="number of worker processes")
+    parser.add_argument("--settle", type=float, default=config.WATCH_SETTLE_SECONDS, help="seconds a file must stay unchanged before processing")
+    parser.add_argument("--output-mode", choices=config.OUTPUT_MODES, default=config.OUTPUT_MODE, help="one JSON file per report, consolidated JSONL files per rig and month, SQLite, or day-over-day deltas per rig")
+    args = parser.parse_args()
+
+    ReportWatcher(workers=args.workers, settle_seconds=args.settle, output_mode=args.output_mode).run()
@@ -0,0 +1,109 @@
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from metrics import current_rss_kb
+from lazy_import import preload
+import config
+
+
+class WorkerPool:
+    """
+    process pool برای اجراهای طولانی با حافظه محدود
+    - بعد از هر workers * max_files فایل، workers با پردازش‌های جدید جایگزین می‌شوند (به طور متوسط max_files فایل برای هر worker)
+    - اگر RSS یکی از workers از max_rss_mb بیشتر شود فایل‌های بعدی به pool جدیدی فرستاده می‌شوند
+      و workers قبلی بعد از تمام کردن فایل‌هایی که گرفته‌اند بسته می‌شوند
+    مقدار 0 یعنی بدون محدودیت (پیش‌فرض از config)
+    submit و recycle_if_needed از چند thread قابل فراخوانی هستند (مثلاً درخواست‌های همزمان worker_service.py)
+    """
+
+    def __init__(self, workers, max_files=None, max_rss_mb=None):
+        self.workers = workers
+        self.max_files = config.WORKER_MAX_FILES if max_files is None else max_files
+        self.max_rss_mb = config.WORKER_MAX_RSS_MB if max_rss_mb is None else max_rss_mb
+        self.recycled = 0
+        # pid workers جایگزین شده که هنوز در حال تمام کردن فایل‌هایشان هستند
+        self.retired = set()
+        # جایگزینی executor و submit همزمان انجام نمی‌شوند (فایلی به pool بسته شده فرستاده نمی‌شود)
+        self.lock = threading.Lock()
+        # تعداد فایل‌های فرستاده شده به executor فعلی
+        self.submitted = 0
+        # workers با fork ساخته می‌شوند و کتابخانه‌های import شده در پردازش اصلی را به ارث می‌برند
+        # (max_tasks_per_child استفاده نمی‌شود: روش spawn را اجباری می‌کند و preload بی‌اثر می‌شود)
+        preload()
+        self.executor = self._new_executor()
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+    def _replace_executor(self):
+        """
+        فرستادن فایل‌های بعدی به pool جدید؛ workers قبلی بعد از تمام کردن فایل‌هایی که گرفته‌اند بسته می‌شوند
+        (باید با self.lock فراخوانی شود)
+        """
+        self.retired = {process.pid for process in multiprocessing.active_children()}
+        self.executor.shutdown(wait=False)
+        self.executor = self._new_executor()
+        self.submitted = 0
+        self.recycled += 1
+
+    def submit(self, fn, *args):
+        with self.lock:
+            if self.max_files and self.submitted >= self.workers * self.max_files:
+                self._replace_executor()
+            self.submitted += 1
+            return self.executor.submit(fn, *args)
+
+    def worker_rss_kb(self):
+        """
+        حافظه فعلی workers همین pool (کیلوبایت)؛ روی سیستم‌های بدون /proc لیست خالی
+        """
+        pids = [process.pid for process in multiprocessing.active_children() if process.pid not in self.retired]
+        return [rss for rss in map(current_rss_kb, pids) if rss is not None]
+
+    def recycle_if_needed(self):
+        """
+        بعد از تمام شدن هر فایل فراخوانی می‌شود؛ True اگر workers جایگزین شده باشند
+        """
+        if not self.max_rss_mb:
+            return False
+        with self.lock:
+            # thread دیگری ممکن است همین حالا workers را جایگزین کرده باشد؛ حافظه دوباره بررسی می‌شود
+            if max(self.worker_rss_kb(), default=0) <= self.max_rss_mb * 1024:
+                return False
+
+            self._replace_executor()
+        print(f"Worker memory above {self.max_rss_mb} MB, recycling workers")
+        return True
+
+    def run(self, fn, jobs):
+        """
+        اجرای fn(*args) برای هر (tag, args) در jobs و برگرداندن (tag, future) به ترتیب تمام شدن
+        فقط workers فایل همزمان فرستاده می‌شود تا بعد از جایگزینی workers فایل‌های باقی‌مانده به pool جدید بروند
+        """
+        jobs = iter(jobs)
+        futures = {}
+
+        def submit_next():
+            for tag, args in jobs:
+                futures[self.submit(fn, *args)] = tag
+                return
+
+        for _ in range(self.workers):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield futures.pop(future), future
+                self.recycle_if_needed()
+                submit_next()
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executor = self.executor
+        executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,177 @@
+import os
+import argparse
+import threading
+from multiprocessing.connection import Listener, Client
+from batch_extract import process_pdf, get_report_type, get_tables_info, get_output_folder, run_single
+from extract_tables_dcr import load_coordinates_points
+from report_engine import REPORT_TEMPLATES
+from manifest import load_manifest, update_manifest, template_hash, check_input, record_output
+from worker_pool import WorkerPool
+import config
+
+
+class WorkerService:
+    """
+    پردازش ماندگار برای درخواست‌های کوتاه (مثلاً cron برای هر فایل):
+    کتابخانه‌ها، coordinates_points و manifest یک بار بارگذاری می‌شوند و WorkerPool بین درخواست‌ها گرم می‌ماند
+    درخواست‌ها از طریق multiprocessing.connection و به صورت dict فرستاده می‌شوند:
+    {"command": "extract", "files": [...], "report_type": None, "force": False}، {"command": "ping"} یا {"command": "stop"}
+    مسیر فایل‌ها نسبت به پوشه اجرای سرویس است (مثل batch_extract.py)
+    """
+
+    def __init__(self, workers=None, address=None):
+        self.workers = workers or config.MAX_WORKERS
+        self.address = address or config.WORKER_SERVICE_ADDRESS
+        self.coordinates_points = load_coordinates_points(config.COORDINATES_POINTS_PATH)
+        self.manifest = load_manifest()
+        self.manifest_lock = threading.Lock()
+        self.template_hashes = {}
+        self.pool = None
+        self.stopping = False
+
+    def extract(self, files, report_type=None, force=False):
+        """
+        استخراج فایل‌ها در pool گرم؛ خروجی: لیست (مسیر فایل، مسیر JSON خروجی یا None)
+        فایل‌هایی که طبق manifest خروجی معتبر دارند دوباره پردازش نمی‌شوند (مگر با force=True)
+        """
+        outputs = {}
+        jobs = []
+        # اجرای batch_extract.py ممکن است بعد از شروع سرویس manifest را به‌روز کرده باشد
+        with self.manifest_lock:
+            self.manifest = load_manifest()
+        for pdf_file in files:
+            input_dir = os.path.dirname(pdf_file)
+            file_type = report_type or get_report_type(input_dir)
+            tables_info = get_tables_info(file_type, self.coordinates_points) if file_type in REPORT_TEMPLATES else None
+            if not tables_info or not os.path.exists(pdf_file):
+                print(f"Cannot extract {os.path.basename(pdf_file)}")
+                outputs[pdf_file] = None
+                continue
+
+            if file_type not in self.template_hashes:
+                self.template_hashes[file_type] = template_hash(tables_info)
+            tables_hash = self.template_hashes[file_type]
+            with self.manifest_lock:
+                up_to_date, fingerprint = check_input(self.manifest, pdf_file, tables_hash, "json")
+                if up_to_date and not force:
+                    outputs[pdf_file] = self.manifest[pdf_file]["output"]
+                    continue
+
+            future = self.pool.submit(process_pdf, pdf_file, get_output_folder(input_dir), file_type, tables_info, False, "json")
+            jobs.append((pdf_file, future, fingerprint, tables_hash))
+
+        recorded = {}
+        for pdf_file, future, fingerprint, tables_hash in jobs:
+            try:
+                outputs[pdf_file] = future.result()
+            except Exception:
+                outputs[pdf_file] = None
+                print(f"Unexpected error while processing {os.path.basename(pdf_file)}")
+            if outputs[pdf_file] is not None:
+                record_output(recorded, pdf_file, fingerprint, tables_hash, outputs[pdf_file], "json")
+
+        if jobs:
+            # فقط ردیف‌های همین درخواست با manifest روی دیسک ادغام می‌شوند (ردیف‌های پردازش‌های دیگر بازنویسی نمی‌شوند)
+            with self.manifest_lock:
+                self.manifest = update_manifest(recorded)
+            self.pool.recycle_if_needed()
+        return [(pdf_file, outputs[pdf_file]) for pdf_file in files]
+
+    def handle(self, connection):
+        with connection:
+            try:
+                request = connection.recv()
+                command = request.get("command") if isinstance(request, dict) else None
+                if command == "extract":
+                    connection.send(self.extract(request.get("files", []), request.get("report_type"), request.get("force", False)))
+                elif command == "ping":
+                    connection.send("ok")
+                elif command == "stop":
+                    self.stopping = True
+                    connection.send("stopping")
+                    # بیدار کردن accept در حلقه اصلی
+                    Client(self.address, authkey=config.WORKER_SERVICE_AUTHKEY).close()
+                else:
+                    connection.send(None)
+            except EOFError:
+                pass
+            except Exception:
+                print("Unexpected error while handling worker service request")
+
+    def serve(self):
+        if not self.coordinates_points:
+            print("Coordinates points not found")
+            return
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            if send_request({"command": "ping"}, self.address) is not False:
+                print(f"Worker service already running on {self.address}")
+                return
+            # socket باقی‌مانده از اجرای قبلی که درست بسته نشده است
+            os.remove(self.address)
+        if not isinstance(self.address, str) and config.WORKER_SERVICE_AUTHKEY is None:
+            # درخواست‌ها pickle هستند؛ بدون authkey هر کسی در شبکه می‌تواند کد اجرا کند
+            print("Worker service over TCP requires WORKER_SERVICE_AUTHKEY")
+            return
+        if isinstance(self.address, str):
+            os.makedirs(os.path.dirname(self.address) or ".", exist_ok=True)
+
+        # WorkerPool کتابخانه‌های سنگین را قبل از ساختن workers import می‌کند
+        self.pool = WorkerPool(self.workers)
+        # socket قبل از ساخته شدن فقط برای کاربر فعلی قابل دسترسی است
+        previous_umask = os.umask(0o077)
+        try:
+            listener = Listener(self.address, authkey=config.WORKER_SERVICE_AUTHKEY)
+        finally:
+            os.umask(previous_umask)
+        print(f"Worker service listening on {self.address} with {self.workers} workers")
+        try:
+            while not self.stopping:
+                connection = listener.accept()
+                if self.stopping:
+                    connection.close()
+                    break
+                threading.Thread(target=self.handle, args=(connection,), daemon=True).start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print("Stopping worker service")
+            listener.close()
+            self.pool.shutdown()
+
+
+def send_request(request, address=None):
+    """
+    ارسال یک درخواست به سرویس و برگرداندن پاسخ آن
+    False اگر سرویس در حال اجرا نباشد یا اتصال قبل از پاسخ قطع شود (فراخواننده در همین پردازش استخراج می‌کند)
+    """
+    try:
+        with Client(address or config.WORKER_SERVICE_ADDRESS, authkey=config.WORKER_SERVICE_AUTHKEY) as connection:
+            connection.send(request)
+            return connection.recv()
+    except (FileNotFoundError, ConnectionRefusedError, ConnectionResetError, BrokenPipeError, EOFError):
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep a warm pool of extraction workers running and send PDFs to it")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="start the worker service")
+    serve_parser.add_argument("--workers", type=int, default=config.MAX_WORKERS, help="number of worker processes")
+    extract_parser = subparsers.add_parser("extract", help="extract PDFs with the running service")
+    extract_parser.add_argument("pdf_files", nargs="+")
+    extract_parser.add_argument("--report-type", choices=sorted(REPORT_TEMPLATES), help="report type (default: from each file's folder)")
+    extract_parser.add_argument("--force", action="store_true", help="re-extract files even if the manifest says they are unchanged")
+    subparsers.add_parser("stop", help="stop the running service")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        WorkerService(workers=args.workers).serve()
+    elif args.command == "extract":
+        results = send_request({"command": "extract", "files": args.pdf_files, "report_type": args.report_type, "force": args.force})
+        if results is False:
+            print("Worker service not running, extracting in this process")
+            results = [(pdf_file, run_single(pdf_file, args.report_type)) for pdf_file in args.pdf_files]
+        for pdf_file, json_path in results:
+            print(f"{pdf_file}: {json_path or 'failed'}")
+    elif send_request({"command": "stop"}) is False:
+        print("Worker service not running")